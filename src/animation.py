@@ -0,0 +1,462 @@
+from __future__ import annotations
+
+import dataclasses
+import io
+import struct
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import click
+import numpy as np
+from PIL import Image
+
+from cube import Cube, make_white_up_green_front_cube
+from moves import STICKER_DTYPE
+from renderer import RasterCubeRenderer
+from solver import OldPochmannSolver
+
+if TYPE_CHECKING:
+    from typing import BinaryIO, Iterator
+
+    from renderer import ColorSpec, PilImage
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+@dataclasses.dataclass(frozen=True)
+class Frame:
+    label: str  # what was applied to reach the frame, e.g., "edge A", "parity" or "edge A: Lw"
+    image: PilImage  # "P" mode image of the area that changed since the previous frame
+    position: tuple[int, int]  # (x, y) of the area in the full image
+
+
+class SolveAnimator:
+    """Render the states of a cube after every letter (or every move) of a memo.
+
+    Only the stickers that changed since the previous frame are redrawn, and every frame but the
+    first one only holds the area that changed, so frames are cheap to render and to encode.
+    Frames are generated lazily, so they can be streamed into `GifWriter` or `ApngWriter`.
+    """
+
+    def __init__(
+        self,
+        solver: OldPochmannSolver | None = None,
+        renderer: RasterCubeRenderer | None = None,
+        per_move: bool = False,
+    ) -> None:
+        if solver is None:
+            solver = OldPochmannSolver()
+        if renderer is None:
+            renderer = RasterCubeRenderer(image_width=512, image_height=384)
+        self.solver = solver
+        self.renderer = renderer
+        self.per_move = per_move
+
+    @property
+    def palette(self) -> list[ColorSpec]:
+        return [
+            self.renderer.background_color,
+            self.renderer.piece_border_color,
+            *self.renderer.color_map.values(),
+        ]
+
+    def _steps(
+        self,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool,
+        apply_parity: bool,
+    ) -> list[tuple[str, np.ndarray]]:
+        """Return the label and sticker permutation of every step in the order of the solve."""
+        letter_transforms = self.solver.letter_transforms
+        letter_steps = self.solver.arrange_phases(
+            [(f"edge {letter}", letter, "") for letter in edge_swap_letters],
+            [(f"corner {letter}", "", letter) for letter in corner_swap_letters],
+            ("parity", None, None),
+            corners_first,
+            apply_parity,
+        )
+
+        steps = []
+        for label, edge_swap_letter, corner_swap_letter in letter_steps:
+            if not self.per_move:
+                if edge_swap_letter is None:
+                    permutation = letter_transforms.parity
+                elif edge_swap_letter:
+                    permutation = letter_transforms.edges[edge_swap_letter]
+                else:
+                    permutation = letter_transforms.corners[corner_swap_letter]
+                steps.append((label, permutation))
+                continue
+
+            if edge_swap_letter is None:
+                moves = self.solver.parity_moves
+            else:
+                moves = self.solver.swaps_to_moves(
+                    edge_swap_letter, corner_swap_letter, apply_parity=False
+                )
+            compile_moves = self.solver.move_compiler.compile
+            steps.extend((f"{label}: {move}", compile_moves(move)) for move in moves.split())
+
+        return steps
+
+    def count_frames(
+        self,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool = False,
+        apply_parity: bool = True,
+    ) -> int:
+        steps = self._steps(edge_swap_letters, corner_swap_letters, corners_first, apply_parity)
+        return len(steps) + 1
+
+    def iter_frames(
+        self,
+        cube: Cube,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool = False,
+        apply_parity: bool = True,
+    ) -> Iterator[Frame]:
+        """Yield the frame of the initial state and of the state after every step.
+
+        The given cube is left unchanged.
+        """
+        steps = self._steps(edge_swap_letters, corner_swap_letters, corners_first, apply_parity)
+        palette_image = _palette_image(self.palette)
+
+        stickers = np.frombuffer(cube.as_flat_str().encode("ascii"), dtype=STICKER_DTYPE)
+        working_cube = Cube.from_flat_str(cube.as_flat_str())
+        image = self.renderer.render(working_cube)
+        yield Frame("initial", _quantize(image, palette_image), (0, 0))
+
+        for label, permutation in steps:
+            next_stickers = stickers[permutation]
+            working_cube.apply_permutation(permutation)
+            changed_stickers = np.flatnonzero(next_stickers != stickers).tolist()
+            stickers = next_stickers
+
+            box = self.renderer.redraw(image, working_cube, changed_stickers)
+            if box is None:
+                # Encoders need a non-empty frame, so an unchanged pixel is repeated
+                box = (0, 0, 1, 1)
+            yield Frame(label, _quantize(image.crop(box), palette_image), box[:2])
+
+    def write_gif(
+        self,
+        file: BinaryIO,
+        cube: Cube,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool = False,
+        apply_parity: bool = True,
+        frame_duration_ms: int = 500,
+        loop: int = 0,
+    ) -> None:
+        writer = GifWriter(
+            file,
+            (self.renderer.image_width, self.renderer.image_height),
+            self.palette,
+            frame_duration_ms,
+            loop,
+        )
+        for frame in self.iter_frames(
+            cube, edge_swap_letters, corner_swap_letters, corners_first, apply_parity
+        ):
+            writer.write_frame(frame)
+        writer.close()
+
+    def write_apng(
+        self,
+        file: BinaryIO,
+        cube: Cube,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool = False,
+        apply_parity: bool = True,
+        frame_duration_ms: int = 500,
+        loop: int = 0,
+    ) -> None:
+        writer = ApngWriter(
+            file,
+            (self.renderer.image_width, self.renderer.image_height),
+            self.count_frames(edge_swap_letters, corner_swap_letters, corners_first, apply_parity),
+            frame_duration_ms,
+            loop,
+        )
+        for frame in self.iter_frames(
+            cube, edge_swap_letters, corner_swap_letters, corners_first, apply_parity
+        ):
+            writer.write_frame(frame)
+        writer.close()
+
+
+def _palette_image(palette: list[ColorSpec]) -> PilImage:
+    palette_image = Image.new("P", (1, 1))
+    palette_image.putpalette([channel for color in palette for channel in color])
+    return palette_image
+
+
+def _quantize(image: PilImage, palette_image: PilImage) -> PilImage:
+    # Every rendered color is in the palette, so the quantization is exact
+    return image.quantize(palette=palette_image, dither=Image.Dither.NONE)
+
+
+class GifWriter:
+    """Write an animated GIF one frame at a time.
+
+    Frames share one global palette and are drawn over the previous ones, so they only need to
+    cover the area that changed. Every frame is LZW-encoded by Pillow and its image data is copied
+    into the stream, so no more than one frame is held in memory.
+    """
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        size: tuple[int, int],
+        palette: list[ColorSpec],
+        frame_duration_ms: int,
+        loop: int = 0,
+    ) -> None:
+        self._file = file
+        self._delay_cs = max(frame_duration_ms // 10, 1)
+
+        # The color table size must be a power of two between 2 and 256
+        table_size_bits = max((len(palette) - 1).bit_length(), 1)
+        color_table = b"".join(bytes(color) for color in palette)
+        color_table = color_table.ljust(3 << table_size_bits, b"\x00")
+
+        file.write(b"GIF89a")
+        # Logical screen descriptor with a global color table
+        file.write(struct.pack("<HHBBB", *size, 0xF0 | (table_size_bits - 1), 0, 0))
+        file.write(color_table)
+        # Netscape application extension setting the no. of loops (0 loops forever)
+        file.write(b"\x21\xff\x0bNETSCAPE2.0" + struct.pack("<BBHB", 3, 1, loop, 0))
+
+    def write_frame(self, frame: Frame) -> None:
+        gif_file = io.BytesIO()
+        frame.image.save(gif_file, format="GIF", optimize=False, interlace=False)
+        image_data = _gif_image_data(gif_file.getvalue())
+
+        # Graphic control extension: keep the previous frame below this one
+        self._file.write(struct.pack("<BBBBHBB", 0x21, 0xF9, 4, 1 << 2, self._delay_cs, 0, 0))
+        # Image descriptor without a local color table
+        self._file.write(struct.pack("<BHHHHB", 0x2C, *frame.position, *frame.image.size, 0))
+        self._file.write(image_data)
+
+    def close(self) -> None:
+        self._file.write(b"\x3b")
+
+
+def _gif_image_data(gif: bytes) -> bytes:
+    """Return the LZW minimum code size and data sub-blocks of the first image of a GIF."""
+
+    def skip_color_table(position: int, flags: int) -> int:
+        if flags & 0x80:
+            position += 3 << ((flags & 0x07) + 1)
+        return position
+
+    def skip_sub_blocks(position: int) -> int:
+        while gif[position]:
+            position += gif[position] + 1
+        return position + 1
+
+    position = skip_color_table(13, gif[10])
+    while True:
+        block_type = gif[position]
+        if block_type == 0x21:
+            position = skip_sub_blocks(position + 2)
+        elif block_type == 0x2C:
+            image_data_start = skip_color_table(position + 10, gif[position + 9])
+            image_data_end = skip_sub_blocks(image_data_start + 1)
+            return gif[slice(image_data_start, image_data_end)]
+        else:
+            raise ValueError(f"unexpected GIF block type {block_type:#x}")
+
+
+class ApngWriter:
+    """Write an animated PNG one frame at a time.
+
+    The no. of frames must be known upfront since it precedes the frames in the stream. Frames
+    are PNG-encoded by Pillow and their image data is copied into the stream, so no more than one
+    frame is held in memory. The first frame must cover the whole image.
+    """
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        size: tuple[int, int],
+        n_frames: int,
+        frame_duration_ms: int,
+        loop: int = 0,
+    ) -> None:
+        self._file = file
+        self._size = size
+        self._n_frames = n_frames
+        self._frame_duration_ms = frame_duration_ms
+        self._loop = loop
+        self._n_written_frames = 0
+        self._sequence_number = 0
+
+    def write_frame(self, frame: Frame) -> None:
+        if self._n_written_frames == self._n_frames:
+            raise ValueError(f"more than the declared {self._n_frames} frames were written")
+
+        png_file = io.BytesIO()
+        frame.image.save(png_file, format="PNG")
+        chunks = list(_png_chunks(png_file.getvalue()))
+
+        if self._n_written_frames == 0:
+            if (frame.position, frame.image.size) != ((0, 0), self._size):
+                raise ValueError("the first frame must cover the whole image")
+            self._file.write(PNG_SIGNATURE)
+            for chunk_type, chunk_data in chunks:
+                if chunk_type == b"IHDR":
+                    self._write_chunk(chunk_type, chunk_data)
+                    self._write_chunk(b"acTL", struct.pack(">II", self._n_frames, self._loop))
+                elif chunk_type in (b"PLTE", b"tRNS"):
+                    self._write_chunk(chunk_type, chunk_data)
+
+        self._write_chunk(
+            b"fcTL",
+            struct.pack(
+                ">IIIIIHHBB",
+                self._next_sequence_number(),
+                *frame.image.size,
+                *frame.position,
+                self._frame_duration_ms,
+                1000,
+                0,  # no disposal, so the next frame is drawn over this one
+                0,  # the frame replaces the pixels of its area
+            ),
+        )
+        for chunk_type, chunk_data in chunks:
+            if chunk_type == b"IDAT":
+                if self._n_written_frames == 0:
+                    self._write_chunk(b"IDAT", chunk_data)
+                else:
+                    sequence_number = struct.pack(">I", self._next_sequence_number())
+                    self._write_chunk(b"fdAT", sequence_number + chunk_data)
+
+        self._n_written_frames += 1
+
+    def close(self) -> None:
+        if self._n_written_frames != self._n_frames:
+            raise ValueError(
+                f"{self._n_written_frames} frames were written instead of {self._n_frames}"
+            )
+        self._write_chunk(b"IEND", b"")
+
+    def _next_sequence_number(self) -> int:
+        self._sequence_number += 1
+        return self._sequence_number - 1
+
+    def _write_chunk(self, chunk_type: bytes, chunk_data: bytes) -> None:
+        self._file.write(struct.pack(">I", len(chunk_data)))
+        self._file.write(chunk_type)
+        self._file.write(chunk_data)
+        self._file.write(struct.pack(">I", zlib.crc32(chunk_type + chunk_data)))
+
+
+def _png_chunks(png: bytes) -> Iterator[tuple[bytes, bytes]]:
+    position = len(PNG_SIGNATURE)
+    while position < len(png):
+        length, chunk_type = struct.unpack_from(">I4s", png, position)
+        yield chunk_type, png[slice(position + 8, position + 8 + length)]
+        position += length + 12
+
+
+@click.command()
+@click.argument("edge_swap_letters", type=str)
+@click.argument("corner_swap_letters", type=str)
+@click.argument("output_file", type=click.Path(dir_okay=False, path_type=Path))
+@click.option(
+    "--corners-first",
+    is_flag=True,
+    help="indicates whether to apply corner swaps before edge swaps",
+)
+@click.option(
+    "--reverse-swap-letters",
+    is_flag=True,
+    help="indicates whether to reverse swap letter sequences (useful for verifying solves)",
+)
+@click.option(
+    "--apply-parity",
+    is_flag=True,
+    help="indicates whether to apply parity if there is an odd number of swaps",
+)
+@click.option(
+    "--initial-flat-str",
+    default=None,
+    help="flat string of the state the letters are applied to (the solved cube by default)",
+)
+@click.option("--per-move", is_flag=True, help="indicates whether to emit a frame per move")
+@click.option(
+    "-d",
+    "--frame-duration",
+    type=click.IntRange(min=10),
+    default=500,
+    show_default=True,
+    help="duration of a frame in milliseconds",
+)
+@click.option(
+    "-w",
+    "--image-width",
+    type=int,
+    default=512,
+    show_default=True,
+    help="width of the rendered frames",
+)
+@click.option(
+    "-h",
+    "--image-height",
+    type=int,
+    default=384,
+    show_default=True,
+    help="height of the rendered frames",
+)
+def main(
+    edge_swap_letters: str,
+    corner_swap_letters: str,
+    output_file: Path,
+    corners_first: bool,
+    reverse_swap_letters: bool,
+    apply_parity: bool,
+    initial_flat_str: str | None,
+    per_move: bool,
+    frame_duration: int,
+    image_width: int,
+    image_height: int,
+) -> None:
+    """Animate the solve into OUTPUT_FILE (GIF, or APNG for the .png and .apng extensions)."""
+    if initial_flat_str is None:
+        cube = make_white_up_green_front_cube()
+    else:
+        cube = Cube.from_flat_str(initial_flat_str)
+
+    if reverse_swap_letters:
+        edge_swap_letters = edge_swap_letters[::-1]
+        corner_swap_letters = corner_swap_letters[::-1]
+
+    animator = SolveAnimator(
+        renderer=RasterCubeRenderer(image_width, image_height), per_move=per_move
+    )
+    write = animator.write_gif
+    if output_file.suffix.lower() in (".png", ".apng"):
+        write = animator.write_apng
+
+    with output_file.open("wb") as file:
+        write(
+            file,
+            cube,
+            edge_swap_letters,
+            corner_swap_letters,
+            corners_first,
+            apply_parity,
+            frame_duration,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import dataclasses
+import functools
+import json
+import platform
+import sys
+import tempfile
+import time
+import weakref
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import click
+
+from cube import Cube, make_white_up_green_front_cube
+from moves import parse_moves
+from renderer import CubeRenderer, RasterCubeRenderer
+from solver import OldPochmannSolver
+
+if TYPE_CHECKING:
+    from typing import IO, Any, Callable
+
+DEFAULT_BASELINE_PATH = Path(__file__).parent / "benchmark_baseline.json"
+
+# Full memo of a random scramble (the scramble is solved by the letters applied in reverse)
+EDGE_SWAP_LETTERS = "CSWJVNFYIDE"
+CORNER_SWAP_LETTERS = "WCMDIHTOY"
+
+SHORT_MOVES = "R U Ri Ui"
+LONG_MOVES = " ".join(["R U Ri Ui F R U Ri Ui Fi L D Bi R R Ui"] * 8)
+
+RENDER_RESOLUTIONS = [(320, 240), (1024, 768), (2048, 1536)]
+
+
+@dataclasses.dataclass(frozen=True)
+class Benchmark:
+    name: str
+    # Called once outside of the timed region, returns the function whose calls are timed
+    make_function: Callable[[], Callable[[], Any]]
+
+
+@dataclasses.dataclass(frozen=True)
+class BenchmarkResult:
+    name: str
+    seconds_per_call: float  # the best of the repeats
+    n_calls: int  # no. of calls per repeat
+
+
+def _make_apply_moves_function(moves: str) -> Callable[[], Any]:
+    cube = make_white_up_green_front_cube()
+    return lambda: cube.apply_moves(moves)
+
+
+def _make_apply_opcodes_function(moves: str) -> Callable[[], Any]:
+    cube = make_white_up_green_front_cube()
+    opcodes = parse_moves(moves)
+    return lambda: cube.apply_opcodes(opcodes)
+
+
+def _make_cube_init_function() -> Callable[[], Any]:
+    faces = list(make_white_up_green_front_cube())
+    return lambda: Cube(*faces)
+
+
+def _make_cube_copy_function() -> Callable[[], Any]:
+    cube = _make_scrambled_cube()
+    return cube.copy
+
+
+def _make_cube_from_flat_str_function() -> Callable[[], Any]:
+    flat_str = _make_scrambled_cube().as_flat_str()
+    return lambda: Cube.from_flat_str(flat_str)
+
+
+def _make_cube_reset_to_function() -> Callable[[], Any]:
+    cube = make_white_up_green_front_cube()
+    flat_str = _make_scrambled_cube().as_flat_str()
+    return lambda: cube.reset_to(flat_str)
+
+
+def _make_iter_function() -> Callable[[], Any]:
+    cube = make_white_up_green_front_cube()
+    return lambda: list(cube)
+
+
+def _make_swaps_to_moves_function() -> Callable[[], Any]:
+    solver = OldPochmannSolver()
+    return lambda: solver.swaps_to_moves(EDGE_SWAP_LETTERS, CORNER_SWAP_LETTERS)
+
+
+def _make_solve_function(with_pair_table: bool = False) -> Callable[[], Any]:
+    if with_pair_table:
+        # Built in a temporary directory (removed with the solver) to keep the source tree clean
+        tables_dir = tempfile.TemporaryDirectory()
+        solver = OldPochmannSolver(pair_tables_dir=tables_dir.name)
+        weakref.finalize(solver, tables_dir.cleanup)
+    else:
+        solver = OldPochmannSolver()
+    cube = make_white_up_green_front_cube()
+    return lambda: solver.solve(cube, EDGE_SWAP_LETTERS, CORNER_SWAP_LETTERS)
+
+
+def _make_scrambled_cube() -> Cube:
+    cube = make_white_up_green_front_cube()
+    OldPochmannSolver().solve(cube, EDGE_SWAP_LETTERS[::-1], CORNER_SWAP_LETTERS[::-1])
+    return cube
+
+
+def _make_render_function(
+    renderer_type: type[CubeRenderer], image_width: int, image_height: int
+) -> Callable[[], Any]:
+    renderer = renderer_type(image_width, image_height)
+    cube = _make_scrambled_cube()
+    return lambda: renderer.render(cube)
+
+
+def _make_render_arrays_function(
+    image_width: int, image_height: int, n_cubes: int
+) -> Callable[[], Any]:
+    renderer = RasterCubeRenderer(image_width, image_height)
+    cubes = [_make_scrambled_cube()] * n_cubes
+    return lambda: renderer.render_arrays(cubes)
+
+
+BENCHMARKS = [
+    Benchmark("cube.apply_moves.short", lambda: _make_apply_moves_function(SHORT_MOVES)),
+    Benchmark("cube.apply_moves.long", lambda: _make_apply_moves_function(LONG_MOVES)),
+    Benchmark("cube.apply_opcodes.long", lambda: _make_apply_opcodes_function(LONG_MOVES)),
+    Benchmark("cube.init", _make_cube_init_function),
+    Benchmark("cube.make_white_up_green_front_cube", lambda: make_white_up_green_front_cube),
+    Benchmark("cube.copy", _make_cube_copy_function),
+    Benchmark("cube.from_flat_str", _make_cube_from_flat_str_function),
+    Benchmark("cube.reset_to", _make_cube_reset_to_function),
+    Benchmark("cube.iter", _make_iter_function),
+    Benchmark("solver.swaps_to_moves", _make_swaps_to_moves_function),
+    Benchmark("solver.solve", _make_solve_function),
+    Benchmark("solver.solve.pair_table", lambda: _make_solve_function(with_pair_table=True)),
+    *(
+        Benchmark(
+            f"renderer.{name}.{image_width}x{image_height}",
+            functools.partial(_make_render_function, renderer_type, image_width, image_height),
+        )
+        for name, renderer_type in (("render", CubeRenderer), ("raster_render", RasterCubeRenderer))
+        for image_width, image_height in RENDER_RESOLUTIONS
+    ),
+    Benchmark(
+        "renderer.raster_render_arrays.160x120x100",
+        lambda: _make_render_arrays_function(160, 120, 100),
+    ),
+]
+
+
+def run_benchmark(benchmark: Benchmark, min_time: float, repeat: int) -> BenchmarkResult:
+    """Time a benchmark like `timeit`: the no. of calls is doubled until a repeat lasts at least
+    `min_time` seconds, and the fastest of `repeat` repeats is reported."""
+    function = benchmark.make_function()
+    function()  # warm up caches
+
+    n_calls = 1
+    while True:
+        elapsed_time = _time_calls(function, n_calls)
+        if elapsed_time >= min_time:
+            break
+        n_calls *= 2
+
+    best_time = min([elapsed_time] + [_time_calls(function, n_calls) for _ in range(repeat - 1)])
+    return BenchmarkResult(benchmark.name, best_time / n_calls, n_calls)
+
+
+def _time_calls(function: Callable[[], Any], n_calls: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(n_calls):
+        function()
+    return time.perf_counter() - start_time
+
+
+def find_regressions(
+    results: list[BenchmarkResult], baseline: dict[str, float], tolerance: float
+) -> list[str]:
+    """Describe the benchmarks that are slower than the baseline by more than `tolerance`."""
+    regressions = []
+    for result in results:
+        baseline_seconds_per_call = baseline.get(result.name)
+        if baseline_seconds_per_call is None:
+            continue
+        ratio = result.seconds_per_call / baseline_seconds_per_call
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{result.name}: {_format_time(result.seconds_per_call)} per call, "
+                f"{ratio:.2f}x the baseline of {_format_time(baseline_seconds_per_call)}"
+            )
+    return regressions
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+@click.command()
+@click.option(
+    "-k",
+    "--filter",
+    "name_filter",
+    default="",
+    help="run only the benchmarks whose names contain this substring",
+)
+@click.option(
+    "-o",
+    "--output-file",
+    type=click.File("w"),
+    default=None,
+    help="JSON file to write the results to (stdout by default)",
+)
+@click.option(
+    "-b",
+    "--baseline-file",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=DEFAULT_BASELINE_PATH,
+    show_default=True,
+    help="JSON file with the baseline seconds per call of every benchmark",
+)
+@click.option(
+    "--save-baseline",
+    is_flag=True,
+    help="indicates whether to update the baseline with the results instead of comparing",
+)
+@click.option(
+    "-t",
+    "--tolerance",
+    type=click.FloatRange(min=0),
+    default=1.0,
+    show_default=True,
+    help="allowed relative slowdown against the baseline",
+)
+@click.option(
+    "--min-time",
+    type=click.FloatRange(min=0),
+    default=0.2,
+    show_default=True,
+    help="minimum duration of a repeat in seconds",
+)
+@click.option(
+    "-r",
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=5,
+    show_default=True,
+    help="no. of repeats of which the fastest one is reported",
+)
+def main(
+    name_filter: str,
+    output_file: IO[str] | None,
+    baseline_file: Path,
+    save_baseline: bool,
+    tolerance: float,
+    min_time: float,
+    repeat: int,
+) -> None:
+    """Benchmark the hot paths of the cube, the solver and the renderer.
+
+    Results are compared against the baseline file and the command fails if any benchmark
+    regressed by more than the tolerance. Baselines are machine-specific, so regenerate them
+    with `--save-baseline` when switching machines.
+    """
+    results = []
+    for benchmark in BENCHMARKS:
+        if name_filter in benchmark.name:
+            results.append(run_benchmark(benchmark, min_time, repeat))
+            click.echo(
+                f"{benchmark.name}: {_format_time(results[-1].seconds_per_call)} per call",
+                err=True,
+            )
+
+    report = {
+        "python": sys.version.split()[0],
+        "machine": platform.machine(),
+        "benchmarks": [dataclasses.asdict(result) for result in results],
+    }
+    report_json = json.dumps(report, indent=2)
+    if output_file is None:
+        click.echo(report_json)
+    else:
+        output_file.write(report_json + "\n")
+
+    baseline = json.loads(baseline_file.read_text()) if baseline_file.exists() else None
+
+    if save_baseline:
+        # Benchmarks that were filtered out keep their previous baseline
+        baseline = baseline or {}
+        baseline.update({result.name: result.seconds_per_call for result in results})
+        baseline_file.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        return
+
+    if baseline is None:
+        click.echo(f"No baseline found at {baseline_file}, skipping the comparison", err=True)
+        return
+
+    regressions = find_regressions(results, baseline, tolerance)
+    if regressions:
+        raise click.ClickException(
+            "performance regressions against the baseline:\n" + "\n".join(regressions)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import collections
+import dataclasses
+import functools
+import operator
+
+import numpy as np
+
+from cube import Cube, make_white_up_green_front_cube
+from moves import (
+    FACE_STICKER_INDICES,
+    INVERSE_ROTATION_PERMUTATIONS,
+    N_STICKERS,
+    ROTATION_PERMUTATIONS,
+    STICKER_DTYPE,
+    compose,
+)
+from solver import OldPochmannSolver
+
+CENTER_STICKERS = FACE_STICKER_INDICES[:, 4]
+
+# Colors that the centers are relabeled to, i.e., the ones of the white up green front cube
+STANDARD_CENTER_COLORS = bytes(
+    make_white_up_green_front_cube().as_flat_str().encode("ascii")[sticker]
+    for sticker in CENTER_STICKERS
+)
+
+DEFAULT_MAX_SIZE = 4096
+
+_IDENTITY_TABLE = bytes(range(256))
+
+
+def _make_rotation_color_tables() -> list[bytes]:
+    """Return, for every rotation, the translation table of face labels to the standard colors.
+
+    A rotation moves the center of face `k` to the center of face `faces[k]`, so a sticker of
+    the color of the center of face `faces[k]` is relabeled to the standard color of face `k`.
+    """
+    face_by_center = {center: face for face, center in enumerate(CENTER_STICKERS.tolist())}
+    color_tables = []
+    for rotation_permutation in ROTATION_PERMUTATIONS.tolist():
+        colors = bytearray(len(CENTER_STICKERS))
+        for face, center in enumerate(CENTER_STICKERS.tolist()):
+            colors[face_by_center[rotation_permutation[center]]] = STANDARD_CENTER_COLORS[face]
+        color_tables.append(bytes.maketrans(_FACES, colors))
+    return color_tables
+
+
+_FACES = bytes(range(len(CENTER_STICKERS)))
+_ROTATION_COLOR_TABLES = _make_rotation_color_tables()
+_GET_CENTERS = operator.itemgetter(*CENTER_STICKERS.tolist())
+# Bounds of the stickers of every rotation within the bytes of all of them
+_ROTATION_BOUNDS = [
+    (rotation * N_STICKERS, (rotation + 1) * N_STICKERS)
+    for rotation in range(len(ROTATION_PERMUTATIONS))
+]
+
+CacheInfo = collections.namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+@dataclasses.dataclass(frozen=True)
+class CanonicalState:
+    """The representative of the states equivalent to a state, and how to get there.
+
+    The representative is the state rotated by `ROTATION_PERMUTATIONS[rotation]`, then with its
+    colors translated by `color_table` (the identity if colors are not relabeled).
+    """
+
+    stickers: bytes  # ASCII stickers of the representative, in the flat string layout
+    rotation: int
+    color_table: bytes = _IDENTITY_TABLE
+    inverse_color_table: bytes = _IDENTITY_TABLE
+
+    def to_canonical(self, stickers: bytes) -> bytes:
+        """Map stickers of a state in the frame of the original state to the canonical frame."""
+        rotated = np.frombuffer(stickers, dtype=STICKER_DTYPE)[ROTATION_PERMUTATIONS[self.rotation]]
+        return rotated.tobytes().translate(self.color_table)
+
+    def from_canonical(self, stickers: bytes) -> bytes:
+        """Map stickers of a state in the canonical frame back to the frame of the original."""
+        rotated = np.frombuffer(stickers, dtype=STICKER_DTYPE)
+        rotated = rotated[INVERSE_ROTATION_PERMUTATIONS[self.rotation]]
+        return rotated.tobytes().translate(self.inverse_color_table)
+
+
+class Canonicalizer:
+    """Map states to a single representative of the states equal up to the orientation of the cube.
+
+    All 24 rotations of a state are gathered at once with the precomputed rotation permutations,
+    and the lexicographically smallest one is the representative. With `relabel_colors`, every
+    rotation has its colors relabeled after its centers first, so states that only differ by
+    their color scheme also share their representative.
+    """
+
+    def __init__(self, relabel_colors: bool = False) -> None:
+        self.relabel_colors = relabel_colors
+
+    def canonicalize(self, state: Cube | str | bytes) -> CanonicalState:
+        stickers = _as_stickers(state)
+        if not self.relabel_colors:
+            rows = _rotate(stickers)
+            rotation = min(range(len(rows)), key=rows.__getitem__)
+            return CanonicalState(rows[rotation], rotation)
+
+        # Stickers are first labeled with the face whose center has their color, so relabeling a
+        # rotation only depends on the rotation
+        centers = bytes(_GET_CENTERS(stickers))
+        if len(set(centers)) != len(centers):
+            raise ValueError(f"the centers of {stickers!r} do not have distinct colors")
+        if stickers.translate(None, centers):
+            raise ValueError(f"stickers of {stickers!r} do not have the color of any center")
+        rows = [
+            row.translate(color_table)
+            for row, color_table in zip(
+                _rotate(stickers.translate(bytes.maketrans(centers, _FACES))),
+                _ROTATION_COLOR_TABLES,
+            )
+        ]
+        rotation = min(range(len(rows)), key=rows.__getitem__)
+        rotation_colors = _FACES.translate(_ROTATION_COLOR_TABLES[rotation])
+        return CanonicalState(
+            rows[rotation],
+            rotation,
+            bytes.maketrans(centers, rotation_colors),
+            bytes.maketrans(rotation_colors, centers),
+        )
+
+
+class SolveCache:
+    """Bounded memo of the states reached by `OldPochmannSolver.solve`.
+
+    An entry is keyed by the initial state and the letters, and holds the solved state. Rotated
+    copies of a state never share their entries, since the same letters applied to a rotated
+    state move other pieces. So the initial state is only canonicalized with `relabel_colors`,
+    where recolored copies of a state share the entry of their canonical state, keyed along
+    with the rotation to its canonical frame; a hit then maps the cached result back to the
+    frame of the cube. A miss gathers the state by the permutation of the letters (conjugated
+    into the canonical frame), which is memoized separately per rotation. The least recently
+    used entries are evicted past `max_size`.
+    """
+
+    def __init__(
+        self,
+        solver: OldPochmannSolver | None = None,
+        canonicalizer: Canonicalizer | None = None,
+        max_size: int = DEFAULT_MAX_SIZE,
+    ) -> None:
+        if solver is None:
+            solver = OldPochmannSolver()
+        if canonicalizer is None:
+            canonicalizer = Canonicalizer()
+        self.solver = solver
+        self.canonicalizer = canonicalizer
+        self.max_size = max_size
+        self._frame_permutation = functools.lru_cache(maxsize=max_size)(self._frame_permutation)
+        self._results: collections.OrderedDict[tuple[bytes, int, str, str, bool, bool], bytes] = (
+            collections.OrderedDict()
+        )
+        self._hits = self._misses = 0
+        if solver.metrics is not None:
+            solver.metrics.track_cache("solve_cache", self.cache_info)
+
+    def solve(
+        self,
+        cube: Cube,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool = False,
+        apply_parity: bool = True,
+    ) -> None:
+        """Same as `OldPochmannSolver.solve`, answered from the memo when possible."""
+        if self.canonicalizer.relabel_colors:
+            canonical_state = self.canonicalizer.canonicalize(cube)
+            stickers, rotation = canonical_state.stickers, canonical_state.rotation
+        else:
+            # Without relabeling, the canonical state and its rotation identify the state just
+            # like its stickers do, so they are not worth computing
+            canonical_state = None
+            stickers, rotation = cube.as_flat_str().encode("ascii"), 0
+        key = (
+            stickers,
+            rotation,
+            edge_swap_letters,
+            corner_swap_letters,
+            corners_first,
+            apply_parity,
+        )
+
+        result = self._results.get(key)
+        if result is None:
+            self._misses += 1
+            result = np.frombuffer(stickers, dtype=STICKER_DTYPE)[
+                self._frame_permutation(*key[1:])
+            ].tobytes()
+            self._results[key] = result
+            if len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+        else:
+            self._hits += 1
+            self._results.move_to_end(key)
+
+        if canonical_state is not None:
+            result = canonical_state.from_canonical(result)
+        cube.reset_to(result)
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self._hits, self._misses, self.max_size, len(self._results))
+
+    def cache_clear(self) -> None:
+        self._results.clear()
+        self._frame_permutation.cache_clear()
+        self._hits = self._misses = 0
+
+    def _frame_permutation(
+        self,
+        rotation: int,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool,
+        apply_parity: bool,
+    ) -> np.ndarray:
+        """Return the permutation of the letters in the canonical frame of the rotation."""
+        return compose(
+            INVERSE_ROTATION_PERMUTATIONS[rotation],
+            self.solver.swaps_to_permutation(
+                edge_swap_letters, corner_swap_letters, corners_first, apply_parity
+            ),
+            ROTATION_PERMUTATIONS[rotation],
+        )
+
+
+def _rotate(stickers: bytes) -> list[bytes]:
+    """Return the stickers of the 24 rotations of a state."""
+    rotations = np.frombuffer(stickers, dtype=STICKER_DTYPE)[ROTATION_PERMUTATIONS].tobytes()
+    return [rotations[start:stop] for start, stop in _ROTATION_BOUNDS]
+
+
+def _as_stickers(state: Cube | str | bytes) -> bytes:
+    if isinstance(state, Cube):
+        return state.as_flat_str().encode("ascii")
+    if isinstance(state, str):
+        return state.encode("ascii")
+    return state
@@ -1,18 +1,30 @@
 from __future__ import annotations
 
-import dataclasses
 import enum
+import itertools
 from typing import TYPE_CHECKING
 
-import more_itertools
-from rubik.cube import Cube as RubikCube
+import numpy as np
+
+from moves import InvalidMove  # noqa: F401 (raised by `Cube.apply_moves`, re-exported)
+from moves import (
+    MOVE_COMPILER,
+    MOVE_PERMUTATIONS,
+    N_STICKERS,
+    OPCODE_MOVES,
+    STICKER_DTYPE,
+    MoveCompiler,
+    are_solved,
+    parse_moves,
+)
 
 if TYPE_CHECKING:
-    from typing import Iterator
+    from array import array
+    from typing import Iterable, Iterator, TypeVar
 
+    from metrics import Metrics
 
-class InvalidMove(Exception):
-    """Raise when an invalid move is encountered in the string specification."""
+    T = TypeVar("T")
 
 
 class Color(enum.Enum):
@@ -25,66 +37,346 @@ class Color(enum.Enum):
 
     @classmethod
     def from_string(cls, color_str: str) -> Color:
-        for member in cls:
-            if member.value == color_str:
-                return member
-        raise ValueError(f"unrecognized color: {color_str}")
+        try:
+            return cls(color_str)
+        except ValueError:
+            raise ValueError(f"unrecognized color: {color_str}")
 
     def __str__(self) -> str:
         return self.value
 
 
-@dataclasses.dataclass(frozen=True)
+# Color of each sticker byte, so that a sticker is looked up in constant time
+_COLORS_BY_CODE = [None] * 256
+for _color in Color:
+    _COLORS_BY_CODE[ord(_color.value)] = _color
+_COLOR_CODES = "".join(color.value for color in Color).encode("ascii")
+
+
 class Face:
-    piece_colors: list[list[Color]]
+    """3x3 colors of a face stored as a view into a buffer of sticker bytes.
 
-    def __post_init__(self) -> None:
-        if not ((len(self.piece_colors) == 3) and all(len(row) == 3 for row in self.piece_colors)):
+    Faces of a cube are views into its sticker buffer given by the offset of the first sticker and
+    the stride between rows, so iterating them creates no per-sticker objects.
+    """
+
+    __slots__ = ("_stickers", "_offset", "_row_stride")
+
+    def __init__(self, piece_colors: list[list[Color]]) -> None:
+        if not ((len(piece_colors) == 3) and all(len(row) == 3 for row in piece_colors)):
             raise ValueError("`piece_colors` is not a 3x3 list of colors")
+        self._stickers = "".join(
+            str(color) for color in itertools.chain.from_iterable(piece_colors)
+        ).encode("ascii")
+        self._offset = 0
+        self._row_stride = 3
 
-    def __iter__(self) -> Color:
-        yield from more_itertools.flatten(self.piece_colors)
+    @classmethod
+    def view(cls, stickers: bytes | memoryview, offset: int, row_stride: int) -> Face:
+        face = cls.__new__(cls)
+        face._stickers = stickers
+        face._offset = offset
+        face._row_stride = row_stride
+        return face
+
+    def __iter__(self) -> Iterator[Color]:
+        for row_offset in range(
+            self._offset, self._offset + 3 * self._row_stride, self._row_stride
+        ):
+            yield _COLORS_BY_CODE[self._stickers[row_offset]]
+            yield _COLORS_BY_CODE[self._stickers[row_offset + 1]]
+            yield _COLORS_BY_CODE[self._stickers[row_offset + 2]]
 
     def __getitem__(self, index: tuple[int, int]) -> Color:
         row, col = index
-        return self.piece_colors[row][col]
+        return _COLORS_BY_CODE[self._stickers[self._offset + row * self._row_stride + col]]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Face):
+            return NotImplemented
+        return self.as_flat_str() == other.as_flat_str()
+
+    def __hash__(self) -> int:
+        return hash(self.as_flat_str())
+
+    def __repr__(self) -> str:
+        return f"Face(piece_colors={self.piece_colors!r})"
 
     def __str__(self) -> str:
-        return "\n".join(" ".join(row.value for row in self.piece_colors))
+        return "\n".join(" ".join(str(color) for color in row) for row in self.piece_colors)
+
+    @property
+    def piece_colors(self) -> list[list[Color]]:
+        return [list(row) for row in _chunked(self, 3)]
 
     @classmethod
     def from_single_color(cls, color: Color) -> Face:
         return cls(piece_colors=[[color] * 3 for _ in range(3)])
 
     def as_flat_str(self) -> str:
-        return "".join(
-            str(piece_colors) for piece_colors in more_itertools.flatten(self.piece_colors)
-        )
+        return "".join(str(color) for color in self)
+
+
+class Backend(enum.Enum):
+    """Implementation that stores the cube state and executes the moves."""
+
+    PERMUTATION = "permutation"
+    RUBIK = "rubik"
+
+
+class _PermutationBackend:
+    """Native backend keeping the 54 stickers in a flat byte array.
+
+    Every move, including the wide ones, is a single precomputed sticker permutation.
+    """
+
+    def __init__(self, stickers: bytes, move_compiler: MoveCompiler) -> None:
+        self._stickers = np.frombuffer(stickers, dtype=STICKER_DTYPE)
+        self._move_compiler = move_compiler
+
+    def copy(self) -> _PermutationBackend:
+        # Sticker arrays are never modified, so the copy can share the array of the original
+        backend = _PermutationBackend.__new__(_PermutationBackend)
+        backend._stickers = self._stickers
+        backend._move_compiler = self._move_compiler
+        return backend
+
+    def reset_to(self, stickers: bytes) -> None:
+        self._stickers = np.frombuffer(stickers, dtype=STICKER_DTYPE)
+
+    def flat_str(self) -> str:
+        return self._stickers.tobytes().decode("ascii")
+
+    def sticker_buffer(self) -> memoryview:
+        # Moves replace the sticker array instead of modifying it, so the buffer stays unchanged
+        return memoryview(self._stickers)
+
+    def apply_move(self, move: str) -> None:
+        self._stickers = self._stickers[MOVE_PERMUTATIONS[move]]
+
+    def apply_moves(self, moves: str) -> None:
+        self._stickers = self._stickers[self._move_compiler.compile(moves)]
+
+    def apply_opcodes(self, opcodes: array) -> None:
+        self._stickers = self._stickers[self._move_compiler.compile_opcodes(opcodes)]
+
+    def apply_permutation(self, permutation: np.ndarray) -> None:
+        self._stickers = self._stickers[permutation]
+
+    def is_solved(self) -> bool:
+        return bool(are_solved(self._stickers))
+
+
+class _RubikBackend:
+    """Reference backend delegating to the `rubik-cube` package."""
+
+    _MOVE_SEQUENCES = {
+        "Lw": ("L", "M"),
+        "Lwi": ("Li", "Mi"),
+        "Rw": ("R", "Mi"),
+        "Rwi": ("Ri", "M"),
+        "Dw": ("D", "E"),
+        "Dwi": ("Di", "Ei"),
+        "Uw": ("U", "Ei"),
+        "Uwi": ("Ui", "E"),
+        "Fw": ("F", "S"),
+        "Fwi": ("Fi", "Si"),
+        "Bw": ("B", "Si"),
+        "Bwi": ("Bi", "S"),
+        "x": ("X",),
+        "xi": ("Xi",),
+        "y": ("Y",),
+        "yi": ("Yi",),
+        "z": ("Z",),
+        "zi": ("Zi",),
+    }
+
+    def __init__(self, stickers: bytes, move_compiler: MoveCompiler) -> None:
+        # Imported on use, so that cubes of the other backends do not pay for the import
+        from rubik.cube import Cube as RubikCube
+
+        self._cube = RubikCube(stickers.decode("ascii"))
+
+    def copy(self) -> _RubikBackend:
+        backend = _RubikBackend.__new__(_RubikBackend)
+        backend._cube = type(self._cube)(self._cube)
+        return backend
+
+    def reset_to(self, stickers: bytes) -> None:
+        self._cube = type(self._cube)(stickers.decode("ascii"))
+
+    def flat_str(self) -> str:
+        return self._cube.flat_str()
+
+    def sticker_buffer(self) -> bytes:
+        return self.flat_str().encode("ascii")
+
+    def apply_move(self, move: str) -> None:
+        for rubik_move in self._MOVE_SEQUENCES.get(move, (move,)):
+            getattr(self._cube, rubik_move)()
+
+    def apply_moves(self, moves: str) -> None:
+        self.apply_opcodes(parse_moves(moves))
+
+    def apply_opcodes(self, opcodes: array) -> None:
+        opcode_sequences = _RUBIK_OPCODE_SEQUENCES
+        for opcode in opcodes:
+            for rubik_move in opcode_sequences[opcode]:
+                getattr(self._cube, rubik_move)()
+
+    def apply_permutation(self, permutation: np.ndarray) -> None:
+        flat_str = self.flat_str()
+        self._cube = type(self._cube)("".join(flat_str[i] for i in permutation))
+
+    def is_solved(self) -> bool:
+        return self._cube.is_solved()
+
+
+def _rubik_opcode_sequences() -> list[tuple[str, ...]]:
+    """Return the `rubik-cube` methods to call for every opcode."""
+    opcode_sequences = []
+    for move in OPCODE_MOVES:
+        n_times = 2 if move.endswith("2") else 1
+        move = move.removesuffix("2")
+        opcode_sequences.append(_RubikBackend._MOVE_SEQUENCES.get(move, (move,)) * n_times)
+    return opcode_sequences
+
+
+_RUBIK_OPCODE_SEQUENCES = _rubik_opcode_sequences()
+
+
+class _InstrumentedBackend:
+    """Backend wrapper recording the executed moves into a `metrics.Metrics` object.
+
+    Only cubes created with metrics are wrapped, so uninstrumented cubes have no overhead.
+    """
+
+    def __init__(self, backend: _PermutationBackend | _RubikBackend, metrics: Metrics) -> None:
+        self._backend = backend
+        self._metrics = metrics
+
+    def copy(self) -> _InstrumentedBackend:
+        return _InstrumentedBackend(self._backend.copy(), self._metrics)
+
+    def reset_to(self, stickers: bytes) -> None:
+        self._backend.reset_to(stickers)
+
+    def flat_str(self) -> str:
+        return self._backend.flat_str()
+
+    def sticker_buffer(self) -> memoryview | bytes:
+        return self._backend.sticker_buffer()
+
+    def apply_move(self, move: str) -> None:
+        self._backend.apply_move(move)
+        self._metrics.count_moves((move,))
+
+    def apply_moves(self, moves: str) -> None:
+        self._backend.apply_moves(moves)
+        self._metrics.count_moves(moves.split())
+
+    def apply_opcodes(self, opcodes: array) -> None:
+        self._backend.apply_opcodes(opcodes)
+        self._metrics.count_moves(OPCODE_MOVES[opcode] for opcode in opcodes)
+
+    def apply_permutation(self, permutation: np.ndarray) -> None:
+        self._backend.apply_permutation(permutation)
+        self._metrics.count_permutation()
+
+    def is_solved(self) -> bool:
+        return self._backend.is_solved()
+
+
+_BACKEND_TYPES = {
+    Backend.PERMUTATION: _PermutationBackend,
+    Backend.RUBIK: _RubikBackend,
+}
 
 
 class Cube:
     def __init__(
-        self, up: Face, left: Face, front: Face, right: Face, back: Face, down: Face
+        self,
+        up: Face,
+        left: Face,
+        front: Face,
+        right: Face,
+        back: Face,
+        down: Face,
+        backend: Backend = Backend.PERMUTATION,
+        move_compiler: MoveCompiler = MOVE_COMPILER,
+        metrics: Metrics | None = None,
     ) -> None:
         cube_str = self._as_cube_str(up, left, front, right, back, down)
-        self._cube = RubikCube(cube_str)
+        self._init_backend(cube_str.encode("ascii"), backend, move_compiler, metrics)
+
+    def _init_backend(
+        self,
+        stickers: bytes,
+        backend: Backend,
+        move_compiler: MoveCompiler,
+        metrics: Metrics | None,
+    ) -> None:
+        self._backend = _BACKEND_TYPES[backend](stickers, move_compiler)
+        if metrics is not None:
+            metrics.track_cache("move_compiler", move_compiler.cache_info)
+            self._backend = _InstrumentedBackend(self._backend, metrics)
 
-    def __str__(self) -> str:
-        return str(self._cube)
+    @classmethod
+    def from_flat_str(
+        cls,
+        flat_str: str,
+        backend: Backend = Backend.PERMUTATION,
+        move_compiler: MoveCompiler = MOVE_COMPILER,
+        metrics: Metrics | None = None,
+    ) -> Cube:
+        """Create a cube from stickers in the layout of `as_flat_str`, without building faces."""
+        return cls.from_bytes(flat_str.encode("ascii"), backend, move_compiler, metrics)
 
-    def __iter__(self) -> Iterator[Face]:
-        row_face_indices = (0, 0, 0, 1, 2, 3, 4, 1, 2, 3, 4, 1, 2, 3, 4, 5, 5, 5)
-        faces_piece_colors = [[] for _ in range(6)]
+    @classmethod
+    def from_bytes(
+        cls,
+        stickers: bytes,
+        backend: Backend = Backend.PERMUTATION,
+        move_compiler: MoveCompiler = MOVE_COMPILER,
+        metrics: Metrics | None = None,
+    ) -> Cube:
+        """Create a cube from the ASCII sticker bytes of a flat string."""
+        cube = cls.__new__(cls)
+        cube._init_backend(_checked_stickers(stickers), backend, move_compiler, metrics)
+        return cube
+
+    def copy(self) -> Cube:
+        """Return an independent cube in the same state, with the same backend and metrics."""
+        cube = Cube.__new__(Cube)
+        cube._backend = self._backend.copy()
+        return cube
+
+    def reset_to(self, state: Cube | str | bytes) -> None:
+        """Set the state of the cube to the one of another cube, a flat string or its bytes.
+
+        The backend of the cube is kept, so no faces are built and no objects are reallocated
+        besides the state itself.
+        """
+        if isinstance(state, Cube):
+            stickers = state._backend.sticker_buffer()
+            self._backend.reset_to(bytes(stickers))
+            return
+        if isinstance(state, str):
+            state = state.encode("ascii")
+        self._backend.reset_to(_checked_stickers(state))
 
-        for face_index, row_colors_str in zip(
-            row_face_indices, more_itertools.chunked(self.as_flat_str(), 3)
-        ):
-            faces_piece_colors[face_index].append(
-                [Color.from_string(color_str) for color_str in row_colors_str]
+    def __str__(self) -> str:
+        rows = ["".join(row) for row in _chunked(self.as_flat_str(), 3)]
+        return "\n".join(
+            itertools.chain(
+                ("    " + row for row in rows[:3]),
+                (" ".join(face_rows) for face_rows in _chunked(rows[3:15], 4)),
+                ("    " + row for row in rows[15:]),
             )
+        )
 
-        for piece_colors in faces_piece_colors:
-            yield Face(piece_colors)
+    def __iter__(self) -> Iterator[Face]:
+        yield from _faces_view(self._backend.sticker_buffer())
 
     @staticmethod
     def _as_cube_str(up: Face, left: Face, front: Face, right: Face, back: Face, down: Face) -> str:
@@ -99,92 +391,159 @@ class Cube:
         return cube_str
 
     def as_flat_str(self) -> str:
-        return self._cube.flat_str()
+        return self._backend.flat_str()
 
     def apply_moves(self, moves: str) -> None:
-        for i, move in enumerate(moves.strip().split()):
-            try:
-                getattr(self, move)()
-            except AttributeError:
-                raise InvalidMove(f"invalid move '{move}' at position {i}")
+        """Apply a move string in the standard notation, e.g., "R U' R' F2 x"."""
+        self._backend.apply_moves(moves)
+
+    def apply_opcodes(self, opcodes: array) -> None:
+        """Apply moves parsed once by `moves.parse_moves`, e.g., for stored move sequences."""
+        self._backend.apply_opcodes(opcodes)
+
+    def apply_permutation(self, permutation: np.ndarray) -> None:
+        """Apply a sticker permutation, e.g., one compiled by `moves.MoveCompiler`."""
+        self._backend.apply_permutation(permutation)
 
     def is_solved(self) -> bool:
-        return self._cube.is_solved()
+        return self._backend.is_solved()
 
     def L(self) -> None:
-        self._cube.L()
+        self._backend.apply_move("L")
 
     def Li(self) -> None:
-        self._cube.Li()
+        self._backend.apply_move("Li")
 
     def Lw(self) -> None:
-        self.L()
-        self.M()
+        self._backend.apply_move("Lw")
 
     def Lwi(self) -> None:
-        self.Li()
-        self.Mi()
+        self._backend.apply_move("Lwi")
 
     def R(self) -> None:
-        self._cube.R()
+        self._backend.apply_move("R")
 
     def Ri(self) -> None:
-        self._cube.Ri()
+        self._backend.apply_move("Ri")
 
     def Rw(self) -> None:
-        self.R()
-        self.Mi()
+        self._backend.apply_move("Rw")
 
     def Rwi(self) -> None:
-        self.Ri()
-        self.M()
+        self._backend.apply_move("Rwi")
 
     def U(self) -> None:
-        self._cube.U()
+        self._backend.apply_move("U")
 
     def Ui(self) -> None:
-        self._cube.Ui()
+        self._backend.apply_move("Ui")
 
     def D(self) -> None:
-        self._cube.D()
+        self._backend.apply_move("D")
 
     def Di(self) -> None:
-        self._cube.Di()
+        self._backend.apply_move("Di")
 
     def Dw(self) -> None:
-        self.D()
-        self.E()
+        self._backend.apply_move("Dw")
 
     def Dwi(self) -> None:
-        self.Di()
-        self.Ei()
+        self._backend.apply_move("Dwi")
 
     def F(self) -> None:
-        self._cube.F()
+        self._backend.apply_move("F")
 
     def Fi(self) -> None:
-        self._cube.Fi()
+        self._backend.apply_move("Fi")
 
     def B(self) -> None:
-        self._cube.B()
+        self._backend.apply_move("B")
 
     def Bi(self) -> None:
-        self._cube.Bi()
+        self._backend.apply_move("Bi")
 
     def M(self) -> None:
-        self._cube.M()
+        self._backend.apply_move("M")
 
     def Mi(self) -> None:
-        self._cube.Mi()
+        self._backend.apply_move("Mi")
 
     def E(self) -> None:
-        self._cube.E()
+        self._backend.apply_move("E")
 
     def Ei(self) -> None:
-        self._cube.Ei()
+        self._backend.apply_move("Ei")
+
+    def S(self) -> None:
+        self._backend.apply_move("S")
+
+    def Si(self) -> None:
+        self._backend.apply_move("Si")
+
+    def Uw(self) -> None:
+        self._backend.apply_move("Uw")
+
+    def Uwi(self) -> None:
+        self._backend.apply_move("Uwi")
+
+    def Fw(self) -> None:
+        self._backend.apply_move("Fw")
+
+    def Fwi(self) -> None:
+        self._backend.apply_move("Fwi")
+
+    def Bw(self) -> None:
+        self._backend.apply_move("Bw")
+
+    def Bwi(self) -> None:
+        self._backend.apply_move("Bwi")
+
+    def x(self) -> None:
+        self._backend.apply_move("x")
+
+    def xi(self) -> None:
+        self._backend.apply_move("xi")
+
+    def y(self) -> None:
+        self._backend.apply_move("y")
+
+    def yi(self) -> None:
+        self._backend.apply_move("yi")
+
+    def z(self) -> None:
+        self._backend.apply_move("z")
+
+    def zi(self) -> None:
+        self._backend.apply_move("zi")
+
+
+def _chunked(items: Iterable[T], n: int) -> Iterator[tuple[T, ...]]:
+    # Kept local instead of using `more_itertools` which takes long to import
+    return zip(*[iter(items)] * n)
+
+
+def _checked_stickers(stickers: bytes) -> bytes:
+    if len(stickers) != N_STICKERS:
+        raise ValueError(f"state has {len(stickers)} stickers instead of {N_STICKERS}")
+    if stickers.translate(None, _COLOR_CODES):
+        raise ValueError(f"unrecognized color in state: {stickers.decode('ascii', 'replace')}")
+    return bytes(stickers)
+
+
+def faces_from_flat_str(flat_str: str) -> list[Face]:
+    """Split a flat string into the up, left, front, right, back and down faces."""
+    return list(_faces_view(flat_str.encode("ascii")))
+
+
+def _faces_view(stickers: bytes | memoryview) -> Iterator[Face]:
+    # (offset, row stride) of each face in the flat string layout
+    for offset, row_stride in ((0, 3), (9, 12), (12, 12), (15, 12), (18, 12), (45, 3)):
+        yield Face.view(stickers, offset, row_stride)
 
 
-def make_white_up_green_front_cube() -> Cube:
+def make_white_up_green_front_cube(
+    backend: Backend = Backend.PERMUTATION, metrics: Metrics | None = None
+) -> Cube:
     return Cube(
         up=Face.from_single_color(Color.WHITE),
         left=Face.from_single_color(Color.ORANGE),
@@ -192,4 +551,6 @@ def make_white_up_green_front_cube() -> Cube:
         right=Face.from_single_color(Color.RED),
         back=Face.from_single_color(Color.BLUE),
         down=Face.from_single_color(Color.YELLOW),
+        backend=backend,
+        metrics=metrics,
     )
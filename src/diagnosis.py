@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import dataclasses
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from moves import STICKER_DTYPE, are_solved
+from tracer import MemoTracer
+
+if TYPE_CHECKING:
+    from cube import Cube
+    from tracer import PieceTables
+
+
+@dataclasses.dataclass(frozen=True)
+class LetterError:
+    piece_type: str  # "edge" or "corner"
+    position: int  # index of the letter among the swap letters of the piece type
+    letter: str | None  # None if letters are missing at the end of the swap letters
+    suggested_letter: str | None
+
+
+@dataclasses.dataclass(frozen=True)
+class Diagnosis:
+    solved: bool
+    first_error: LetterError | None
+
+
+class SolveDiagnoser:
+    """Localize the first wrong letter of a memo that does not solve a scrambled cube.
+
+    Every letter must shoot the piece in the buffer to where it belongs or, if the buffer holds
+    the buffer piece, break into an unsolved piece. Both are checked in constant time on the state
+    reached by the preceding letters, so the whole memo is diagnosed in a single pass.
+    """
+
+    def __init__(self, memo_tracer: MemoTracer | None = None) -> None:
+        if memo_tracer is None:
+            memo_tracer = MemoTracer()
+        self.memo_tracer = memo_tracer
+        self.solver = memo_tracer.solver
+
+    def diagnose(
+        self,
+        cube: Cube | str,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool = False,
+        apply_parity: bool = True,
+    ) -> Diagnosis:
+        flat_str = cube if isinstance(cube, str) else cube.as_flat_str()
+        stickers = np.frombuffer(flat_str.encode("ascii"), dtype=STICKER_DTYPE)
+        letter_transforms = self.solver.letter_transforms
+
+        phases = [
+            ("edge", edge_swap_letters, self.memo_tracer.edge_tables, letter_transforms.edges),
+            (
+                "corner",
+                corner_swap_letters,
+                self.memo_tracer.corner_tables,
+                letter_transforms.corners,
+            ),
+        ]
+        if corners_first:
+            phases.reverse()
+
+        first_error = None
+        for i, (piece_type, swap_letters, tables, transforms) in enumerate(phases):
+            if (i == 1) and apply_parity and (len(edge_swap_letters) % 2 == 1):
+                stickers = stickers[letter_transforms.parity]
+            for position, swap_letter in enumerate(swap_letters):
+                if first_error is None:
+                    first_error = self._check_letter(
+                        stickers, piece_type, position, swap_letter, tables
+                    )
+                if swap_letter not in transforms:
+                    return Diagnosis(solved=False, first_error=first_error)
+                stickers = stickers[transforms[swap_letter]]
+            if first_error is None:
+                first_error = self._check_phase_end(stickers, piece_type, swap_letters, tables)
+
+        return Diagnosis(solved=bool(are_solved(stickers)), first_error=first_error)
+
+    @staticmethod
+    def _check_letter(
+        stickers: np.ndarray, piece_type: str, position: int, swap_letter: str, tables: PieceTables
+    ) -> LetterError | None:
+        flat_str = stickers.tobytes().decode("ascii")
+        home_sticker = tables.home_sticker_lookup(flat_str)
+        buffer_piece_index = tables.buffer_piece_index
+        expected_sticker = home_sticker(tables.buffer_sticker)
+        letter_sticker = tables.letter_stickers.get(swap_letter)
+
+        if tables.piece_indices[expected_sticker] != buffer_piece_index:
+            if letter_sticker == expected_sticker:
+                return None
+            return LetterError(
+                piece_type, position, swap_letter, tables.sticker_letters.get(expected_sticker)
+            )
+
+        # Cycle break: any sticker of an unsolved piece other than the buffer is fine, the one
+        # closest in the alphabet is the most likely typo
+        candidate_letters = [
+            tables.sticker_letters[sticker]
+            for piece_index, piece in enumerate(tables.pieces)
+            if (piece_index != buffer_piece_index) and (home_sticker(piece[0]) != piece[0])
+            for sticker in piece
+            if sticker in tables.sticker_letters
+        ]
+        if swap_letter in candidate_letters:
+            return None
+        suggested_letter = min(
+            candidate_letters,
+            key=lambda candidate_letter: (
+                abs(ord(candidate_letter) - ord(swap_letter)),
+                candidate_letter,
+            ),
+            default=None,
+        )
+        return LetterError(piece_type, position, swap_letter, suggested_letter)
+
+    @staticmethod
+    def _check_phase_end(
+        stickers: np.ndarray, piece_type: str, swap_letters: str, tables: PieceTables
+    ) -> LetterError | None:
+        flat_str = stickers.tobytes().decode("ascii")
+        home_sticker = tables.home_sticker_lookup(flat_str)
+        if all(home_sticker(piece[0]) == piece[0] for piece in tables.pieces):
+            return None
+
+        expected_sticker = home_sticker(tables.buffer_sticker)
+        if tables.piece_indices[expected_sticker] == tables.buffer_piece_index:
+            expected_sticker = next(
+                (
+                    tables.piece_reference_stickers[piece_index]
+                    for piece_index, piece in enumerate(tables.pieces)
+                    if home_sticker(piece[0]) != piece[0]
+                    and piece_index != tables.buffer_piece_index
+                ),
+                None,
+            )
+        return LetterError(
+            piece_type, len(swap_letters), None, tables.sticker_letters.get(expected_sticker)
+        )
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import collections
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from functools import _CacheInfo as CacheInfo
+    from typing import Any, Callable, Iterable
+
+
+class Metrics:
+    """Counters and timers filled in by instrumented solvers and cubes.
+
+    Solvers and cubes only record into a `Metrics` object that is passed to them, so code that
+    does not pass one pays nothing but an `is None` check per call. A single object may be shared
+    by several solvers and cubes to aggregate their metrics.
+    """
+
+    def __init__(self) -> None:
+        self.move_counts: collections.Counter[str] = collections.Counter()  # face -> no. of moves
+        self.letter_counts: collections.Counter[tuple[str, str]] = collections.Counter()
+        self.phase_calls: collections.Counter[str] = collections.Counter()
+        self.phase_seconds: collections.Counter[str] = collections.Counter()
+        self.n_permutations = 0
+        self._cache_info_getters: dict[str, Callable[[], CacheInfo]] = {}
+
+    def count_moves(self, moves: Iterable[str]) -> None:
+        # Moves are counted by the face (or slice) they turn, i.e., "R", "Ri" and "Rw" count as "R"
+        self.move_counts.update(move[0] for move in moves)
+
+    def count_letters(self, piece_type: str, letters: str) -> None:
+        self.letter_counts.update((piece_type, letter) for letter in letters)
+
+    def count_permutation(self) -> None:
+        self.n_permutations += 1
+
+    def add_phase_time(self, phase: str, seconds: float) -> None:
+        self.phase_calls[phase] += 1
+        self.phase_seconds[phase] += seconds
+
+    def track_cache(self, name: str, cache_info: Callable[[], CacheInfo]) -> None:
+        """Report the statistics of an LRU cache (read when the metrics are exported)."""
+        self._cache_info_getters[name] = cache_info
+
+    def reset(self) -> None:
+        self.move_counts.clear()
+        self.letter_counts.clear()
+        self.phase_calls.clear()
+        self.phase_seconds.clear()
+        self.n_permutations = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        letters: dict[str, dict[str, int]] = {}
+        for (piece_type, letter), count in sorted(self.letter_counts.items()):
+            letters.setdefault(piece_type, {})[letter] = count
+
+        return {
+            "moves": dict(sorted(self.move_counts.items())),
+            "letters": letters,
+            "permutations": self.n_permutations,
+            "phases": {
+                phase: {"calls": self.phase_calls[phase], "seconds": self.phase_seconds[phase]}
+                for phase in sorted(self.phase_calls)
+            },
+            "caches": {
+                name: cache_info()._asdict()
+                for name, cache_info in sorted(self._cache_info_getters.items())
+            },
+        }
+
+    def to_prometheus(self, namespace: str = "rubik") -> str:
+        """Export the metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def add_metric(
+            name: str, metric_type: str, help_str: str, samples: Iterable[tuple[str, float]]
+        ) -> None:
+            full_name = f"{namespace}_{name}"
+            lines.append(f"# HELP {full_name} {help_str}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{full_name}{labels} {value}")
+
+        metrics = self.as_dict()
+        add_metric(
+            "moves_total",
+            "counter",
+            "No. of moves by face.",
+            ((_labels(face=face), count) for face, count in metrics["moves"].items()),
+        )
+        add_metric(
+            "letters_total",
+            "counter",
+            "No. of solved swap letters by piece type.",
+            (
+                (_labels(piece_type=piece_type, letter=letter), count)
+                for piece_type, letter_counts in metrics["letters"].items()
+                for letter, count in letter_counts.items()
+            ),
+        )
+        add_metric(
+            "permutations_total",
+            "counter",
+            "No. of sticker permutations applied to cubes.",
+            [("", metrics["permutations"])],
+        )
+        add_metric(
+            "phase_calls_total",
+            "counter",
+            "No. of executions of a solve phase.",
+            ((_labels(phase=phase), stats["calls"]) for phase, stats in metrics["phases"].items()),
+        )
+        add_metric(
+            "phase_seconds_total",
+            "counter",
+            "Time spent in a solve phase.",
+            (
+                (_labels(phase=phase), stats["seconds"])
+                for phase, stats in metrics["phases"].items()
+            ),
+        )
+        for name, stat, metric_type, help_str in (
+            ("cache_hits_total", "hits", "counter", "No. of cache hits."),
+            ("cache_misses_total", "misses", "counter", "No. of cache misses."),
+            ("cache_size", "currsize", "gauge", "No. of cached entries."),
+        ):
+            add_metric(
+                name,
+                metric_type,
+                help_str,
+                (
+                    (_labels(cache=cache_name), cache_info[stat])
+                    for cache_name, cache_info in metrics["caches"].items()
+                ),
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels.items()) + "}"
@@ -0,0 +1,427 @@
+from __future__ import annotations
+
+import array
+import functools
+import itertools
+import re
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from functools import _CacheInfo as CacheInfo
+    from typing import Callable, Iterator, TypeAlias
+
+    Vector: TypeAlias = tuple[int, int, int]
+    Matrix: TypeAlias = tuple[Vector, Vector, Vector]
+
+
+class InvalidMove(Exception):
+    """Raise when an invalid move is encountered in the string specification."""
+
+
+N_STICKERS = 54
+
+STICKER_DTYPE = np.uint8
+PERMUTATION_DTYPE = np.intp
+
+# Quarter-turn rotation matrices, using the same axes as the `rubik-cube` reference
+# implementation: +x is RIGHT, +y is UP and +z is FRONT.
+ROT_XY_CW = ((0, 1, 0), (-1, 0, 0), (0, 0, 1))
+ROT_XY_CC = ((0, -1, 0), (1, 0, 0), (0, 0, 1))
+ROT_XZ_CW = ((0, 0, -1), (0, 1, 0), (1, 0, 0))
+ROT_XZ_CC = ((0, 0, 1), (0, 1, 0), (-1, 0, 0))
+ROT_YZ_CW = ((1, 0, 0), (0, 0, 1), (0, -1, 0))
+ROT_YZ_CC = ((1, 0, 0), (0, 0, -1), (0, 1, 0))
+
+
+def _sticker_coordinates() -> list[tuple[Vector, Vector]]:
+    """Return the (piece position, sticker normal) pair of each sticker in the flat layout.
+
+    The flat layout is the one of `rubik.cube.Cube.flat_str`: the up face, then three rows
+    spanning the left, front, right and back faces, and finally the down face.
+    """
+    coordinates = []
+
+    for row, col in itertools.product(range(3), repeat=2):
+        coordinates.append(((col - 1, 1, row - 1), (0, 1, 0)))
+
+    for row in range(3):
+        y = 1 - row
+        for col in range(3):
+            coordinates.append(((-1, y, col - 1), (-1, 0, 0)))
+        for col in range(3):
+            coordinates.append(((col - 1, y, 1), (0, 0, 1)))
+        for col in range(3):
+            coordinates.append(((1, y, 1 - col), (1, 0, 0)))
+        for col in range(3):
+            coordinates.append(((1 - col, y, -1), (0, 0, -1)))
+
+    for row, col in itertools.product(range(3), repeat=2):
+        coordinates.append(((col - 1, -1, 1 - row), (0, -1, 0)))
+
+    return coordinates
+
+
+STICKER_COORDINATES = _sticker_coordinates()
+_STICKER_POSITIONS = np.array([position for position, _ in STICKER_COORDINATES])
+_STICKER_NORMALS = np.array([normal for _, normal in STICKER_COORDINATES])
+
+
+def _coordinate_codes(positions: np.ndarray, normals: np.ndarray) -> np.ndarray:
+    # Coordinates are in {-1, 0, 1}, so a (position, normal) pair is a 6-digit base-3 number
+    digit_weights = 3 ** np.arange(6)
+    return (np.concatenate([positions, normals], axis=-1) + 1) @ digit_weights
+
+
+# Sticker index of every (position, normal) code, as a lookup array to translate many at once
+_STICKER_INDICES = np.zeros(3**6, dtype=np.intp)
+_STICKER_INDICES[_coordinate_codes(_STICKER_POSITIONS, _STICKER_NORMALS)] = np.arange(N_STICKERS)
+
+# Flat-layout sticker indices of the up, left, front, right, back and down faces (row-major)
+FACE_STICKER_INDICES = np.array(
+    [
+        [row * 3 + col for row in range(3) for col in range(3)],
+        *(
+            [9 + row * 12 + face_index * 3 + col for row in range(3) for col in range(3)]
+            for face_index in range(4)
+        ),
+        [45 + row * 3 + col for row in range(3) for col in range(3)],
+    ],
+    dtype=PERMUTATION_DTYPE,
+)
+
+IDENTITY = np.arange(N_STICKERS, dtype=PERMUTATION_DTYPE)
+IDENTITY.flags.writeable = False
+
+
+def are_solved(stickers: np.ndarray) -> np.ndarray:
+    """Tell whether every face is of a single color for sticker arrays of shape (..., 54)."""
+    face_stickers = stickers[..., FACE_STICKER_INDICES]
+    return (face_stickers == face_stickers[..., 4:5]).all(axis=(-2, -1))
+
+
+def _rotation_permutation(matrix: Matrix, is_rotated: Callable[[Vector], bool]) -> np.ndarray:
+    # The rotated stickers are moved all at once, as rotating them one by one is a noticeable
+    # share of the import time
+    rotated = np.array([is_rotated(position) for position, _ in STICKER_COORDINATES])
+    rotation = np.array(matrix).T
+    destinations = _STICKER_INDICES[
+        _coordinate_codes(
+            _STICKER_POSITIONS[rotated] @ rotation, _STICKER_NORMALS[rotated] @ rotation
+        )
+    ]
+    permutation = IDENTITY.copy()
+    permutation[destinations] = np.flatnonzero(rotated)
+    return permutation
+
+
+def compose(*permutations: np.ndarray) -> np.ndarray:
+    """Compose permutations into one that has the effect of applying them in the given order.
+
+    Permutations are gather indices, i.e., applying `permutation` to `stickers` yields
+    `stickers[permutation]`.
+    """
+    composed = IDENTITY
+    for permutation in permutations:
+        composed = composed[permutation]
+    return composed
+
+
+def invert(permutation: np.ndarray) -> np.ndarray:
+    return np.argsort(permutation).astype(PERMUTATION_DTYPE)
+
+
+def _make_move_permutations() -> dict[str, np.ndarray]:
+    quarter_turns = {
+        "L": _rotation_permutation(ROT_YZ_CC, lambda position: position[0] == -1),
+        "R": _rotation_permutation(ROT_YZ_CW, lambda position: position[0] == 1),
+        "U": _rotation_permutation(ROT_XZ_CW, lambda position: position[1] == 1),
+        "D": _rotation_permutation(ROT_XZ_CC, lambda position: position[1] == -1),
+        "F": _rotation_permutation(ROT_XY_CW, lambda position: position[2] == 1),
+        "B": _rotation_permutation(ROT_XY_CC, lambda position: position[2] == -1),
+        "M": _rotation_permutation(ROT_YZ_CC, lambda position: position[0] == 0),
+        "E": _rotation_permutation(ROT_XZ_CC, lambda position: position[1] == 0),
+    }
+
+    move_permutations = {}
+    for move, permutation in quarter_turns.items():
+        move_permutations[move] = permutation
+        move_permutations[move + "i"] = invert(permutation)
+
+    for wide_move, (face_move, slice_move) in (
+        ("Lw", ("L", "M")),
+        ("Rw", ("R", "Mi")),
+        ("Dw", ("D", "E")),
+    ):
+        move_permutations[wide_move] = compose(
+            move_permutations[face_move], move_permutations[slice_move]
+        )
+        move_permutations[wide_move + "i"] = invert(move_permutations[wide_move])
+
+    # Moves of the standard notation besides the ones of the setup moves: the standing slice,
+    # the other wide moves and the rotations of the whole cube
+    move_permutations["S"] = _rotation_permutation(ROT_XY_CW, lambda position: position[2] == 0)
+    move_permutations["Si"] = invert(move_permutations["S"])
+    for wide_move, (face_move, slice_move) in (
+        ("Uw", ("U", "Ei")),
+        ("Fw", ("F", "S")),
+        ("Bw", ("B", "Si")),
+    ):
+        move_permutations[wide_move] = compose(
+            move_permutations[face_move], move_permutations[slice_move]
+        )
+        move_permutations[wide_move + "i"] = invert(move_permutations[wide_move])
+    for rotation, matrix in (("x", ROT_YZ_CW), ("y", ROT_XZ_CW), ("z", ROT_XY_CW)):
+        move_permutations[rotation] = _rotation_permutation(matrix, lambda position: True)
+        move_permutations[rotation + "i"] = invert(move_permutations[rotation])
+
+    for permutation in move_permutations.values():
+        permutation.flags.writeable = False
+
+    return move_permutations
+
+
+# Sticker permutation of every move supported by `cube.Cube`
+MOVE_PERMUTATIONS = _make_move_permutations()
+
+
+def _make_rotation_permutations() -> np.ndarray:
+    """Return the (24, 54) sticker permutations of the rotations of the whole cube.
+
+    The rotations are generated by quarter turns around the x and y axes, the identity first.
+    """
+    generators = [MOVE_PERMUTATIONS["x"], MOVE_PERMUTATIONS["y"]]
+    rotations = {IDENTITY.tobytes(): IDENTITY}
+    frontier = [IDENTITY]
+    while frontier:
+        next_frontier = []
+        for rotation in frontier:
+            for generator in generators:
+                next_rotation = compose(rotation, generator)
+                if next_rotation.tobytes() not in rotations:
+                    rotations[next_rotation.tobytes()] = next_rotation
+                    next_frontier.append(next_rotation)
+        frontier = next_frontier
+
+    rotation_permutations = np.stack(list(rotations.values()))
+    rotation_permutations.flags.writeable = False
+    return rotation_permutations
+
+
+# Sticker permutations of the 24 orientations of the cube, and their inverses
+ROTATION_PERMUTATIONS = _make_rotation_permutations()
+INVERSE_ROTATION_PERMUTATIONS = np.stack([invert(rotation) for rotation in ROTATION_PERMUTATIONS])
+INVERSE_ROTATION_PERMUTATIONS.flags.writeable = False
+
+
+def _make_opcodes() -> tuple[tuple[str, ...], np.ndarray]:
+    """Return the move of every opcode and the (N, 54) sticker permutations of the opcodes.
+
+    The moves of `MOVE_PERMUTATIONS` come first, then the double turns of their clockwise moves.
+    """
+    opcode_moves = list(MOVE_PERMUTATIONS)
+    opcode_permutations = list(MOVE_PERMUTATIONS.values())
+    for move, permutation in MOVE_PERMUTATIONS.items():
+        if not move.endswith("i"):
+            opcode_moves.append(move + "2")
+            opcode_permutations.append(compose(permutation, permutation))
+
+    permutations = np.stack(opcode_permutations)
+    permutations.flags.writeable = False
+    return tuple(opcode_moves), permutations
+
+
+OPCODE_MOVES, OPCODE_PERMUTATIONS = _make_opcodes()
+OPCODES = {move: opcode for opcode, move in enumerate(OPCODE_MOVES)}
+
+
+def _make_token_opcodes() -> dict[str, int]:
+    """Return the opcode of every spelling of the moves in the standard notation.
+
+    Counterclockwise moves are suffixed with "i" or "'", double turns with "2" (or "2'"), and
+    wide moves may also be written as the lowercase face.
+    """
+    token_opcodes = {}
+    for move in MOVE_PERMUTATIONS:
+        if move.endswith("i"):
+            continue
+        spellings = [move]
+        if move.endswith("w"):
+            spellings.append(move[0].lower())
+        for spelling in spellings:
+            token_opcodes[spelling] = OPCODES[move]
+            token_opcodes[spelling + "i"] = OPCODES[move + "i"]
+            token_opcodes[spelling + "'"] = OPCODES[move + "i"]
+            token_opcodes[spelling + "2"] = OPCODES[move + "2"]
+            token_opcodes[spelling + "2'"] = OPCODES[move + "2"]
+    return token_opcodes
+
+
+_TOKEN_OPCODES = _make_token_opcodes()
+
+
+def parse_moves(moves: str) -> array.array:
+    """Parse a whitespace separated move string into an `array("B")` of opcodes.
+
+    Invalid moves raise `InvalidMove` giving both the index of the move and the index of its
+    first character in the string.
+    """
+    try:
+        return array.array("B", map(_TOKEN_OPCODES.__getitem__, moves.split()))
+    except KeyError:
+        # Moves are only located on failure, so valid strings are parsed by a single `split`
+        for i, match in enumerate(re.finditer(r"\S+", moves)):
+            if match.group() not in _TOKEN_OPCODES:
+                raise InvalidMove(
+                    f"invalid move '{match.group()}' at position {i} (character {match.start()})"
+                )
+        raise
+
+
+def format_opcodes(opcodes: array.array) -> str:
+    """Return the move string of opcodes, in the notation of `Cube` methods (e.g., "Ri" or "R2")."""
+    return " ".join(OPCODE_MOVES[opcode] for opcode in opcodes)
+
+
+def compile_opcodes(opcodes: array.array) -> np.ndarray:
+    """Compose the permutations of opcodes into a single read-only permutation."""
+    permutation = IDENTITY
+    for opcode in opcodes:
+        permutation = permutation[OPCODE_PERMUTATIONS[opcode]]
+    permutation.flags.writeable = False
+    return permutation
+
+
+def normalize_moves(moves: str) -> str:
+    return " ".join(moves.split())
+
+
+class MoveCompiler:
+    """Compile move strings into single composed sticker permutations.
+
+    Compiled permutations are kept in a bounded LRU cache keyed by the normalized move string,
+    so applying a frequently used sequence costs one gather regardless of its length. Opcodes
+    of parsed move strings have a cache of their own, keyed by their bytes.
+    """
+
+    def __init__(self, cache_size: int | None = 1024) -> None:
+        self._compile_normalized = functools.lru_cache(maxsize=cache_size)(self._compile)
+        self._compile_opcode_bytes = functools.lru_cache(maxsize=cache_size)(self._compile_opcodes)
+
+    def compile(self, moves: str) -> np.ndarray:
+        return self._compile_normalized(normalize_moves(moves))
+
+    def compile_opcodes(self, opcodes: array.array) -> np.ndarray:
+        return self._compile_opcode_bytes(opcodes.tobytes())
+
+    def cache_info(self) -> CacheInfo:
+        return self._compile_normalized.cache_info()
+
+    def opcodes_cache_info(self) -> CacheInfo:
+        return self._compile_opcode_bytes.cache_info()
+
+    def cache_clear(self) -> None:
+        self._compile_normalized.cache_clear()
+        self._compile_opcode_bytes.cache_clear()
+
+    @staticmethod
+    def _compile(moves: str) -> np.ndarray:
+        return compile_opcodes(parse_moves(moves))
+
+    @staticmethod
+    def _compile_opcodes(opcode_bytes: bytes) -> np.ndarray:
+        return compile_opcodes(array.array("B", opcode_bytes))
+
+
+# Compiler shared by all cubes unless they are given their own
+MOVE_COMPILER = MoveCompiler()
+
+
+# Axis, layer and signed no. of clockwise quarter turns (around the positive direction of the
+# axis) of every layer turned by a move
+_MOVE_LAYER_TURNS = {
+    "L": (("x", -1, -1),),
+    "M": (("x", 0, -1),),
+    "R": (("x", 1, 1),),
+    "U": (("y", 1, 1),),
+    "E": (("y", 0, -1),),
+    "D": (("y", -1, -1),),
+    "F": (("z", 1, 1),),
+    "B": (("z", -1, -1),),
+    "S": (("z", 0, 1),),
+    "Lw": (("x", -1, -1), ("x", 0, -1)),
+    "Rw": (("x", 1, 1), ("x", 0, 1)),
+    "Uw": (("y", 1, 1), ("y", 0, 1)),
+    "Dw": (("y", -1, -1), ("y", 0, -1)),
+    "Fw": (("z", 1, 1), ("z", 0, 1)),
+    "Bw": (("z", -1, -1), ("z", 0, -1)),
+    "x": (("x", -1, 1), ("x", 0, 1), ("x", 1, 1)),
+    "y": (("y", -1, 1), ("y", 0, 1), ("y", 1, 1)),
+    "z": (("z", -1, 1), ("z", 0, 1), ("z", 1, 1)),
+}
+_MOVE_LAYER_TURNS.update(
+    {
+        move
+        + suffix: tuple((axis, layer, factor * n_turns) for axis, layer, n_turns in layer_turns)
+        for move, layer_turns in list(_MOVE_LAYER_TURNS.items())
+        for suffix, factor in (("i", -1), ("2", 2))
+    }
+)
+_OPCODE_LAYER_TURNS = [_MOVE_LAYER_TURNS[move] for move in OPCODE_MOVES]
+
+# Face moves of the outer layers, the slice move of the middle layer and the wide moves that
+# merge a face move with the slice move
+_AXIS_MOVES = {
+    "x": {-1: ("L", -1), 0: ("M", -1), 1: ("R", 1)},
+    "y": {1: ("U", 1), 0: ("E", -1), -1: ("D", -1)},
+    "z": {1: ("F", 1), 0: ("S", 1), -1: ("B", -1)},
+}
+_AXIS_WIDE_MOVES = {"x": {-1: "Lw", 1: "Rw"}, "y": {-1: "Dw"}, "z": {}}
+
+
+def simplify_moves(moves: str) -> str:
+    """Cancel and merge redundant turns in a move string in the standard notation.
+
+    Consecutive moves turning layers around the same axis commute, so they are merged into a
+    single group whose per-layer quarter turns are summed modulo 4. Groups that end up as the
+    identity are dropped, which may expose further cancellations with the preceding group.
+    The result is canonical for each group and has the same effect on the cube. It only has
+    face, slice and Lw/Rw/Dw wide moves in the notation of `Cube` methods, e.g., "x" becomes
+    "Lwi R".
+    """
+    axis_groups: list[tuple[str, dict[int, int]]] = []
+
+    for opcode in parse_moves(moves):
+        layer_turns = _OPCODE_LAYER_TURNS[opcode]
+        axis = layer_turns[0][0]
+        if not axis_groups or axis_groups[-1][0] != axis:
+            axis_groups.append((axis, {}))
+        layers_n_turns = axis_groups[-1][1]
+        for _, layer, n_turns in layer_turns:
+            layers_n_turns[layer] = (layers_n_turns.get(layer, 0) + n_turns) % 4
+        if not any(layers_n_turns.values()):
+            axis_groups.pop()
+
+    return " ".join(
+        itertools.chain.from_iterable(
+            _axis_group_moves(axis, layers_n_turns) for axis, layers_n_turns in axis_groups
+        )
+    )
+
+
+def _axis_group_moves(axis: str, layers_n_turns: dict[int, int]) -> Iterator[str]:
+    layers_n_turns = dict(layers_n_turns)
+
+    for layer, wide_move in _AXIS_WIDE_MOVES[axis].items():
+        n_turns = layers_n_turns.get(layer, 0)
+        if n_turns and (layers_n_turns.get(0, 0) == n_turns):
+            yield from _quarter_turns_moves(wide_move, n_turns * _AXIS_MOVES[axis][layer][1])
+            layers_n_turns[layer] = layers_n_turns[0] = 0
+
+    for layer, (move, direction) in _AXIS_MOVES[axis].items():
+        yield from _quarter_turns_moves(move, layers_n_turns.get(layer, 0) * direction)
+
+
+def _quarter_turns_moves(move: str, n_turns: int) -> list[str]:
+    return {0: [], 1: [move], 2: [move, move], 3: [move + "i"]}[n_turns % 4]
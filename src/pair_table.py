@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import itertools
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import click
+import numpy as np
+
+from moves import IDENTITY, N_STICKERS, PERMUTATION_DTYPE
+
+if TYPE_CHECKING:
+    from solver import LetterTransforms, OldPochmannSolver
+
+DEFAULT_TABLES_DIR = Path(__file__).parent / ".pair_tables"
+
+# Rows of a piece type are indexed by its first letter, then by its second letter or one of the
+# extra columns: no second letter (odd no. of letters), or the parity following the last letter
+N_EXTRA_COLUMNS = 2
+
+
+class LetterPairTable:
+    """Composed sticker permutations of every pair of letters, memory-mapped from a file.
+
+    The table holds, for the edges then the corners, a (n, n + 2, 54) block of the permutations
+    of the first letter followed by the second letter, by nothing, or by the parity. Solving a
+    memo then composes one row per pair of letters instead of one per letter. The file is named
+    after the configuration hash of the solver, built once, and its pages are shared by every
+    process mapping it. Rows are stored as gather indices, so they are composed without a cast.
+    """
+
+    def __init__(
+        self, table: np.ndarray, edge_letters: str, corner_letters: str, parity: np.ndarray
+    ) -> None:
+        self._parity = parity
+        # Row of every pair of letters, of every last letter and of every last letter followed by
+        # the parity, as views of the table (which does not read its pages)
+        self._pair_permutations: dict[str, dict[str, np.ndarray]] = {}
+        self._parity_permutations: dict[str, dict[str, np.ndarray]] = {}
+        row = 0
+        for piece_type, letters in (("edge", edge_letters), ("corner", corner_letters)):
+            pair_permutations = self._pair_permutations[piece_type] = {}
+            parity_permutations = self._parity_permutations[piece_type] = {}
+            if row + len(letters) * (len(letters) + N_EXTRA_COLUMNS) > len(table):
+                raise ValueError(f"table has {len(table)} rows, which is too few for the letters")
+            for first_letter in letters:
+                for second_letter in letters:
+                    pair_permutations[first_letter + second_letter] = table[row]
+                    row += 1
+                pair_permutations[first_letter] = table[row]
+                parity_permutations[first_letter] = table[row + 1]
+                row += N_EXTRA_COLUMNS
+        if row != len(table):
+            raise ValueError(f"table has {len(table)} rows instead of {row}")
+
+    @classmethod
+    def load(
+        cls, solver: OldPochmannSolver, tables_dir: str | Path = DEFAULT_TABLES_DIR
+    ) -> LetterPairTable:
+        """Memory-map the table of the solver, building it first if needed.
+
+        The letter order and the parity are read from a file next to the table, so that mapping
+        a built table does not compile the letters of the solver.
+        """
+        path = Path(tables_dir) / f"letter_pairs_{solver.config_hash.hex()[:16]}.npy"
+        index_path = path.with_suffix(".npz")
+        if not path.exists():
+            letter_transforms = solver.letter_transforms
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Written aside and moved, so that concurrent builds never read a partial file. The
+            # table is moved last, as its presence marks the build as complete.
+            temp_path = index_path.with_suffix(f".{os.getpid()}.tmp")
+            with temp_path.open("wb") as file:
+                np.savez(
+                    file,
+                    edge_letters="".join(sorted(letter_transforms.edges)),
+                    corner_letters="".join(sorted(letter_transforms.corners)),
+                    parity=letter_transforms.parity,
+                )
+            temp_path.replace(index_path)
+            temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with temp_path.open("wb") as file:
+                np.save(file, build_table(letter_transforms))
+            temp_path.replace(path)
+
+        with np.load(index_path) as index:
+            edge_letters = str(index["edge_letters"])
+            corner_letters = str(index["corner_letters"])
+            parity = index["parity"]
+        # Plain arrays viewing the mapping avoid the overhead of `np.memmap` on every composition
+        table = np.asarray(np.load(path, mmap_mode="r"))
+        return cls(table, edge_letters, corner_letters, parity)
+
+    def swaps_to_permutations(
+        self,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool = False,
+        apply_parity: bool = True,
+    ) -> list[np.ndarray]:
+        """Same as `OldPochmannSolver.swaps_to_permutations`, with one permutation per pair."""
+        # Parity is resolved in between the two phases if there is an odd number of edge swaps
+        with_parity = apply_parity and (len(edge_swap_letters) % 2 == 1)
+        phases = [("edge", edge_swap_letters), ("corner", corner_swap_letters)]
+        if corners_first:
+            phases.reverse()
+        (first_piece_type, first_letters), (second_piece_type, second_letters) = phases
+
+        permutations = self._pair_rows(first_piece_type, first_letters)
+        if with_parity:
+            if len(first_letters) % 2 == 1:
+                # The parity is merged into the row of the unpaired last letter
+                permutations[-1] = self._parity_permutations[first_piece_type][first_letters[-1]]
+            else:
+                permutations.append(self._parity)
+        permutations.extend(self._pair_rows(second_piece_type, second_letters))
+        return permutations
+
+    def _pair_rows(self, piece_type: str, swap_letters: str) -> list[np.ndarray]:
+        pair_permutations = self._pair_permutations[piece_type]
+        return [
+            pair_permutations[first_letter + second_letter]
+            for first_letter, second_letter in itertools.zip_longest(
+                swap_letters[::2], swap_letters[1::2], fillvalue=""
+            )
+        ]
+
+
+def build_table(letter_transforms: LetterTransforms) -> np.ndarray:
+    """Return the (N, 54) permutations of every pair of letters of the edges, then the corners."""
+    blocks = []
+    for transforms in (letter_transforms.edges, letter_transforms.corners):
+        firsts = np.stack([transforms[letter] for letter in sorted(transforms)])
+        seconds = np.concatenate([firsts, [IDENTITY, letter_transforms.parity]])
+        # Composing is gathering the first permutation with the second one
+        blocks.append(firsts[:, seconds].reshape(-1, N_STICKERS))
+    return np.concatenate(blocks).astype(PERMUTATION_DTYPE)
+
+
+@click.command()
+@click.option(
+    "-t",
+    "--tables-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=DEFAULT_TABLES_DIR,
+    show_default=True,
+    help="directory of the table files",
+)
+def main(tables_dir: Path) -> None:
+    """Build the letter pair table of the default solver, if it is not built yet."""
+    from solver import OldPochmannSolver
+
+    solver = OldPochmannSolver()
+    LetterPairTable.load(solver, tables_dir)
+    click.echo(f"letter pair table of {solver.config_hash.hex()[:16]} in {tables_dir}", err=True)
+
+
+if __name__ == "__main__":
+    main()
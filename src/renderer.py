@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+import functools
+import io
 import itertools
+from pathlib import Path
 from typing import TYPE_CHECKING
 
+import more_itertools
+import numpy as np
 from PIL import Image, ImageDraw
 
 from cube import Color
+from moves import FACE_STICKER_INDICES, N_STICKERS
 
 if TYPE_CHECKING:
-    from typing import TypeAlias
+    from typing import Iterable, Iterator, Sequence, TypeAlias
 
     from cube import Cube, Face
 
@@ -26,6 +32,10 @@ COLOR_MAP = {
 }
 
 
+# (row, col) of the up, left, front, right, back and down faces in the net (in the drawing order)
+FACE_GRID_POSITIONS = ((0, 1), (1, 0), (1, 1), (1, 2), (1, 3), (2, 1))
+
+
 class CubeRenderer:
     def __init__(
         self,
@@ -55,7 +65,7 @@ class CubeRenderer:
         )
         draw = ImageDraw.Draw(image)
 
-        for (row, col), face in zip(((0, 1), (1, 0), (1, 1), (1, 2), (1, 3), (2, 1)), cube):
+        for (row, col), face in zip(FACE_GRID_POSITIONS, cube):
             self._render_face(
                 draw,
                 face,
@@ -86,3 +96,208 @@ class CubeRenderer:
                 (x_1 + border_size, y_1 + border_size, x_2 - border_size, y_2 - border_size),
                 fill=color_rgb,
             )
+
+
+class RasterCubeRenderer(CubeRenderer):
+    """Renderer assembling the net out of pre-rasterized sticker tiles.
+
+    One bordered tile is rasterized per color for the image size, so a render only pastes the
+    tile of every sticker onto the background instead of drawing two rectangles per sticker. The
+    output is pixel-identical to the one of `CubeRenderer`.
+
+    Batches of cubes are rendered with NumPy, copying the tiles of one sticker position of all the
+    cubes at once, into arrays, a contact sheet or a stream of PNG files. Pixels are handled as
+    packed RGBX 32-bit integers, which is also the memory layout of PIL RGB images.
+    """
+
+    @functools.cached_property
+    def _layout(self) -> tuple[np.ndarray, list[tuple[int, int, int]]]:
+        """Return the tile of every sticker byte and the (sticker, y, x) drawing list.
+
+        Tiles are one pixel wider than a piece since `ImageDraw.rectangle` includes both corners,
+        so the stickers must be drawn in the order of `CubeRenderer` for the borders to overlap
+        in the same way.
+        """
+        face_side_size = min(self.image_height // 3, self.image_width // 4)
+        piece_side_size = face_side_size // 3
+        piece_start = (face_side_size - piece_side_size * 3) // 2
+        border_size = int(round(piece_side_size * self.border_size_percent))
+
+        # Bytes that are not colors of the color map are given background tiles
+        tile_size = piece_side_size + 1
+        tiles = np.empty((256, tile_size, tile_size), dtype=np.uint32)
+        tiles[:] = _rgbx(self.background_color)
+        inner = slice(border_size, tile_size - border_size)
+        for color, color_rgb in self.color_map.items():
+            tile = tiles[ord(str(color))]
+            tile[:] = _rgbx(self.piece_border_color)
+            tile[inner, inner] = _rgbx(color_rgb)
+
+        x_left_start = (self.image_width - face_side_size * 4) // 2
+        y_top_start = (self.image_height - face_side_size * 3) // 2
+        draw_list = []
+        for (face_row, face_col), face_sticker_indices in zip(
+            FACE_GRID_POSITIONS, FACE_STICKER_INDICES.tolist()
+        ):
+            for (row, col), sticker in zip(
+                itertools.product(range(3), repeat=2), face_sticker_indices
+            ):
+                y = y_top_start + face_row * face_side_size + piece_start + row * piece_side_size
+                x = x_left_start + face_col * face_side_size + piece_start + col * piece_side_size
+                draw_list.append((sticker, y, x))
+
+        return tiles, draw_list
+
+    @functools.cached_property
+    def _tile_images(self) -> dict[int, PilImage]:
+        tiles, _ = self._layout
+        tile_size = tiles.shape[1]
+        return {
+            ord(str(color)): Image.frombytes(
+                "RGB", (tile_size, tile_size), tiles[ord(str(color))], "raw", "RGBX"
+            )
+            for color in self.color_map
+        }
+
+    def render(self, cube: Cube) -> PilImage:
+        _, draw_list = self._layout
+        tile_images = self._tile_images
+
+        image = Image.new(
+            "RGB", size=(self.image_width, self.image_height), color=self.background_color
+        )
+        stickers = cube.as_flat_str().encode("ascii")
+        for sticker, y, x in draw_list:
+            image.paste(tile_images[stickers[sticker]], (x, y))
+
+        return image
+
+    @functools.cached_property
+    def _visible_masks(self) -> dict[int, PilImage]:
+        """Mask of the tile pixels of every sticker that are not covered by later stickers."""
+        tiles, draw_list = self._layout
+        tile_size = tiles.shape[1]
+
+        owners = np.full((self.image_height, self.image_width), -1)
+        for i, (_, y, x) in enumerate(draw_list):
+            owners[slice(y, y + tile_size), slice(x, x + tile_size)] = i
+
+        visible_masks = {}
+        for i, (sticker, y, x) in enumerate(draw_list):
+            mask = np.zeros((tile_size, tile_size), dtype=np.uint8)
+            tile_owners = owners[slice(y, y + tile_size), slice(x, x + tile_size)]
+            mask[slice(tile_owners.shape[0]), slice(tile_owners.shape[1])] = 255 * (
+                tile_owners == i
+            )
+            visible_masks[sticker] = Image.fromarray(mask, mode="L")
+        return visible_masks
+
+    def redraw(
+        self, image: PilImage, cube: Cube, changed_stickers: Iterable[int]
+    ) -> tuple[int, int, int, int] | None:
+        """Update an image of a previous state of the cube by redrawing the changed stickers.
+
+        Only the pixels of a sticker that are not covered by stickers drawn after it are pasted,
+        so the result is the same as rendering the cube from scratch. Return the bounding box of
+        the redrawn area, if any.
+        """
+        tiles, draw_list = self._layout
+        tile_size = tiles.shape[1]
+        tile_images = self._tile_images
+        visible_masks = self._visible_masks
+        sticker_positions = self._sticker_positions
+
+        stickers = cube.as_flat_str().encode("ascii")
+        box = None
+        for sticker in changed_stickers:
+            y, x = sticker_positions[sticker]
+            image.paste(tile_images[stickers[sticker]], (x, y), visible_masks[sticker])
+            sticker_box = (x, y, x + tile_size, y + tile_size)
+            box = sticker_box if box is None else _union(box, sticker_box)
+
+        if box is None:
+            return None
+        return (box[0], box[1], min(box[2], self.image_width), min(box[3], self.image_height))
+
+    @functools.cached_property
+    def _sticker_positions(self) -> dict[int, tuple[int, int]]:
+        _, draw_list = self._layout
+        return {sticker: (y, x) for sticker, y, x in draw_list}
+
+    def render_arrays(self, cubes: Sequence[Cube]) -> np.ndarray:
+        """Render the cubes into an (N, image height, image width, 3) RGB array."""
+        images = self._render_rgbx_batch(cubes)
+        return images.view(np.uint8).reshape(*images.shape, 4)[..., :3]
+
+    def _render_rgbx_batch(self, cubes: Sequence[Cube]) -> np.ndarray:
+        tiles, draw_list = self._layout
+        tile_size = tiles.shape[1]
+
+        images = np.empty((len(cubes), self.image_height, self.image_width), dtype=np.uint32)
+        images[:] = _rgbx(self.background_color)
+        stickers = np.frombuffer(
+            "".join(cube.as_flat_str() for cube in cubes).encode("ascii"), dtype=np.uint8
+        ).reshape(len(cubes), N_STICKERS)
+
+        for sticker, y, x in draw_list:
+            # Tiles are clipped at the image borders like PIL clips rectangles
+            regions = images[:, slice(y, y + tile_size), slice(x, x + tile_size)]
+            clipped_tile_size = regions.shape[1:]
+            regions[:] = tiles[
+                stickers[:, sticker], slice(clipped_tile_size[0]), slice(clipped_tile_size[1])
+            ]
+
+        return images
+
+    def render_contact_sheet(
+        self, cubes: Sequence[Cube], n_columns: int, batch_size: int = 256
+    ) -> PilImage:
+        """Render the cubes into a grid of `n_columns` images per row.
+
+        Cubes are rendered in batches of `batch_size` to bound the memory used on top of the
+        sheet itself.
+        """
+        n_rows = max(-(-len(cubes) // n_columns), 1)
+        sheet = np.empty(
+            (n_rows * self.image_height, n_columns * self.image_width), dtype=np.uint32
+        )
+        sheet[:] = _rgbx(self.background_color)
+
+        cell_positions = (divmod(i, n_columns) for i in range(len(cubes)))
+        for cubes_batch in more_itertools.chunked(cubes, batch_size):
+            for image, (row, col) in zip(self._render_rgbx_batch(cubes_batch), cell_positions):
+                sheet_rows = slice(row * self.image_height, (row + 1) * self.image_height)
+                sheet_cols = slice(col * self.image_width, (col + 1) * self.image_width)
+                sheet[sheet_rows, sheet_cols] = image
+
+        return Image.frombytes("RGB", (sheet.shape[1], sheet.shape[0]), sheet, "raw", "RGBX")
+
+    def iter_pngs(self, cubes: Iterable[Cube]) -> Iterator[bytes]:
+        """Encode the rendered cubes as PNG files, one cube at a time."""
+        for cube in cubes:
+            png_file = io.BytesIO()
+            self.render(cube).save(png_file, format="PNG")
+            yield png_file.getvalue()
+
+    def write_pngs(
+        self, cubes: Iterable[Cube], output_dir: Path, file_name_format: str = "cube_{:05d}.png"
+    ) -> Iterator[Path]:
+        """Write the rendered cubes to PNG files, yielding the path of every written file."""
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for i, png in enumerate(self.iter_pngs(cubes)):
+            path = output_dir / file_name_format.format(i)
+            path.write_bytes(png)
+            yield path
+
+
+def _union(box_1: tuple[int, ...], box_2: tuple[int, ...]) -> tuple[int, int, int, int]:
+    return (
+        min(box_1[0], box_2[0]),
+        min(box_1[1], box_2[1]),
+        max(box_1[2], box_2[2]),
+        max(box_1[3], box_2[3]),
+    )
+
+
+def _rgbx(color_rgb: ColorSpec) -> int:
+    return int(np.array([*color_rgb, 255], dtype=np.uint8).view(np.uint32)[0])
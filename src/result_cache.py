@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import dataclasses
+import os
+import sqlite3
+from typing import TYPE_CHECKING
+
+from state import PackedState
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any
+
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+# The oldest entries are evicted once per this no. of insertions, so the table holds at most
+# `max_entries + EVICTION_INTERVAL` results
+EVICTION_INTERVAL = 1000
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    config_hash BLOB NOT NULL,
+    initial_state BLOB NOT NULL,
+    edge_swap_letters TEXT NOT NULL,
+    corner_swap_letters TEXT NOT NULL,
+    corners_first INTEGER NOT NULL,
+    apply_parity INTEGER NOT NULL,
+    final_state BLOB NOT NULL,
+    solved INTEGER NOT NULL,
+    UNIQUE (
+        config_hash,
+        initial_state,
+        edge_swap_letters,
+        corner_swap_letters,
+        corners_first,
+        apply_parity
+    )
+)
+"""
+
+_SELECT = """
+SELECT final_state, solved FROM results WHERE
+    config_hash = ? AND initial_state = ? AND edge_swap_letters = ? AND corner_swap_letters = ?
+    AND corners_first = ? AND apply_parity = ?
+"""
+
+_INSERT = """
+INSERT OR IGNORE INTO results (
+    config_hash,
+    initial_state,
+    edge_swap_letters,
+    corner_swap_letters,
+    corners_first,
+    apply_parity,
+    final_state,
+    solved
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+@dataclasses.dataclass(frozen=True)
+class SolveKey:
+    config_hash: bytes  # `OldPochmannSolver.config_hash` of the solver
+    initial_state: PackedState
+    edge_swap_letters: str
+    corner_swap_letters: str
+    corners_first: bool
+    apply_parity: bool
+
+    def as_row(self) -> tuple[bytes, bytes, str, str, int, int]:
+        return (
+            self.config_hash,
+            self.initial_state.to_bytes(),
+            self.edge_swap_letters,
+            self.corner_swap_letters,
+            int(self.corners_first),
+            int(self.apply_parity),
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class CachedResult:
+    state: PackedState
+    solved: bool
+
+
+class ResultCache:
+    """Solve results persisted in an SQLite database shared by processes and sessions.
+
+    Every process opens its own connection to the database in WAL mode, so readers never block
+    and concurrent writers wait on each other up to `timeout` seconds. Entries are evicted in
+    insertion order once the table holds more than `max_entries` of them (lookups stay
+    read-only, so hits do not contend on the database lock).
+    """
+
+    def __init__(
+        self, path: str | Path, max_entries: int = DEFAULT_MAX_ENTRIES, timeout: float = 30.0
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._connection: sqlite3.Connection | None = None
+        self._pid: int | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Connections cannot be shared by processes, so they are opened again where unpickled
+        return {**self.__dict__, "_connection": None, "_pid": None}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute(_CREATE_TABLE)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key: SolveKey) -> CachedResult | None:
+        row = self._connect().execute(_SELECT, key.as_row()).fetchone()
+        if row is None:
+            return None
+        final_state, solved = row
+        return CachedResult(PackedState.from_bytes(final_state), bool(solved))
+
+    def put(self, key: SolveKey, result: CachedResult) -> None:
+        connection = self._connect()
+        cursor = connection.execute(
+            _INSERT, (*key.as_row(), result.state.to_bytes(), int(result.solved))
+        )
+        # Already cached results are ignored, e.g., when another process solved the same memo
+        if cursor.rowcount == 1 and cursor.lastrowid % EVICTION_INTERVAL == 0:
+            connection.execute(
+                "DELETE FROM results WHERE id <= ?", (cursor.lastrowid - self.max_entries,)
+            )
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM results")
+
+    def close(self) -> None:
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+        self._pid = None
@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import http
+import http.client
+import io
+import ipaddress
+import json
+import multiprocessing
+import socket
+from typing import TYPE_CHECKING
+
+import click
+
+from verify_memos import MemoVerifier
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, TypeAlias
+
+    Record: TypeAlias = dict[str, Any]
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8642
+
+MAX_BODY_SIZE = 1 << 20
+MAX_LINE_SIZE = 1 << 16
+MAX_HEADER_LINES = 100
+MAX_IMAGE_SIZE = 4096
+
+SOLVE_OPTIONS = ("corners_first", "reverse_swap_letters", "apply_parity")
+
+_worker_verifier: MemoVerifier | None = None
+
+
+class BadRequest(Exception):
+    """Raise when a request cannot be parsed or holds invalid arguments."""
+
+
+def _init_worker() -> None:
+    global _worker_verifier
+
+    # The solver compiles its letter transforms once, so requests only pay for the gathers
+    _worker_verifier = MemoVerifier()
+    _worker_verifier.solver.letter_transforms
+
+
+def _verify(record: Record) -> Record:
+    result = _worker_verifier.verify(record, _solve_options(record))
+    # Records that cannot be solved at all are invalid, while the diagnosis of a failed solve is
+    # a result like any other
+    if result["flat_str"] is None:
+        raise BadRequest(result["error"])
+    return result
+
+
+def _render(record: Record) -> bytes:
+    # Pillow is only needed (and imported) by the workers that render
+    from cube import Cube
+    from renderer import CubeRenderer
+
+    image_width = _image_size(record, "image_width", 1024)
+    image_height = _image_size(record, "image_height", 768)
+
+    cube = Cube.from_flat_str(_verify(record)["flat_str"])
+
+    image_file = io.BytesIO()
+    CubeRenderer(image_width, image_height).render(cube).save(image_file, format="PNG")
+    return image_file.getvalue()
+
+
+def _solve_options(record: Record) -> dict[str, bool]:
+    return {option: bool(record.get(option)) for option in SOLVE_OPTIONS}
+
+
+def _image_size(record: Record, key: str, default: int) -> int:
+    size = record.get(key, default)
+    if not isinstance(size, int) or not (1 <= size <= MAX_IMAGE_SIZE):
+        raise BadRequest(f"'{key}' must be an integer between 1 and {MAX_IMAGE_SIZE}")
+    return size
+
+
+class VerificationServer:
+    """Asyncio HTTP server verifying and rendering memos with warm solvers.
+
+    The event loop only parses requests; solves and renders run in a pool of worker processes
+    that keep their solver between requests. At most `max_pending` requests are accepted for
+    processing at once and further ones are rejected with 503, so a burst of requests cannot grow
+    the queue of the pool without bounds.
+
+    Endpoints:
+    - `GET /health`
+    - `POST /verify` with a JSON memo record (as in `verify_memos.py`, plus the solve options
+      `corners_first`, `reverse_swap_letters` and `apply_parity`), returning the JSON result, or
+      400 with the error of the verifier if the record cannot be solved
+    - `POST /render` with the same record and optional `image_width` and `image_height`, returning
+      a PNG image of the resulting state
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        processes: int = 1,
+        max_pending: int = 64,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.processes = processes
+        self.max_pending = max_pending
+        self._n_pending = 0
+        self._executor: concurrent.futures.ProcessPoolExecutor | None = None
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> None:
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            self.processes, initializer=_init_worker
+        )
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=MAX_LINE_SIZE
+        )
+        # Port 0 binds to a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    @property
+    def sockets(self) -> tuple[socket.socket, ...]:
+        """Sockets the server listens on, once started."""
+        return tuple(self._server.sockets) if self._server is not None else ()
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await self._read_request(reader)
+                except BadRequest as e:
+                    await self._write_response(
+                        writer, http.HTTPStatus.BAD_REQUEST, _json_body({"error": str(e)}), False
+                    )
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                status, content_type, response_body = await self._dispatch(method, path, body)
+                await self._write_response(
+                    writer, status, (content_type, response_body), keep_alive
+                )
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(
+        reader: asyncio.StreamReader,
+    ) -> tuple[str, str, dict[str, str], bytes] | None:
+        request_line = await _read_line(reader)
+        if not request_line:
+            return None
+        try:
+            method, path, _ = request_line.decode("latin-1").split()
+        except ValueError:
+            raise BadRequest("malformed request line")
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            header_line = (await _read_line(reader)).decode("latin-1").strip()
+            if not header_line:
+                break
+            name, _, value = header_line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise BadRequest("too many header lines")
+
+        try:
+            content_length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise BadRequest("invalid Content-Length")
+        if not (0 <= content_length <= MAX_BODY_SIZE):
+            raise BadRequest(f"body must not be larger than {MAX_BODY_SIZE} bytes")
+        body = await reader.readexactly(content_length)
+
+        return method, path, headers, body
+
+    async def _dispatch(
+        self, method: str, path: str, body: bytes
+    ) -> tuple[http.HTTPStatus, str, bytes]:
+        if (method, path) == ("GET", "/health"):
+            return (http.HTTPStatus.OK, *_json_body({"status": "ok"}))
+
+        handlers: dict[str, tuple[Callable[[Record], Any], Callable[[Any], tuple[str, bytes]]]] = {
+            "/verify": (_verify, _json_body),
+            "/render": (_render, lambda image: ("image/png", image)),
+        }
+        if path not in handlers:
+            return (http.HTTPStatus.NOT_FOUND, *_json_body({"error": f"unknown path '{path}'"}))
+        if method != "POST":
+            return (
+                http.HTTPStatus.METHOD_NOT_ALLOWED,
+                *_json_body({"error": f"{path} only accepts POST"}),
+            )
+
+        try:
+            record = json.loads(body)
+        except ValueError as e:
+            return (http.HTTPStatus.BAD_REQUEST, *_json_body({"error": f"invalid JSON: {e}"}))
+        if not isinstance(record, dict):
+            return (http.HTTPStatus.BAD_REQUEST, *_json_body({"error": "expected a JSON object"}))
+
+        if self._n_pending >= self.max_pending:
+            return (http.HTTPStatus.SERVICE_UNAVAILABLE, *_json_body({"error": "server is busy"}))
+
+        work_function, format_result = handlers[path]
+        self._n_pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._executor, work_function, record
+            )
+        except BadRequest as e:
+            return (http.HTTPStatus.BAD_REQUEST, *_json_body({"error": str(e)}))
+        except Exception as e:
+            # Reported to the client rather than tearing the connection down without a response
+            return (
+                http.HTTPStatus.INTERNAL_SERVER_ERROR,
+                *_json_body({"error": f"{type(e).__name__}: {e}"}),
+            )
+        finally:
+            self._n_pending -= 1
+
+        return (http.HTTPStatus.OK, *format_result(result))
+
+    @staticmethod
+    async def _write_response(
+        writer: asyncio.StreamWriter,
+        status: http.HTTPStatus,
+        content: tuple[str, bytes],
+        keep_alive: bool,
+    ) -> None:
+        content_type, body = content
+        headers = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == http.HTTPStatus.SERVICE_UNAVAILABLE:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+async def _read_line(reader: asyncio.StreamReader) -> bytes:
+    try:
+        return await reader.readline()
+    except ValueError:
+        # Lines over the limit of the stream are rejected rather than buffered
+        raise BadRequest(f"request and header lines must not be longer than {MAX_LINE_SIZE} bytes")
+
+
+def _json_body(obj: Any) -> tuple[str, bytes]:
+    return "application/json", json.dumps(obj).encode("utf-8")
+
+
+class VerificationClient:
+    """Client of a `VerificationServer` running on the same machine.
+
+    The connection is kept alive between requests. Only loopback addresses are accepted, as the
+    server is meant to be a local helper rather than a network service.
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, timeout: float = 30):
+        if not _is_loopback(host):
+            raise ValueError(f"'{host}' is not a loopback address")
+        self._connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def __enter__(self) -> VerificationClient:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def health(self) -> Record:
+        return json.loads(self._request("GET", "/health", None))
+
+    def verify(self, edge_swap_letters: str, corner_swap_letters: str, **options: Any) -> Record:
+        record = {
+            "edge_swap_letters": edge_swap_letters,
+            "corner_swap_letters": corner_swap_letters,
+            **options,
+        }
+        return json.loads(self._request("POST", "/verify", record))
+
+    def render(self, edge_swap_letters: str, corner_swap_letters: str, **options: Any) -> bytes:
+        record = {
+            "edge_swap_letters": edge_swap_letters,
+            "corner_swap_letters": corner_swap_letters,
+            **options,
+        }
+        return self._request("POST", "/render", record)
+
+    def _request(self, method: str, path: str, record: Record | None) -> bytes:
+        body = None if record is None else json.dumps(record).encode("utf-8")
+        headers = {} if body is None else {"Content-Type": "application/json"}
+        self._connection.request(method, path, body=body, headers=headers)
+        response = self._connection.getresponse()
+        response_body = response.read()
+        if response.status != http.HTTPStatus.OK:
+            raise http.client.HTTPException(
+                f"{response.status} {response.reason}: {response_body.decode('utf-8', 'replace')}"
+            )
+        return response_body
+
+
+def _is_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return all(
+            ipaddress.ip_address(address[4][0]).is_loopback
+            for address in socket.getaddrinfo(host, None)
+        )
+
+
+@click.command()
+@click.option("--host", default=DEFAULT_HOST, show_default=True, help="address to bind to")
+@click.option("--port", type=int, default=DEFAULT_PORT, show_default=True, help="port to bind to")
+@click.option(
+    "-p",
+    "--processes",
+    type=click.IntRange(min=1),
+    default=multiprocessing.cpu_count(),
+    show_default=True,
+    help="no. of worker processes",
+)
+@click.option(
+    "--max-pending",
+    type=click.IntRange(min=1),
+    default=64,
+    show_default=True,
+    help="no. of requests processed at once before new ones are rejected",
+)
+def main(host: str, port: int, processes: int, max_pending: int) -> None:
+    """Serve memo verification and rendering over HTTP."""
+    server = VerificationServer(host, port, processes, max_pending)
+
+    async def serve() -> None:
+        await server.start()
+        # The bound address, as port 0 binds to a free port
+        bound_host, bound_port = server.sockets[0].getsockname()[:2]
+        click.echo(f"Serving on http://{bound_host}:{bound_port}", err=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
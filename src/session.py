@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+
+from cube import Cube, make_white_up_green_front_cube
+from moves import IDENTITY, STICKER_DTYPE, are_solved, compose
+from solver import OldPochmannSolver
+
+
+class SolveSession:
+    """Memo being typed, whose solve is kept up to date one letter at a time.
+
+    The edge and corner letters are kept as stacks of prefix permutations, so appending a letter
+    composes only its transform and removing one pops it. Since the edge phase, the parity and
+    the corner phase are applied in a fixed order whichever letter changes, the state is then
+    gathered from the initial state by the composition of the three, which makes the cost of a
+    change independent of the length of the memo.
+    """
+
+    def __init__(
+        self,
+        solver: OldPochmannSolver | None = None,
+        initial_flat_str: str | None = None,
+        corners_first: bool = False,
+        apply_parity: bool = True,
+    ) -> None:
+        if solver is None:
+            solver = OldPochmannSolver()
+        if initial_flat_str is None:
+            initial_flat_str = make_white_up_green_front_cube().as_flat_str()
+        self.solver = solver
+        self.corners_first = corners_first
+        self._apply_parity = apply_parity
+        self._letter_transforms = solver.letter_transforms
+        self._initial_stickers = np.frombuffer(
+            initial_flat_str.encode("ascii"), dtype=STICKER_DTYPE
+        )
+        self._edge_swap_letters: list[str] = []
+        self._corner_swap_letters: list[str] = []
+        self._edge_permutations = [IDENTITY]  # permutation of every prefix of the edge letters
+        self._corner_permutations = [IDENTITY]
+        self._update()
+
+    @property
+    def edge_swap_letters(self) -> str:
+        return "".join(self._edge_swap_letters)
+
+    @property
+    def corner_swap_letters(self) -> str:
+        return "".join(self._corner_swap_letters)
+
+    @property
+    def apply_parity(self) -> bool:
+        return self._apply_parity
+
+    @property
+    def stickers(self) -> np.ndarray:
+        """(54,) stickers of the current state, in the flat string layout (read-only)."""
+        return self._stickers
+
+    @property
+    def flat_str(self) -> str:
+        return self._stickers.tobytes().decode("ascii")
+
+    def is_solved(self) -> bool:
+        return self._solved
+
+    def as_cube(self) -> Cube:
+        return Cube.from_flat_str(self.flat_str)
+
+    def append_edge(self, swap_letter: str) -> None:
+        self._edge_permutations.append(
+            compose(self._edge_permutations[-1], self._letter_transforms.edges[swap_letter])
+        )
+        self._edge_swap_letters.append(swap_letter)
+        self._update()
+
+    def append_corner(self, swap_letter: str) -> None:
+        self._corner_permutations.append(
+            compose(self._corner_permutations[-1], self._letter_transforms.corners[swap_letter])
+        )
+        self._corner_swap_letters.append(swap_letter)
+        self._update()
+
+    def pop_edge(self) -> str:
+        """Remove the last edge letter and return it."""
+        swap_letter = self._edge_swap_letters.pop()
+        self._edge_permutations.pop()
+        self._update()
+        return swap_letter
+
+    def pop_corner(self) -> str:
+        """Remove the last corner letter and return it."""
+        swap_letter = self._corner_swap_letters.pop()
+        self._corner_permutations.pop()
+        self._update()
+        return swap_letter
+
+    def toggle_parity(self) -> None:
+        self._apply_parity = not self._apply_parity
+        self._update()
+
+    def set_letters(self, edge_swap_letters: str, corner_swap_letters: str) -> None:
+        """Change the letters to the given ones, only popping and appending past their common
+        prefixes with the current letters (e.g., a single letter for a keystroke).
+        """
+        for swap_letters, new_swap_letters, pop, append in (
+            (self._edge_swap_letters, edge_swap_letters, self.pop_edge, self.append_edge),
+            (self._corner_swap_letters, corner_swap_letters, self.pop_corner, self.append_corner),
+        ):
+            n_common = len(os.path.commonprefix(["".join(swap_letters), new_swap_letters]))
+            while len(swap_letters) > n_common:
+                pop()
+            for swap_letter in new_swap_letters[n_common:]:
+                append(swap_letter)
+
+    def _update(self) -> None:
+        # Parity is resolved in between the two phases if there is an odd number of edge swaps
+        with_parity = self._apply_parity and (len(self._edge_swap_letters) % 2 == 1)
+        first_permutation, second_permutation = (
+            self._edge_permutations[-1],
+            self._corner_permutations[-1],
+        )
+        if self.corners_first:
+            first_permutation, second_permutation = second_permutation, first_permutation
+        permutation = compose(
+            first_permutation,
+            self._letter_transforms.parity if with_parity else IDENTITY,
+            second_permutation,
+        )
+        self._stickers = self._initial_stickers[permutation]
+        self._stickers.flags.writeable = False
+        self._solved = bool(are_solved(self._stickers))
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import collections
+import hashlib
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import click
+import numpy as np
+
+from moves import IDENTITY, MOVE_PERMUTATIONS, N_STICKERS, STICKER_COORDINATES, invert
+from solver import OldPochmannSolver, SetupMove
+from tracer import CORNER_TARGET_STICKER, EDGE_TARGET_STICKER, PieceTables
+
+if TYPE_CHECKING:
+    from typing import Iterator, Sequence
+
+DEFAULT_TABLES_DIR = Path(__file__).parent / ".pruning_tables"
+
+# Every move that cubes support can be used in setups
+SEARCH_MOVES = tuple(MOVE_PERMUTATIONS)
+
+# Tables have 24 ** (no. of tracked stickers) entries
+MAX_TRACKED_STICKERS = 5
+UNREACHABLE = 255
+
+
+def _sticker_ranks() -> tuple[np.ndarray, np.ndarray]:
+    """Return the no. of stickers of the piece of every sticker, and its rank among the stickers
+    of the pieces of the same type."""
+    n_position_stickers = collections.Counter(position for position, _ in STICKER_COORDINATES)
+    n_piece_stickers = np.array(
+        [n_position_stickers[position] for position, _ in STICKER_COORDINATES]
+    )
+    ranks = np.full(N_STICKERS, -1)
+    for n in (2, 3):
+        stickers = np.flatnonzero(n_piece_stickers == n)
+        ranks[stickers] = np.arange(len(stickers))
+    return n_piece_stickers, ranks
+
+
+_N_PIECE_STICKERS, _STICKER_RANKS = _sticker_ranks()
+# Edges and corners both have 24 stickers
+N_RANKS = 24
+
+
+class SetupSearch:
+    """Search for the shortest setup moves of every letter of a solver.
+
+    The setup moves of a letter must bring the sticker of the letter to the target sticker of
+    the swap algorithm and leave in place the buffer piece and the other pieces that the swap
+    algorithm moves, so that the setup, swap and inverse setup moves swap the buffer and letter
+    pieces (besides the side effects of the swap algorithm that are the same for every letter).
+
+    Only one sticker of each of these pieces is tracked since it tells both where its piece is
+    and how it is oriented. The no. of moves from every tracked state to the goal is computed
+    once by a breadth-first search into a pruning table saved in `tables_dir`, which is then
+    memory-mapped. Setups are found by an IDA* search with the pruning table as its heuristic;
+    the heuristic being exact, only moves along shortest setups are expanded. Among the shortest
+    setups, the current one is kept if there is one, or else the one with the fewest slice and
+    wide moves is picked.
+    """
+
+    def __init__(
+        self,
+        solver: OldPochmannSolver | None = None,
+        tables_dir: Path = DEFAULT_TABLES_DIR,
+        edge_target_sticker: int = EDGE_TARGET_STICKER,
+        corner_target_sticker: int = CORNER_TARGET_STICKER,
+    ) -> None:
+        if solver is None:
+            solver = OldPochmannSolver()
+        self.solver = solver
+        self.tables_dir = tables_dir
+        self.edge_target_sticker = edge_target_sticker
+        self.corner_target_sticker = corner_target_sticker
+        self._sticker_maps_cache: dict[int, list[list[list[int]]]] = {}
+
+    def search(self) -> tuple[dict[str, SetupMove], dict[str, SetupMove]]:
+        """Return the edge and corner setup moves mappings to pass to `OldPochmannSolver`."""
+        return (
+            self.search_mapping(
+                2,
+                self.solver.edge_setup_moves_mapping,
+                self.solver.edge_swap_moves,
+                self.edge_target_sticker,
+            ),
+            self.search_mapping(
+                3,
+                self.solver.corner_setup_moves_mapping,
+                self.solver.corner_swap_moves,
+                self.corner_target_sticker,
+            ),
+        )
+
+    def search_mapping(
+        self,
+        n_piece_stickers: int,
+        setup_moves_mapping: dict[str, SetupMove],
+        swap_moves: str,
+        target_sticker: int,
+    ) -> dict[str, SetupMove]:
+        compile_moves = self.solver.move_compiler.compile
+        swap_permutation = compile_moves(swap_moves)
+        tables = PieceTables.build(
+            n_piece_stickers, setup_moves_mapping, swap_permutation, target_sticker, compile_moves
+        )
+        constraint_stickers = _constraint_stickers(swap_permutation, target_sticker)
+        distances = self.pruning_table((target_sticker, *constraint_stickers))
+
+        mapping = {}
+        for letter, setup_move in setup_moves_mapping.items():
+            moves = self.find_setup_moves(
+                (tables.letter_stickers[letter], *constraint_stickers),
+                distances,
+                current_moves=setup_move.moves,
+            )
+            if moves != setup_move.moves:
+                setup_move = SetupMove(moves, _inverse_moves(moves))
+            mapping[letter] = setup_move
+        return mapping
+
+    def pruning_table(self, goal_stickers: tuple[int, ...]) -> np.ndarray:
+        """Return the table of the no. of moves from every state to the goal, built if needed.
+
+        States are the positions of the tracked stickers (in base `N_RANKS`), the goal being
+        every tracked sticker at the position given by `goal_stickers`.
+        """
+        if len(goal_stickers) > MAX_TRACKED_STICKERS:
+            raise ValueError(
+                f"cannot track more than {MAX_TRACKED_STICKERS} stickers, got {len(goal_stickers)}"
+            )
+
+        moves_hash = hashlib.sha1(" ".join(SEARCH_MOVES).encode("ascii")).hexdigest()[:8]
+        file_name = f"setup_{'_'.join(map(str, goal_stickers))}_{moves_hash}.npy"
+        path = self.tables_dir / file_name
+        if not path.exists():
+            goal_ranks = tuple(_STICKER_RANKS[list(goal_stickers)].tolist())
+            distances = _build_distances(self._slot_maps(goal_stickers), _encode(goal_ranks))
+            self.tables_dir.mkdir(parents=True, exist_ok=True)
+            # Written aside and moved, so that concurrent searches never read a partial table
+            temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with temp_path.open("wb") as file:
+                np.save(file, distances)
+            temp_path.replace(path)
+
+        return np.load(path, mmap_mode="r")
+
+    def find_setup_moves(
+        self, start_stickers: tuple[int, ...], distances: np.ndarray, current_moves: str = ""
+    ) -> str:
+        """Find the shortest moves bringing the tracked stickers from their start positions to
+        the goal of the pruning table."""
+        slot_maps = self._slot_maps(start_stickers)
+        start_ranks = tuple(_STICKER_RANKS[list(start_stickers)].tolist())
+        n_moves = int(distances[_encode(start_ranks)])
+        if n_moves == UNREACHABLE:
+            raise ValueError(f"no setup moves bring sticker {start_stickers[0]} to the target")
+
+        current_moves_list = current_moves.split()
+        if len(current_moves_list) == n_moves and all(
+            move in MOVE_PERMUTATIONS for move in current_moves_list
+        ):
+            ranks = start_ranks
+            for move in current_moves_list:
+                ranks = _apply_move(slot_maps, SEARCH_MOVES.index(move), ranks)
+            if distances[_encode(ranks)] == 0:
+                return current_moves
+
+        best_moves = min(
+            _shortest_move_sequences(slot_maps, distances, start_ranks, n_moves),
+            key=lambda move_indices: (
+                sum(_is_slice_or_wide(SEARCH_MOVES[i]) for i in move_indices),
+                move_indices,
+            ),
+        )
+        return " ".join(SEARCH_MOVES[i] for i in best_moves)
+
+    def _slot_maps(self, stickers: Sequence[int]) -> list[list[list[int]]]:
+        """Return, for every tracked sticker and move, the new rank of the sticker by rank."""
+        return [
+            self._sticker_maps(n_piece_stickers)
+            for n_piece_stickers in _N_PIECE_STICKERS[list(stickers)].tolist()
+        ]
+
+    def _sticker_maps(self, n_piece_stickers: int) -> list[list[int]]:
+        if n_piece_stickers not in self._sticker_maps_cache:
+            type_stickers = np.flatnonzero(_N_PIECE_STICKERS == n_piece_stickers)
+            # A move sends the sticker at position `permutation[i]` to position `i`
+            self._sticker_maps_cache[n_piece_stickers] = [
+                _STICKER_RANKS[invert(MOVE_PERMUTATIONS[move])[type_stickers]].tolist()
+                for move in SEARCH_MOVES
+            ]
+        return self._sticker_maps_cache[n_piece_stickers]
+
+
+def _constraint_stickers(swap_permutation: np.ndarray, target_sticker: int) -> list[int]:
+    """Return one sticker of the buffer piece (first) and of every other piece that the swap
+    algorithm moves besides the target piece."""
+    positions = [position for position, _ in STICKER_COORDINATES]
+    buffer_sticker = int(swap_permutation[target_sticker])
+    moved_positions = {
+        positions[sticker] for sticker in np.flatnonzero(swap_permutation != IDENTITY)
+    }
+    moved_positions -= {positions[buffer_sticker], positions[target_sticker]}
+    return [buffer_sticker] + sorted(
+        min(sticker for sticker, p in enumerate(positions) if p == position)
+        for position in moved_positions
+    )
+
+
+def _build_distances(slot_maps: list[list[list[int]]], goal_index: int) -> np.ndarray:
+    n_slots = len(slot_maps)
+    slot_maps_arrays = [np.array(sticker_maps) for sticker_maps in slot_maps]
+    distances = np.full(N_RANKS**n_slots, UNREACHABLE, dtype=np.uint8)
+    distances[goal_index] = 0
+
+    # Moves are all invertible within the move set, so the no. of moves from the goal to a state
+    # is also the no. of moves from the state to the goal
+    frontier = np.array([goal_index])
+    distance = 0
+    while frontier.size:
+        ranks = np.unravel_index(frontier, (N_RANKS,) * n_slots)
+        neighbors = np.ravel_multi_index(
+            [
+                sticker_maps[:, slot_ranks]
+                for sticker_maps, slot_ranks in zip(slot_maps_arrays, ranks)
+            ],
+            (N_RANKS,) * n_slots,
+        )
+        distance += 1
+        # Marking the new states and then scanning the table is faster than deduplicating them
+        distances[neighbors[distances[neighbors] == UNREACHABLE]] = distance
+        frontier = np.flatnonzero(distances == distance)
+
+    return distances
+
+
+def _shortest_move_sequences(
+    slot_maps: list[list[list[int]]],
+    distances: np.ndarray,
+    start_ranks: tuple[int, ...],
+    n_moves: int,
+) -> Iterator[tuple[int, ...]]:
+    """Yield the indices of the moves of every shortest sequence from the start ranks."""
+
+    def search(ranks: tuple[int, ...], distance: int, path: list[int]) -> Iterator[tuple[int, ...]]:
+        if distance == 0:
+            yield tuple(path)
+            return
+        for move_index in range(len(SEARCH_MOVES)):
+            next_ranks = _apply_move(slot_maps, move_index, ranks)
+            # The heuristic is exact, so only moves getting closer lead to a shortest sequence
+            if distances[_encode(next_ranks)] == distance - 1:
+                path.append(move_index)
+                yield from search(next_ranks, distance - 1, path)
+                path.pop()
+
+    yield from search(start_ranks, n_moves, [])
+
+
+def _apply_move(
+    slot_maps: list[list[list[int]]], move_index: int, ranks: tuple[int, ...]
+) -> tuple[int, ...]:
+    return tuple(sticker_maps[move_index][rank] for sticker_maps, rank in zip(slot_maps, ranks))
+
+
+def _encode(ranks: tuple[int, ...]) -> int:
+    index = 0
+    for rank in ranks:
+        index = index * N_RANKS + rank
+    return index
+
+
+def _is_slice_or_wide(move: str) -> bool:
+    return move[0] in "MES" or "w" in move
+
+
+def _inverse_moves(moves: str) -> str:
+    return " ".join(
+        move[:-1] if move.endswith("i") else move + "i" for move in reversed(moves.split())
+    )
+
+
+def format_mapping(name: str, mapping: dict[str, SetupMove]) -> str:
+    """Format a setup moves mapping as Python source, e.g., for `solver.py`."""
+    lines = [f"{name} = {{"]
+    for letter, setup_move in mapping.items():
+        lines.append(
+            f'    "{letter}": SetupMove("{setup_move.moves}", "{setup_move.inverse_moves}"),'
+        )
+    lines.append("}")
+    return "\n".join(lines)
+
+
+@click.command()
+@click.option(
+    "-t",
+    "--tables-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=DEFAULT_TABLES_DIR,
+    show_default=True,
+    help="directory of the pruning tables",
+)
+def main(tables_dir: Path) -> None:
+    """Print the shortest setup moves of the default solver as Python source.
+
+    The no. of moves saved per letter is reported to stderr.
+    """
+    solver = OldPochmannSolver()
+    edge_mapping, corner_mapping = SetupSearch(solver, tables_dir).search()
+
+    for piece_type, current_mapping, mapping in (
+        ("edge", solver.edge_setup_moves_mapping, edge_mapping),
+        ("corner", solver.corner_setup_moves_mapping, corner_mapping),
+    ):
+        for letter, setup_move in mapping.items():
+            n_saved_moves = len(current_mapping[letter].moves.split()) - len(
+                setup_move.moves.split()
+            )
+            if n_saved_moves:
+                click.echo(f"{piece_type} {letter}: {n_saved_moves} moves shorter", err=True)
+
+    click.echo(format_mapping("EDGE_SETUP_MOVES", edge_mapping))
+    click.echo()
+    click.echo(format_mapping("CORNER_SETUP_MOVES", corner_mapping))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import multiprocessing
+import sys
+from typing import TYPE_CHECKING
+
+import click
+import more_itertools
+import numpy as np
+
+from moves import FACE_STICKER_INDICES, IDENTITY, N_STICKERS, InvalidMove, compose
+from solver import OldPochmannSolver
+from tracer import CORNER_TARGET_STICKER, EDGE_TARGET_STICKER, PieceTables
+
+if TYPE_CHECKING:
+    from typing import Any, Callable
+
+    from solver import SetupMove
+
+# Letters of the up, left, front, right, back and down faces, clockwise from the top edge (or
+# the top left corner) of every face
+LETTER_SCHEME = "ABCD" "EFGH" "IJKL" "MNOP" "RSTU" "VWYZ"
+
+# Stickers of a face (in reading order) that the letters of the face are assigned to
+_EDGE_FACE_STICKERS = (1, 5, 7, 3)
+_CORNER_FACE_STICKERS = (0, 2, 8, 6)
+
+
+@dataclasses.dataclass(frozen=True)
+class SetupMoveIssue:
+    piece_type: str  # "edge" or "corner"
+    letters: str  # letter of the setup moves, or letter pair for the "pair" check
+    check: str  # name of the failed check (see `SetupMoveValidator`)
+    message: str
+
+
+@dataclasses.dataclass(frozen=True)
+class ValidationReport:
+    n_letters: dict[str, int]  # piece type -> no. of checked letters
+    n_pairs: dict[str, int]  # piece type -> no. of checked letter pairs
+    issues: list[SetupMoveIssue]
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "n_letters": self.n_letters,
+            "n_pairs": self.n_pairs,
+            "issues": [dataclasses.asdict(issue) for issue in self.issues],
+        }
+
+
+class SetupMoveValidator:
+    """Check the setup moves of a solver against a letter scheme.
+
+    Every setup move is checked on its own:
+    - "moves": its moves and inverse moves are valid moves
+    - "inverse": the inverse moves undo the moves
+    - "target": the moves bring the sticker of the letter to the target sticker of the swaps
+    - "buffer": the moves leave the buffer piece in place
+    - "side_effects": the setup, swap and inverse setup moves swap the buffer piece with the piece
+      of the letter, without touching other pieces than the ones the swap algorithm affects
+      regardless of the letter (the pieces of the other type that the parity fixes)
+
+    Then, every ordered pair of letters that passed these checks is checked ("pair") to swap
+    pieces exactly as the letter scheme says, i.e., with the side effects of the swap algorithm
+    cancelling out. The mappings must also assign setup moves to every letter of the scheme that
+    is not on the buffer piece ("missing"), and to no other letter ("unknown").
+    """
+
+    def __init__(
+        self,
+        solver: OldPochmannSolver | None = None,
+        letter_scheme: str = LETTER_SCHEME,
+        edge_target_sticker: int = EDGE_TARGET_STICKER,
+        corner_target_sticker: int = CORNER_TARGET_STICKER,
+    ) -> None:
+        if len(set(letter_scheme)) != len(LETTER_SCHEME):
+            raise ValueError(f"letter scheme must have {len(LETTER_SCHEME)} distinct letters")
+        if solver is None:
+            solver = OldPochmannSolver()
+        self.solver = solver
+        self.letter_scheme = letter_scheme
+        self.edge_target_sticker = edge_target_sticker
+        self.corner_target_sticker = corner_target_sticker
+
+    def validate(self, processes: int = 1) -> ValidationReport:
+        """Run all the checks, spreading the letter pair checks over `processes` processes.
+
+        The checks only take a few milliseconds, so a single process is the fastest unless the
+        letter scheme is validated against many solvers at once.
+        """
+        compile_moves = self.solver.move_compiler.compile
+        issues: list[SetupMoveIssue] = []
+        n_letters = {}
+        pair_tasks = []
+
+        for (
+            piece_type,
+            n_piece_stickers,
+            setup_moves_mapping,
+            swap_moves,
+            target_sticker,
+            face_stickers,
+        ) in (
+            (
+                "edge",
+                2,
+                self.solver.edge_setup_moves_mapping,
+                self.solver.edge_swap_moves,
+                self.edge_target_sticker,
+                _EDGE_FACE_STICKERS,
+            ),
+            (
+                "corner",
+                3,
+                self.solver.corner_setup_moves_mapping,
+                self.solver.corner_swap_moves,
+                self.corner_target_sticker,
+                _CORNER_FACE_STICKERS,
+            ),
+        ):
+            swap_permutation = compile_moves(swap_moves)
+            tables = PieceTables.build(
+                n_piece_stickers, {}, swap_permutation, target_sticker, compile_moves
+            )
+            checks = _PieceTypeChecks(
+                piece_type,
+                tables,
+                swap_permutation,
+                target_sticker,
+                _letter_stickers(self.letter_scheme, face_stickers),
+                compile_moves,
+            )
+
+            issues.extend(checks.check_mapping(setup_moves_mapping))
+            valid_transforms = {}
+            for letter, setup_move in setup_moves_mapping.items():
+                letter_issues, transform = checks.check_letter(letter, setup_move)
+                issues.extend(letter_issues)
+                if not letter_issues:
+                    valid_transforms[letter] = transform
+            n_letters[piece_type] = len(setup_moves_mapping)
+
+            letters = "".join(valid_transforms)
+            transforms = np.array(list(valid_transforms.values())).reshape(-1, N_STICKERS)
+            expected_transforms = np.array(
+                [checks.expected_swap(letter) for letter in letters]
+            ).reshape(-1, N_STICKERS)
+            pair_tasks.extend(
+                (piece_type, letters, i, transforms, expected_transforms)
+                for i in range(len(letters))
+            )
+
+        if processes == 1:
+            pair_results = list(map(_check_pairs, pair_tasks))
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                pair_results = pool.map(_check_pairs, pair_tasks)
+
+        n_pairs = dict.fromkeys(n_letters, 0)
+        for (piece_type, letters, *_), pair_issues in zip(pair_tasks, pair_results):
+            n_pairs[piece_type] += len(letters)
+            issues.extend(pair_issues)
+
+        return ValidationReport(n_letters=n_letters, n_pairs=n_pairs, issues=issues)
+
+
+def _letter_stickers(letter_scheme: str, face_stickers: tuple[int, ...]) -> dict[str, int]:
+    face_letters = more_itertools.chunked(letter_scheme, len(face_stickers))
+    return {
+        letter: int(face_sticker_indices[sticker])
+        for face_sticker_indices, letters in zip(FACE_STICKER_INDICES, face_letters)
+        for letter, sticker in zip(letters, face_stickers)
+    }
+
+
+@dataclasses.dataclass(frozen=True)
+class _PieceTypeChecks:
+    piece_type: str
+    tables: PieceTables
+    swap_permutation: np.ndarray
+    target_sticker: int
+    letter_stickers: dict[str, int]
+    compile_moves: Callable[[str], np.ndarray]
+
+    @property
+    def buffer_piece(self) -> tuple[int, ...]:
+        return self.tables.piece_stickers_from[self.tables.buffer_sticker]
+
+    def issue(self, letters: str, check: str, message: str) -> SetupMoveIssue:
+        return SetupMoveIssue(self.piece_type, letters, check, message)
+
+    def check_mapping(self, setup_moves_mapping: dict[str, SetupMove]) -> list[SetupMoveIssue]:
+        buffer_piece = set(self.buffer_piece)
+        missing_letters = sorted(
+            letter
+            for letter, sticker in self.letter_stickers.items()
+            if (sticker not in buffer_piece) and (letter not in setup_moves_mapping)
+        )
+        return [
+            self.issue(letter, "missing", "no setup moves for the letter")
+            for letter in missing_letters
+        ]
+
+    def check_letter(
+        self, letter: str, setup_move: SetupMove
+    ) -> tuple[list[SetupMoveIssue], np.ndarray | None]:
+        """Return the issues of the setup moves of a letter, and its transform if there are none."""
+        sticker = self.letter_stickers.get(letter)
+        if sticker is None:
+            return [self.issue(letter, "unknown", "letter is not in the letter scheme")], None
+        if sticker in self.buffer_piece:
+            return [self.issue(letter, "unknown", "letter is on the buffer piece")], None
+
+        try:
+            setup_permutation = self.compile_moves(setup_move.moves)
+            inverse_setup_permutation = self.compile_moves(setup_move.inverse_moves)
+        except InvalidMove as e:
+            return [self.issue(letter, "moves", str(e))], None
+
+        issues = []
+        if not np.array_equal(compose(setup_permutation, inverse_setup_permutation), IDENTITY):
+            issues.append(self.issue(letter, "inverse", "inverse moves do not undo the moves"))
+
+        brought_sticker = int(setup_permutation[self.target_sticker])
+        if brought_sticker != sticker:
+            issues.append(
+                self.issue(
+                    letter,
+                    "target",
+                    f"moves bring sticker {brought_sticker} to the target sticker"
+                    f" {self.target_sticker} instead of sticker {sticker}",
+                )
+            )
+
+        moved_buffer_stickers = [s for s in self.buffer_piece if setup_permutation[s] != s]
+        if moved_buffer_stickers:
+            issues.append(
+                self.issue(letter, "buffer", f"moves move buffer stickers {moved_buffer_stickers}")
+            )
+
+        transform = compose(setup_permutation, self.swap_permutation, inverse_setup_permutation)
+        wrong_stickers = np.flatnonzero(
+            transform != compose(self.expected_swap(letter), self.side_effects)
+        ).tolist()
+        if wrong_stickers:
+            issues.append(
+                self.issue(
+                    letter,
+                    "side_effects",
+                    f"setup, swap and inverse setup moves misplace stickers {wrong_stickers}",
+                )
+            )
+
+        return issues, transform
+
+    @property
+    def side_effects(self) -> np.ndarray:
+        """Permutation of the pieces other than the buffer and target ones by the swap moves."""
+        side_effects = self.swap_permutation.copy()
+        swapped_stickers = [
+            *self.buffer_piece,
+            *self.tables.piece_stickers_from[self.target_sticker],
+        ]
+        side_effects[swapped_stickers] = swapped_stickers
+        return side_effects
+
+    def expected_swap(self, letter: str) -> np.ndarray:
+        """Permutation swapping the buffer sticker with the sticker of the letter (and the rest of
+        their pieces accordingly)."""
+        buffer_piece = self.buffer_piece
+        letter_piece = self.tables.piece_stickers_from[self.letter_stickers[letter]]
+        swap = IDENTITY.copy()
+        swap[list(buffer_piece)] = letter_piece
+        swap[list(letter_piece)] = buffer_piece
+        return swap
+
+
+def _check_pairs(
+    task: tuple[str, str, int, np.ndarray, np.ndarray],
+) -> list[SetupMoveIssue]:
+    """Check the pairs of the letter at index `i` followed by every letter."""
+    piece_type, letters, i, transforms, expected_transforms = task
+    # Applying the transform of a letter and then the one of every letter at once
+    pair_transforms = transforms[i][transforms]
+    expected_pair_transforms = expected_transforms[i][expected_transforms]
+    wrong_pair_indices = np.flatnonzero(
+        (pair_transforms != expected_pair_transforms).any(axis=1)
+    ).tolist()
+    return [
+        SetupMoveIssue(
+            piece_type,
+            letters[i] + letters[j],
+            "pair",
+            "side effects of the swaps do not cancel out",
+        )
+        for j in wrong_pair_indices
+    ]
+
+
+@click.command()
+@click.option(
+    "-p",
+    "--processes",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="no. of worker processes checking the letter pairs",
+)
+def main(processes: int) -> None:
+    """Validate the default setup moves and print the report as JSON.
+
+    Exits with 1 if any issue is found.
+    """
+    report = SetupMoveValidator().validate(processes)
+    click.echo(json.dumps(report.as_dict(), indent=2))
+    sys.exit(0 if report.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
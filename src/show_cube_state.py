@@ -1,11 +1,25 @@
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
 import click
 
-from cube import make_white_up_green_front_cube
-from renderer import CubeRenderer
+from cube import Color, make_white_up_green_front_cube
 from solver import OldPochmannSolver
 
+if TYPE_CHECKING:
+    from cube import Cube
+
+# Background color escape codes of the stickers in the ANSI text output
+ANSI_BACKGROUND_CODES = {
+    Color.WHITE: "107",
+    Color.ORANGE: "48;5;208",
+    Color.GREEN: "42",
+    Color.RED: "41",
+    Color.BLUE: "44",
+    Color.YELLOW: "103",
+}
+
 
 @click.command()
 @click.argument("edge_swap_letters", type=str)
@@ -41,6 +55,17 @@ from solver import OldPochmannSolver
     show_default=True,
     help="height of the rendered image",
 )
+@click.option(
+    "-f",
+    "--output-format",
+    type=click.Choice(["image", "ansi", "text", "flat"]),
+    default="image",
+    show_default=True,
+    help=(
+        "image preview, or headless output of the cube net in ANSI colors or as plain text, "
+        "or of the flat state string (headless outputs exit with status 1 if unsolved)"
+    ),
+)
 def main(
     edge_swap_letters: str,
     corner_swap_letters: str,
@@ -49,19 +74,43 @@ def main(
     apply_parity: bool,
     image_width: int,
     image_height: int,
+    output_format: str,
 ) -> None:
     cube = make_white_up_green_front_cube()
     solver = OldPochmannSolver()
-    renderer = CubeRenderer(image_width, image_height)
 
     if reverse_swap_letters:
         edge_swap_letters = reverse_str(edge_swap_letters)
         corner_swap_letters = reverse_str(corner_swap_letters)
 
     solver.solve(cube, edge_swap_letters, corner_swap_letters, corners_first, apply_parity)
-    cube_image = renderer.render(cube)
 
-    cube_image.show(title="Rubik's Cube Preview")
+    if output_format == "image":
+        # Pillow takes long to import, so headless outputs do not load the renderer
+        from renderer import CubeRenderer
+
+        cube_image = CubeRenderer(image_width, image_height).render(cube)
+        cube_image.show(title="Rubik's Cube Preview")
+        return
+
+    if output_format == "ansi":
+        click.echo(format_ansi_net(cube))
+    elif output_format == "text":
+        click.echo(str(cube))
+    else:
+        click.echo(cube.as_flat_str())
+    raise SystemExit(0 if cube.is_solved() else 1)
+
+
+def format_ansi_net(cube: Cube) -> str:
+    """Format the cube net (as in `str(cube)`) with stickers drawn as colored blocks."""
+    sticker_strs = {
+        str(color): f"\x1b[{code}m  \x1b[0m" for color, code in ANSI_BACKGROUND_CODES.items()
+    }
+    sticker_strs[" "] = "  "
+    return "\n".join(
+        "".join(sticker_strs[char] for char in line) for line in str(cube).splitlines()
+    )
 
 
 def reverse_str(s: str) -> str:
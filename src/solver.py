@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+import collections
 import dataclasses
+import functools
+import time
 from typing import TYPE_CHECKING
 
+import numpy as np
+
+from cube import make_white_up_green_front_cube
+from moves import IDENTITY, MOVE_COMPILER, STICKER_DTYPE, are_solved, compose, simplify_moves
+
 if TYPE_CHECKING:
-    from typing import Iterable, Iterator
+    from pathlib import Path
+    from typing import Sequence, TypeVar
 
     from cube import Cube
+    from metrics import Metrics
+    from moves import MoveCompiler
+    from pair_table import LetterPairTable
+    from result_cache import ResultCache
+
+    T = TypeVar("T")
 
 
 @dataclasses.dataclass(frozen=True)
@@ -38,7 +53,7 @@ EDGE_SETUP_MOVES = {
     "F": SetupMove("Dwi L", "Li Dw"),
     "G": SetupMove("Li Dwi L", "Li Dw L"),
     "H": SetupMove("Dw Li", "L Dwi"),
-    "I": SetupMove("Lw Lw Di L L", "L L D Lw Lw"),
+    "I": SetupMove("Lw Di L L", "L L D Lwi"),
     "J": SetupMove("Dw Dw L", "Li Dwi Dwi"),
     "K": SetupMove("Lw D L L", "L L Di Lwi"),
     "L": SetupMove("Li", "L"),
@@ -80,6 +95,24 @@ CORNER_SETUP_MOVES = {
 }
 
 
+@dataclasses.dataclass(frozen=True)
+class LetterTransforms:
+    """Composed sticker permutation of the setup, swap and inverse setup moves of each letter."""
+
+    edges: dict[str, np.ndarray]
+    corners: dict[str, np.ndarray]
+    parity: np.ndarray
+
+
+@dataclasses.dataclass(frozen=True)
+class BatchSolveResult:
+    states: np.ndarray  # (N, 54) stickers in the flat string layout
+    solved: np.ndarray  # (N,) flags telling whether the corresponding state is solved
+
+    def flat_strs(self) -> list[str]:
+        return [state.tobytes().decode("ascii") for state in self.states]
+
+
 class OldPochmannSolver:
     def __init__(
         self,
@@ -88,12 +121,96 @@ class OldPochmannSolver:
         parity_moves: str = PARITY_MOVES,
         edge_setup_moves_mapping: dict[str, SetupMove] = EDGE_SETUP_MOVES,
         corner_setup_moves_mapping: dict[str, SetupMove] = CORNER_SETUP_MOVES,
+        move_compiler: MoveCompiler = MOVE_COMPILER,
+        simplify: bool = False,
+        metrics: Metrics | None = None,
+        result_cache: ResultCache | None = None,
+        pair_tables_dir: str | Path | None = None,
     ) -> None:
         self.edge_swap_moves = edge_swap_moves
         self.corner_swap_moves = corner_swap_moves
         self.parity_moves = parity_moves
         self.edge_setup_moves_mapping = edge_setup_moves_mapping
         self.corner_setup_moves_mapping = corner_setup_moves_mapping
+        self.move_compiler = move_compiler
+        self.simplify = simplify
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.track_cache("move_compiler", move_compiler.cache_info)
+        self.result_cache = result_cache
+        self.pair_tables_dir = pair_tables_dir
+
+    @functools.cached_property
+    def config_hash(self) -> bytes:
+        """Digest of the moves of the solver, which identifies its results across processes."""
+        # Imported on use, as solvers without result cache or pair tables never hash their moves
+        import hashlib
+        import json
+
+        config = {
+            "edge_swap_moves": self.edge_swap_moves,
+            "corner_swap_moves": self.corner_swap_moves,
+            "parity_moves": self.parity_moves,
+            "edge_setup_moves_mapping": {
+                letter: dataclasses.astuple(setup_move)
+                for letter, setup_move in self.edge_setup_moves_mapping.items()
+            },
+            "corner_setup_moves_mapping": {
+                letter: dataclasses.astuple(setup_move)
+                for letter, setup_move in self.corner_setup_moves_mapping.items()
+            },
+        }
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).digest()
+
+    @functools.cached_property
+    def letter_transforms(self) -> LetterTransforms:
+        # Computed on first use, so a solver can still be used for building move strings
+        # out of moves that the cube does not understand.
+        def compile_letter_moves(setup_move: SetupMove, commutator_moves: str) -> np.ndarray:
+            return self.move_compiler.compile(
+                self._surround_commutator_with_setup_moves(setup_move, commutator_moves)
+            )
+
+        return LetterTransforms(
+            edges={
+                letter: compile_letter_moves(setup_move, self.edge_swap_moves)
+                for letter, setup_move in self.edge_setup_moves_mapping.items()
+            },
+            corners={
+                letter: compile_letter_moves(setup_move, self.corner_swap_moves)
+                for letter, setup_move in self.corner_setup_moves_mapping.items()
+            },
+            parity=self.move_compiler.compile(self.parity_moves),
+        )
+
+    @functools.cached_property
+    def letter_pair_table(self) -> LetterPairTable | None:
+        """Table of the composed transforms of every pair of letters, memory-mapped from
+        `pair_tables_dir` (built there on first use), or None without a directory."""
+        if self.pair_tables_dir is None:
+            return None
+
+        # Imported on use, to keep the import of the solver fast
+        from pair_table import LetterPairTable
+
+        return LetterPairTable.load(self, self.pair_tables_dir)
+
+    @functools.cached_property
+    def _letter_move_counts(self) -> dict[tuple[str, str], collections.Counter[str]]:
+        # No. of moves per face of each letter (and of the parity), for instrumentation
+        def count_moves(moves: str) -> collections.Counter[str]:
+            return collections.Counter(move[0] for move in moves.split())
+
+        letter_move_counts = {("parity", ""): count_moves(self.parity_moves)}
+        for piece_type, setup_moves_mapping, swap_moves in (
+            ("edge", self.edge_setup_moves_mapping, self.edge_swap_moves),
+            ("corner", self.corner_setup_moves_mapping, self.corner_swap_moves),
+        ):
+            for letter, setup_move in setup_moves_mapping.items():
+                letter_move_counts[piece_type, letter] = count_moves(
+                    self._surround_commutator_with_setup_moves(setup_move, swap_moves)
+                )
+        return letter_move_counts
 
     def solve(
         self,
@@ -103,10 +220,237 @@ class OldPochmannSolver:
         corners_first: bool = False,
         apply_parity: bool = True,
     ) -> None:
-        moves = self.swaps_to_moves(
+        """Apply the swaps of the letters to the cube.
+
+        With a result cache, the cached state is restored without doing any cube work, and
+        missing results are stored after the solve.
+        """
+        if self.result_cache is None:
+            self._solve(cube, edge_swap_letters, corner_swap_letters, corners_first, apply_parity)
+            return
+
+        # Imported on use (already loaded by whoever made the cache), which keeps sqlite3 out of
+        # the import of the solver
+        from result_cache import CachedResult, SolveKey
+        from state import PackedState
+
+        key = SolveKey(
+            self.config_hash,
+            PackedState.from_cube(cube),
+            edge_swap_letters,
+            corner_swap_letters,
+            corners_first,
+            apply_parity,
+        )
+        cached_result = self.result_cache.get(key)
+        if cached_result is not None:
+            cube.reset_to(cached_result.state.to_flat_str())
+            return
+        self._solve(cube, edge_swap_letters, corner_swap_letters, corners_first, apply_parity)
+        self.result_cache.put(key, CachedResult(PackedState.from_cube(cube), cube.is_solved()))
+
+    def _solve(
+        self,
+        cube: Cube,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool,
+        apply_parity: bool,
+    ) -> None:
+        if self.metrics is not None:
+            self._solve_instrumented(
+                cube, edge_swap_letters, corner_swap_letters, corners_first, apply_parity
+            )
+            return
+
+        permutation = self.swaps_to_permutation(
             edge_swap_letters, corner_swap_letters, corners_first, apply_parity
         )
-        cube.apply_moves(moves)
+        cube.apply_permutation(permutation)
+
+    def _solve_instrumented(
+        self,
+        cube: Cube,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool,
+        apply_parity: bool,
+    ) -> None:
+        """Same as `solve`, composing each phase separately to time it."""
+        metrics = self.metrics
+        letter_transforms = self.letter_transforms
+
+        start_time = time.perf_counter()
+        edge_permutation = compose(
+            *(letter_transforms.edges[swap_letter] for swap_letter in edge_swap_letters)
+        )
+        edges_time = time.perf_counter()
+        corner_permutation = compose(
+            *(letter_transforms.corners[swap_letter] for swap_letter in corner_swap_letters)
+        )
+        corners_time = time.perf_counter()
+        # Parity is resolved in between the two phases if there is an odd number of edge swaps
+        with_parity = apply_parity and (len(edge_swap_letters) % 2 == 1)
+        first_permutation, second_permutation = edge_permutation, corner_permutation
+        if corners_first:
+            first_permutation, second_permutation = second_permutation, first_permutation
+        parity_time = corners_time
+        if with_parity:
+            first_permutation = compose(first_permutation, letter_transforms.parity)
+            parity_time = time.perf_counter()
+        permutation = compose(first_permutation, second_permutation)
+        compose_time = time.perf_counter()
+        cube.apply_permutation(permutation)
+        end_time = time.perf_counter()
+
+        metrics.add_phase_time("edges", edges_time - start_time)
+        metrics.add_phase_time("corners", corners_time - edges_time)
+        if with_parity:
+            metrics.add_phase_time("parity", parity_time - corners_time)
+        metrics.add_phase_time("compose", compose_time - parity_time)
+        metrics.add_phase_time("apply", end_time - compose_time)
+
+        metrics.count_letters("edge", edge_swap_letters)
+        metrics.count_letters("corner", corner_swap_letters)
+        letter_move_counts = self._letter_move_counts
+        for piece_type, swap_letters in (
+            ("edge", edge_swap_letters),
+            ("corner", corner_swap_letters),
+        ):
+            for swap_letter in swap_letters:
+                metrics.move_counts.update(letter_move_counts[piece_type, swap_letter])
+        if with_parity:
+            metrics.move_counts.update(letter_move_counts["parity", ""])
+
+    def solve_batch(
+        self,
+        swap_letters: Sequence[tuple[str, str]],
+        corners_first: bool = False,
+        apply_parity: bool = True,
+        initial_flat_str: str | None = None,
+    ) -> BatchSolveResult:
+        """Solve N (edge swap letters, corner swap letters) memos starting from the same state.
+
+        The whole batch is advanced by one letter at a time by gathering the (N, 54) state matrix
+        with each row's letter transform, so the Python overhead depends only on the longest memo.
+        """
+        if initial_flat_str is None:
+            initial_flat_str = make_white_up_green_front_cube().as_flat_str()
+
+        letter_transforms = self.letter_transforms
+        transforms = [IDENTITY, letter_transforms.parity]
+        edge_transform_indices = {}
+        for letter, transform in letter_transforms.edges.items():
+            edge_transform_indices[letter] = len(transforms)
+            transforms.append(transform)
+        corner_transform_indices = {}
+        for letter, transform in letter_transforms.corners.items():
+            corner_transform_indices[letter] = len(transforms)
+            transforms.append(transform)
+
+        rows_transform_indices = [
+            self.arrange_phases(
+                [edge_transform_indices[swap_letter] for swap_letter in edge_swap_letters],
+                [corner_transform_indices[swap_letter] for swap_letter in corner_swap_letters],
+                1,
+                corners_first,
+                apply_parity,
+            )
+            for edge_swap_letters, corner_swap_letters in swap_letters
+        ]
+        # Shorter memos are padded with the identity transform
+        n_steps = max(map(len, rows_transform_indices), default=0)
+        transform_indices = np.zeros((len(rows_transform_indices), n_steps), dtype=np.intp)
+        for row, row_transform_indices in enumerate(rows_transform_indices):
+            transform_indices[row, : len(row_transform_indices)] = row_transform_indices
+
+        transforms = np.stack(transforms)
+        initial_state = np.frombuffer(initial_flat_str.encode("ascii"), dtype=STICKER_DTYPE)
+        states = np.tile(initial_state, (len(rows_transform_indices), 1))
+        for step in range(n_steps):
+            states = np.take_along_axis(states, transforms[transform_indices[:, step]], axis=1)
+
+        return BatchSolveResult(states=states, solved=are_solved(states))
+
+    def solve_flat_str(
+        self,
+        initial_flat_str: str,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool = False,
+        apply_parity: bool = True,
+    ) -> tuple[str, bool]:
+        """Return the flat string of the state reached from a state by the swaps, and whether it
+        is solved, consulting the result cache if there is one (without building any cube).
+        """
+        key = None
+        if self.result_cache is not None:
+            from result_cache import CachedResult, SolveKey
+            from state import PackedState
+
+            try:
+                key = SolveKey(
+                    self.config_hash,
+                    PackedState.from_flat_str(initial_flat_str),
+                    edge_swap_letters,
+                    corner_swap_letters,
+                    corners_first,
+                    apply_parity,
+                )
+            except ValueError:
+                # States with unknown colors cannot be packed, so their results are not cached
+                pass
+            else:
+                cached_result = self.result_cache.get(key)
+                if cached_result is not None:
+                    return cached_result.state.to_flat_str(), cached_result.solved
+
+        stickers = np.frombuffer(initial_flat_str.encode("ascii"), dtype=STICKER_DTYPE)
+        stickers = stickers[
+            self.swaps_to_permutation(
+                edge_swap_letters, corner_swap_letters, corners_first, apply_parity
+            )
+        ]
+        flat_str = stickers.tobytes().decode("ascii")
+        solved = bool(are_solved(stickers))
+        if key is not None:
+            self.result_cache.put(key, CachedResult(PackedState.from_flat_str(flat_str), solved))
+        return flat_str, solved
+
+    def swaps_to_permutation(
+        self,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool = False,
+        apply_parity: bool = True,
+    ) -> np.ndarray:
+        return compose(
+            *self.swaps_to_permutations(
+                edge_swap_letters, corner_swap_letters, corners_first, apply_parity
+            )
+        )
+
+    def swaps_to_permutations(
+        self,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool = False,
+        apply_parity: bool = True,
+    ) -> list[np.ndarray]:
+        letter_pair_table = self.letter_pair_table
+        if letter_pair_table is not None:
+            return letter_pair_table.swaps_to_permutations(
+                edge_swap_letters, corner_swap_letters, corners_first, apply_parity
+            )
+
+        letter_transforms = self.letter_transforms
+        return self.arrange_phases(
+            [letter_transforms.edges[swap_letter] for swap_letter in edge_swap_letters],
+            [letter_transforms.corners[swap_letter] for swap_letter in corner_swap_letters],
+            letter_transforms.parity,
+            corners_first,
+            apply_parity,
+        )
 
     def swaps_to_moves(
         self,
@@ -114,6 +458,25 @@ class OldPochmannSolver:
         corner_swap_letters: str,
         corners_first: bool = False,
         apply_parity: bool = True,
+    ) -> str:
+        if self.metrics is None:
+            return self._swaps_to_moves(
+                edge_swap_letters, corner_swap_letters, corners_first, apply_parity
+            )
+
+        start_time = time.perf_counter()
+        moves = self._swaps_to_moves(
+            edge_swap_letters, corner_swap_letters, corners_first, apply_parity
+        )
+        self.metrics.add_phase_time("moves_string", time.perf_counter() - start_time)
+        return moves
+
+    def _swaps_to_moves(
+        self,
+        edge_swap_letters: str,
+        corner_swap_letters: str,
+        corners_first: bool,
+        apply_parity: bool,
     ) -> str:
         edge_setup_moves = [
             self.edge_setup_moves_mapping[swap_letter] for swap_letter in edge_swap_letters
@@ -122,30 +485,48 @@ class OldPochmannSolver:
             self.corner_setup_moves_mapping[swap_letter] for swap_letter in corner_swap_letters
         ]
 
-        setup_moves_1, commutator_moves_1 = edge_setup_moves, self.edge_swap_moves
-        setup_moves_2, commutator_moves_2 = corner_setup_moves, self.corner_swap_moves
-        if corners_first:
-            setup_moves_1, setup_moves_2 = setup_moves_2, setup_moves_1
-            commutator_moves_1, commutator_moves_2 = commutator_moves_2, commutator_moves_1
-
-        moves_list = list(
-            self._interleave_setup_moves_with_commutator(setup_moves_1, commutator_moves_1)
-        )
-        if apply_parity and (len(edge_swap_letters) % 2 == 1):
-            moves_list.append(self.parity_moves)
-        moves_list.extend(
-            self._interleave_setup_moves_with_commutator(setup_moves_2, commutator_moves_2)
+        moves_list = self.arrange_phases(
+            [
+                self._surround_commutator_with_setup_moves(setup_move, self.edge_swap_moves)
+                for setup_move in edge_setup_moves
+            ],
+            [
+                self._surround_commutator_with_setup_moves(setup_move, self.corner_swap_moves)
+                for setup_move in corner_setup_moves
+            ],
+            self.parity_moves,
+            corners_first,
+            apply_parity,
         )
 
         moves = " ".join(moves_list)
+        if self.simplify:
+            moves = simplify_moves(moves)
 
         return moves
 
     @staticmethod
-    def _interleave_setup_moves_with_commutator(
-        setup_moves: Iterable[SetupMove], commutator_moves: str
-    ) -> Iterator[str]:
-        for setup_move in setup_moves:
-            yield setup_move.moves
-            yield commutator_moves
-            yield setup_move.inverse_moves
+    def _surround_commutator_with_setup_moves(setup_move: SetupMove, commutator_moves: str) -> str:
+        return " ".join((setup_move.moves, commutator_moves, setup_move.inverse_moves))
+
+    @staticmethod
+    def arrange_phases(
+        edge_items: list[T],
+        corner_items: list[T],
+        parity_item: T,
+        corners_first: bool,
+        apply_parity: bool,
+    ) -> list[T]:
+        """Return the items of the swaps (e.g., letters, permutations or moves) in the order of
+        the solve: the edge and corner phases, in between which the parity is resolved if there
+        is an odd number of edge swaps."""
+        items_1, items_2 = edge_items, corner_items
+        if corners_first:
+            items_1, items_2 = items_2, items_1
+
+        items = list(items_1)
+        if apply_parity and (len(edge_items) % 2 == 1):
+            items.append(parity_item)
+        items.extend(items_2)
+
+        return items
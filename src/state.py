@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import dataclasses
+
+from cube import Backend, Color, Cube
+from moves import FACE_STICKER_INDICES, N_STICKERS
+
+BITS_PER_STICKER = 3
+N_BYTES = (N_STICKERS * BITS_PER_STICKER + 7) // 8
+
+# Every sticker is encoded as the octal digit of its color, so a flat string maps to the packed
+# value through a single character translation and integer parsing
+_COLOR_DIGITS = "".join(str(i) for i in range(len(Color)))
+_COLOR_VALUES = "".join(color.value for color in Color)
+_TO_DIGITS = str.maketrans(_COLOR_VALUES, _COLOR_DIGITS)
+_FROM_DIGITS = str.maketrans(_COLOR_DIGITS, _COLOR_VALUES)
+_COLOR_VALUE_SET = frozenset(_COLOR_VALUES)
+_COLOR_DIGIT_SET = frozenset(_COLOR_DIGITS)
+
+
+def _sticker_shift(sticker: int) -> int:
+    # The first sticker occupies the most significant bits
+    return (N_STICKERS - 1 - sticker) * BITS_PER_STICKER
+
+
+def _face_masks() -> list[tuple[int, int, int]]:
+    """Return the (mask of all stickers, ones in each sticker, center shift) of every face."""
+    face_masks = []
+    for face_sticker_indices in FACE_STICKER_INDICES.tolist():
+        sticker_ones = sum(1 << _sticker_shift(sticker) for sticker in face_sticker_indices)
+        face_masks.append(
+            (sticker_ones * 0b111, sticker_ones, _sticker_shift(face_sticker_indices[4]))
+        )
+    return face_masks
+
+
+_FACE_MASKS = _face_masks()
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class PackedState:
+    """Immutable, hashable cube state packing the 54 stickers at 3 bits each into an integer.
+
+    The stickers are in the flat string layout of `cube.Cube.as_flat_str`.
+    """
+
+    value: int
+
+    @classmethod
+    def from_flat_str(cls, flat_str: str) -> PackedState:
+        if len(flat_str) != N_STICKERS:
+            raise ValueError(f"flat string has {len(flat_str)} stickers instead of {N_STICKERS}")
+        # Checked up front, as digits and underscores would otherwise be parsed as a value
+        if not _COLOR_VALUE_SET.issuperset(flat_str):
+            raise ValueError(f"unrecognized color in flat string: {flat_str}")
+        return cls(int(flat_str.translate(_TO_DIGITS), 8))
+
+    @classmethod
+    def from_cube(cls, cube: Cube) -> PackedState:
+        return cls.from_flat_str(cube.as_flat_str())
+
+    @classmethod
+    def from_bytes(cls, state_bytes: bytes) -> PackedState:
+        if len(state_bytes) != N_BYTES:
+            raise ValueError(f"packed state has {len(state_bytes)} bytes instead of {N_BYTES}")
+        value = int.from_bytes(state_bytes, "big")
+        if value >= 1 << (N_STICKERS * BITS_PER_STICKER):
+            raise ValueError(f"packed state has more than {N_STICKERS} stickers: {value:#x}")
+        if not _COLOR_DIGIT_SET.issuperset(format(value, "o")):
+            raise ValueError(f"unrecognized color code in packed state: {value:#o}")
+        return cls(value)
+
+    def to_flat_str(self) -> str:
+        return format(self.value, f"0{N_STICKERS}o").translate(_FROM_DIGITS)
+
+    def to_cube(self, backend: Backend = Backend.PERMUTATION) -> Cube:
+        return Cube.from_flat_str(self.to_flat_str(), backend=backend)
+
+    def to_bytes(self) -> bytes:
+        return self.value.to_bytes(N_BYTES, "big")
+
+    def is_solved(self) -> bool:
+        for face_mask, sticker_ones, center_shift in _FACE_MASKS:
+            center_digit = (self.value >> center_shift) & 0b111
+            if (self.value & face_mask) != center_digit * sticker_ones:
+                return False
+        return True
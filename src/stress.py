@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import collections
+import dataclasses
+import json
+import multiprocessing
+import statistics
+import sys
+import time
+from typing import TYPE_CHECKING
+
+import click
+import numpy as np
+
+from cube import Backend, InvalidMove, make_white_up_green_front_cube
+from moves import IDENTITY, MOVE_PERMUTATIONS, STICKER_DTYPE
+from solver import OldPochmannSolver
+from tracer import MemoTracer, UntraceableState
+
+if TYPE_CHECKING:
+    from typing import Any, Iterator
+
+# Outer layer quarter turns, which keep the centers in place
+SCRAMBLE_MOVES = ("U", "Ui", "D", "Di", "L", "Li", "R", "Ri", "F", "Fi", "B", "Bi")
+
+# Failures beyond this no. are counted but not reported
+MAX_REPORTED_FAILURES = 20
+
+_worker_round_trip: RoundTrip | None = None
+
+
+def random_scrambles(
+    rng: np.random.Generator, n_scrambles: int, scramble_length: int = 25
+) -> np.ndarray:
+    """Return (N, 54) stickers of the solved cube scrambled by random quarter turns.
+
+    Every quarter turn is an odd permutation of both the edges and the corners, so the last move
+    is skipped half of the time for scrambles to have either parity. The scrambles are applied to
+    all the states at once, one move at a time.
+    """
+    n_moves = len(SCRAMBLE_MOVES)
+    # The permutations past the scramble moves are identities
+    move_permutations = np.stack(
+        [MOVE_PERMUTATIONS[move] for move in SCRAMBLE_MOVES] + [IDENTITY] * n_moves
+    )
+    move_indices = rng.integers(n_moves, size=(n_scrambles, scramble_length))
+    if scramble_length > 0:
+        move_indices[:, -1] = rng.integers(2 * n_moves, size=n_scrambles)
+
+    solved_flat_str = make_white_up_green_front_cube().as_flat_str()
+    solved_state = np.frombuffer(solved_flat_str.encode("ascii"), dtype=STICKER_DTYPE)
+    states = np.tile(solved_state, (n_scrambles, 1))
+    for step in range(scramble_length):
+        states = np.take_along_axis(states, move_permutations[move_indices[:, step]], axis=1)
+    return states
+
+
+@dataclasses.dataclass(frozen=True)
+class ChunkResult:
+    n_scrambles: int
+    move_counts: collections.Counter[int]  # no. of moves of a solve -> no. of scrambles
+    n_failures: int
+    failures: list[dict[str, Any]]
+
+
+class RoundTrip:
+    """Trace the memo of scrambled states and check that its moves solve the cube.
+
+    Chunks of scrambles are generated from the seed and the index of the chunk, so the scrambles
+    (and the results) do not depend on how chunks are spread over processes.
+    """
+
+    def __init__(
+        self,
+        solver: OldPochmannSolver | None = None,
+        backend: Backend = Backend.PERMUTATION,
+        scramble_length: int = 25,
+        corners_first: bool = False,
+    ) -> None:
+        if solver is None:
+            solver = OldPochmannSolver()
+        self.solver = solver
+        self.tracer = MemoTracer(solver)
+        self.backend = backend
+        self.scramble_length = scramble_length
+        self.corners_first = corners_first
+
+    def run_chunk(self, seed: int, chunk_index: int, chunk_size: int) -> ChunkResult:
+        states = random_scrambles(
+            np.random.default_rng([seed, chunk_index]), chunk_size, self.scramble_length
+        )
+
+        move_counts: collections.Counter[int] = collections.Counter()
+        failures = []
+        n_failures = 0
+        # A single cube is reset to every scramble
+        cube = make_white_up_green_front_cube(self.backend)
+        for i, state in enumerate(states):
+            flat_str = state.tobytes().decode("ascii")
+            error = None
+            memo = None
+            try:
+                memo = self.tracer.trace(flat_str, self.corners_first)
+                # The moves are replayed, so that the move code of the backend and the setup
+                # moves are checked rather than the letter transforms the memo is traced with
+                moves = self.solver.swaps_to_moves(
+                    memo.edge_swap_letters, memo.corner_swap_letters, self.corners_first
+                )
+                cube.reset_to(flat_str)
+                cube.apply_moves(moves)
+                if not cube.is_solved():
+                    error = f"not solved: {cube.as_flat_str()}"
+            except (UntraceableState, InvalidMove, KeyError) as e:
+                error = f"{type(e).__name__}: {e}"
+
+            if error is None:
+                move_counts[len(moves.split())] += 1
+                continue
+            n_failures += 1
+            if len(failures) < MAX_REPORTED_FAILURES:
+                failures.append(
+                    {
+                        "seed": seed,
+                        "chunk_index": chunk_index,
+                        "index": i,
+                        "flat_str": flat_str,
+                        "edge_swap_letters": memo and memo.edge_swap_letters,
+                        "corner_swap_letters": memo and memo.corner_swap_letters,
+                        "error": error,
+                    }
+                )
+
+        return ChunkResult(chunk_size, move_counts, n_failures, failures)
+
+
+@dataclasses.dataclass(frozen=True)
+class StressReport:
+    n_scrambles: int
+    seconds: float
+    move_counts: collections.Counter[int]
+    n_failures: int
+    failures: list[dict[str, Any]]
+
+    @property
+    def scrambles_per_second(self) -> float:
+        return self.n_scrambles / self.seconds if self.seconds > 0 else float("inf")
+
+    def as_dict(self) -> dict[str, Any]:
+        move_counts = list(self.move_counts.elements())
+        move_count_stats = {}
+        if move_counts:
+            percentiles = np.percentile(move_counts, [5, 50, 95]).tolist()
+            move_count_stats = {
+                "min": min(move_counts),
+                "mean": statistics.fmean(move_counts),
+                "p5": percentiles[0],
+                "p50": percentiles[1],
+                "p95": percentiles[2],
+                "max": max(move_counts),
+                "histogram": {str(n): count for n, count in sorted(self.move_counts.items())},
+            }
+        return {
+            "n_scrambles": self.n_scrambles,
+            "seconds": self.seconds,
+            "scrambles_per_second": self.scrambles_per_second,
+            "n_failures": self.n_failures,
+            "move_counts": move_count_stats,
+            "failures": self.failures,
+        }
+
+
+def run_stress_test(
+    n_scrambles: int,
+    seed: int = 0,
+    processes: int = 1,
+    chunk_size: int = 1000,
+    **round_trip_kwargs: Any,
+) -> StressReport:
+    """Run the round trip of `n_scrambles` scrambles, in chunks spread over `processes`."""
+    chunks = [
+        (seed, chunk_index, min(chunk_size, n_scrambles - start))
+        for chunk_index, start in enumerate(range(0, n_scrambles, chunk_size))
+    ]
+
+    start_time = time.perf_counter()
+    if processes == 1:
+        _init_worker(round_trip_kwargs)
+        chunk_results = list(map(_run_chunk, chunks))
+    else:
+        with multiprocessing.Pool(
+            processes, initializer=_init_worker, initargs=(round_trip_kwargs,)
+        ) as pool:
+            chunk_results = list(pool.imap(_run_chunk, chunks))
+    seconds = time.perf_counter() - start_time
+
+    return _merge_chunk_results(chunk_results, seconds)
+
+
+def _merge_chunk_results(chunk_results: Iterator[ChunkResult], seconds: float) -> StressReport:
+    move_counts: collections.Counter[int] = collections.Counter()
+    failures = []
+    n_scrambles = n_failures = 0
+    for chunk_result in chunk_results:
+        n_scrambles += chunk_result.n_scrambles
+        move_counts += chunk_result.move_counts
+        n_failures += chunk_result.n_failures
+        failures.extend(chunk_result.failures)
+    return StressReport(
+        n_scrambles=n_scrambles,
+        seconds=seconds,
+        move_counts=move_counts,
+        n_failures=n_failures,
+        failures=failures[:MAX_REPORTED_FAILURES],
+    )
+
+
+def _init_worker(round_trip_kwargs: dict[str, Any]) -> None:
+    global _worker_round_trip
+
+    _worker_round_trip = RoundTrip(**round_trip_kwargs)
+    _worker_round_trip.solver.letter_transforms
+
+
+def _run_chunk(chunk: tuple[int, int, int]) -> ChunkResult:
+    return _worker_round_trip.run_chunk(*chunk)
+
+
+@click.command()
+@click.option(
+    "-n",
+    "--n-scrambles",
+    type=click.IntRange(min=1),
+    default=100_000,
+    show_default=True,
+    help="no. of scrambles to round-trip",
+)
+@click.option("-s", "--seed", type=int, default=0, show_default=True, help="random seed")
+@click.option(
+    "-p",
+    "--processes",
+    type=click.IntRange(min=1),
+    default=multiprocessing.cpu_count(),
+    show_default=True,
+    help="no. of worker processes",
+)
+@click.option(
+    "-c",
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=1000,
+    show_default=True,
+    help="no. of scrambles generated and checked by a worker process at once",
+)
+@click.option(
+    "-l",
+    "--scramble-length",
+    type=click.IntRange(min=0),
+    default=25,
+    show_default=True,
+    help="no. of random quarter turns of a scramble (the last one is skipped half of the time)",
+)
+@click.option(
+    "-b",
+    "--backend",
+    type=click.Choice([backend.name.lower() for backend in Backend]),
+    default=Backend.PERMUTATION.name.lower(),
+    show_default=True,
+    help="cube backend replaying the moves of the solves",
+)
+@click.option(
+    "--corners-first",
+    is_flag=True,
+    help="indicates whether to apply corner swaps before edge swaps",
+)
+def main(
+    n_scrambles: int,
+    seed: int,
+    processes: int,
+    chunk_size: int,
+    scramble_length: int,
+    backend: str,
+    corners_first: bool,
+) -> None:
+    """Trace and solve random scrambles, checking that every solve solves the cube.
+
+    The report (throughput, distribution of the no. of moves of the solves and failures) is
+    printed as JSON. Exits with 1 if any solve fails.
+    """
+    report = run_stress_test(
+        n_scrambles,
+        seed,
+        processes,
+        chunk_size,
+        backend=Backend[backend.upper()],
+        scramble_length=scramble_length,
+        corners_first=corners_first,
+    )
+    click.echo(json.dumps(report.as_dict(), indent=2))
+    sys.exit(1 if report.n_failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import io
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from PIL import Image, ImageSequence
+
+from animation import ApngWriter, SolveAnimator, main
+from cube import make_white_up_green_front_cube
+from renderer import CubeRenderer, RasterCubeRenderer
+
+EDGE_SWAP_LETTERS = "CDE"
+CORNER_SWAP_LETTERS = "FG"
+
+
+def _expected_frames(animator, renderer_args, renderer_kwargs):
+    cube = make_white_up_green_front_cube()
+    renderer = CubeRenderer(*renderer_args, **renderer_kwargs)
+    expected_frames = [np.asarray(renderer.render(cube))]
+    for _, permutation in animator._steps(EDGE_SWAP_LETTERS, CORNER_SWAP_LETTERS, False, True):
+        cube.apply_permutation(permutation)
+        expected_frames.append(np.asarray(renderer.render(cube)))
+    return expected_frames
+
+
+def _decode_frames(animation):
+    with Image.open(io.BytesIO(animation)) as image:
+        return [np.asarray(frame.convert("RGB")) for frame in ImageSequence.Iterator(image)]
+
+
+class TestSolveAnimator:
+    @pytest.mark.parametrize("write_function_name", ["write_gif", "write_apng"])
+    @pytest.mark.parametrize(
+        "per_move, renderer_args, renderer_kwargs",
+        [
+            pytest.param(False, (160, 120), {}, id="per_letter"),
+            pytest.param(True, (160, 120), {}, id="per_move"),
+            pytest.param(False, (90, 200), {"border_size_percent": 0.3}, id="thick_border"),
+        ],
+    )
+    def test_frames_match_renders(
+        self, write_function_name, per_move, renderer_args, renderer_kwargs
+    ):
+        animator = SolveAnimator(
+            renderer=RasterCubeRenderer(*renderer_args, **renderer_kwargs), per_move=per_move
+        )
+        animation_file = io.BytesIO()
+
+        getattr(animator, write_function_name)(
+            animation_file,
+            make_white_up_green_front_cube(),
+            EDGE_SWAP_LETTERS,
+            CORNER_SWAP_LETTERS,
+        )
+
+        frames = _decode_frames(animation_file.getvalue())
+        expected_frames = _expected_frames(animator, renderer_args, renderer_kwargs)
+        assert len(frames) == len(expected_frames)
+        assert all(
+            np.array_equal(frame, expected_frame)
+            for frame, expected_frame in zip(frames, expected_frames)
+        )
+
+    def test_frame_labels(self):
+        animator = SolveAnimator(renderer=RasterCubeRenderer(40, 30))
+
+        frames = animator.iter_frames(make_white_up_green_front_cube(), "CD", "FG", True, True)
+
+        assert [frame.label for frame in frames] == [
+            "initial",
+            "corner F",
+            "corner G",
+            "edge C",
+            "edge D",
+        ]
+
+    def test_only_changed_areas_are_encoded(self):
+        animator = SolveAnimator(renderer=RasterCubeRenderer(400, 300))
+
+        frames = list(animator.iter_frames(make_white_up_green_front_cube(), "C", ""))
+
+        assert frames[0].image.size == (400, 300)
+        assert frames[1].image.width * frames[1].image.height < 400 * 300
+
+    def test_apng_writer_checks_frame_count(self):
+        animator = SolveAnimator(renderer=RasterCubeRenderer(40, 30))
+        writer = ApngWriter(io.BytesIO(), (40, 30), n_frames=2, frame_duration_ms=100)
+
+        writer.write_frame(next(animator.iter_frames(make_white_up_green_front_cube(), "", "")))
+
+        with pytest.raises(ValueError):
+            writer.close()
+
+    @pytest.mark.parametrize("file_name", ["solve.gif", "solve.png"])
+    def test_cli(self, tmp_path, file_name):
+        output_file = tmp_path / file_name
+
+        result = CliRunner().invoke(
+            main, ["CD", "FG", str(output_file), "-w", "40", "-h", "30", "-d", "100"]
+        )
+
+        assert result.exit_code == 0, result.output
+        with Image.open(output_file) as image:
+            assert image.n_frames == 5
+            assert image.info["duration"] == 100
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from benchmark import BENCHMARKS, BenchmarkResult, find_regressions, main, run_benchmark
+
+
+class TestBenchmark:
+    @pytest.fixture
+    def runner(self):
+        return CliRunner()
+
+    @pytest.fixture
+    def baseline_file(self, tmp_path):
+        return tmp_path / "baseline.json"
+
+    @pytest.mark.parametrize("benchmark", BENCHMARKS, ids=lambda benchmark: benchmark.name)
+    def test_run_benchmark(self, benchmark):
+        result = run_benchmark(benchmark, min_time=0, repeat=1)
+        assert (result.name, result.n_calls) == (benchmark.name, 1)
+        assert result.seconds_per_call > 0
+
+    def test_find_regressions(self):
+        results = [BenchmarkResult("fast", 1.0, 1), BenchmarkResult("slow", 2.5, 1)]
+        baseline = {"fast": 1.0, "slow": 1.0}
+
+        regressions = find_regressions(results, baseline, tolerance=1.0)
+
+        assert len(regressions) == 1
+        assert regressions[0].startswith("slow: 2.5 s per call, 2.50x the baseline")
+
+    def test_save_baseline_then_compare(self, runner, baseline_file):
+        args = ["-k", "apply_moves", "-b", str(baseline_file), "--min-time", "0", "-r", "1"]
+
+        result = runner.invoke(main, args + ["--save-baseline"])
+        assert result.exit_code == 0
+        report = json.loads(result.stdout)
+        assert [benchmark["name"] for benchmark in report["benchmarks"]] == [
+            "cube.apply_moves.short",
+            "cube.apply_moves.long",
+        ]
+        assert set(json.loads(baseline_file.read_text())) == {
+            "cube.apply_moves.short",
+            "cube.apply_moves.long",
+        }
+
+        result = runner.invoke(main, args + ["-t", "1000"])
+        assert result.exit_code == 0
+
+    def test_regression_fails(self, runner, baseline_file):
+        baseline_file.write_text(json.dumps({"cube.apply_moves.short": 1e-12}))
+
+        result = runner.invoke(
+            main, ["-k", "apply_moves.short", "-b", str(baseline_file), "--min-time", "0"]
+        )
+
+        assert result.exit_code == 1
+        assert "cube.apply_moves.short" in result.stderr
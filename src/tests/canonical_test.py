@@ -0,0 +1,156 @@
+import numpy as np
+import pytest
+
+from canonical import Canonicalizer, SolveCache
+from cube import Backend, Cube, make_white_up_green_front_cube
+from metrics import Metrics
+from moves import ROTATION_PERMUTATIONS
+from solver import OldPochmannSolver
+
+SCRAMBLE = "R U Ri F D L Bi U U"
+
+# Swaps white and yellow, green and blue, and red and orange
+RECOLOR = bytes.maketrans(b"WOGRBY", b"YRBOGW")
+
+
+@pytest.fixture
+def scrambled_stickers():
+    cube = make_white_up_green_front_cube()
+    cube.apply_moves(SCRAMBLE)
+    return cube.as_flat_str().encode("ascii")
+
+
+def _rotated(stickers, rotation):
+    return np.frombuffer(stickers, dtype="u1")[ROTATION_PERMUTATIONS[rotation]].tobytes()
+
+
+class TestCanonicalizer:
+    def test_rotations_share_representative(self, scrambled_stickers):
+        canonicalizer = Canonicalizer()
+        representatives = {
+            canonicalizer.canonicalize(_rotated(scrambled_stickers, rotation)).stickers
+            for rotation in range(len(ROTATION_PERMUTATIONS))
+        }
+
+        assert len(representatives) == 1
+
+    def test_recolored_states_differ_without_relabeling(self, scrambled_stickers):
+        canonicalizer = Canonicalizer()
+
+        assert (
+            canonicalizer.canonicalize(scrambled_stickers).stickers
+            != canonicalizer.canonicalize(scrambled_stickers.translate(RECOLOR)).stickers
+        )
+
+    @pytest.mark.parametrize("rotation", [0, 5, 23])
+    def test_relabeling(self, scrambled_stickers, rotation):
+        canonicalizer = Canonicalizer(relabel_colors=True)
+        stickers = _rotated(scrambled_stickers, rotation).translate(RECOLOR)
+
+        canonical_state = canonicalizer.canonicalize(stickers)
+
+        assert canonical_state.stickers == canonicalizer.canonicalize(scrambled_stickers).stickers
+        assert canonical_state.to_canonical(stickers) == canonical_state.stickers
+        assert canonical_state.from_canonical(canonical_state.stickers) == stickers
+        assert set(canonical_state.stickers) == set(b"WOGRBY")
+
+    @pytest.mark.parametrize(
+        "stickers",
+        [
+            pytest.param(b"W" * 54, id="same_centers"),
+            pytest.param(b"W" * 4 + b"X" * 50, id="non_center_color"),
+        ],
+    )
+    def test_invalid_stickers(self, stickers):
+        with pytest.raises(ValueError):
+            Canonicalizer(relabel_colors=True).canonicalize(stickers)
+
+    def test_solved_representative(self):
+        canonicalizer = Canonicalizer(relabel_colors=True)
+        solved_stickers = make_white_up_green_front_cube().as_flat_str().encode("ascii")
+
+        assert canonicalizer.canonicalize(solved_stickers).stickers == solved_stickers
+
+
+class TestSolveCache:
+    @pytest.mark.parametrize("backend", list(Backend))
+    @pytest.mark.parametrize("relabel_colors", [False, True])
+    def test_same_results_as_solver(self, scrambled_stickers, backend, relabel_colors):
+        solver = OldPochmannSolver()
+        solve_cache = SolveCache(solver, Canonicalizer(relabel_colors))
+
+        for rotation in (0, 7):
+            for stickers in (scrambled_stickers, scrambled_stickers.translate(RECOLOR)):
+                stickers = _rotated(stickers, rotation)
+                expected_cube = Cube.from_bytes(stickers, backend)
+                cube = Cube.from_bytes(stickers, backend)
+
+                solver.solve(expected_cube, "CDE", "FGH", corners_first=True)
+                solve_cache.solve(cube, "CDE", "FGH", corners_first=True)
+
+                assert cube.as_flat_str() == expected_cube.as_flat_str()
+
+    def test_equivalent_queries_hit(self, scrambled_stickers):
+        solve_cache = SolveCache(canonicalizer=Canonicalizer(relabel_colors=True))
+
+        solve_cache.solve(Cube.from_bytes(scrambled_stickers), "CDE", "FGH")
+        solve_cache.solve(Cube.from_bytes(scrambled_stickers), "CDE", "FGH")
+        solve_cache.solve(Cube.from_bytes(scrambled_stickers.translate(RECOLOR)), "CDE", "FGH")
+        # The same letters applied to a rotated state are different moves of the pieces
+        solve_cache.solve(Cube.from_bytes(_rotated(scrambled_stickers, 3)), "CDE", "FGH")
+
+        assert solve_cache.cache_info()[:2] == (2, 2)
+
+    def test_rotated_queries_miss_without_relabeling(self, scrambled_stickers, monkeypatch):
+        solve_cache = SolveCache()
+        monkeypatch.setattr(
+            solve_cache.canonicalizer,
+            "canonicalize",
+            lambda state: pytest.fail("states are canonicalized without relabeling"),
+        )
+
+        solve_cache.solve(Cube.from_bytes(scrambled_stickers), "CDE", "FGH")
+        solve_cache.solve(Cube.from_bytes(scrambled_stickers), "CDE", "FGH")
+        solve_cache.solve(Cube.from_bytes(_rotated(scrambled_stickers, 3)), "CDE", "FGH")
+
+        assert solve_cache.cache_info()[:2] == (1, 2)
+
+    def test_letters_are_composed_once_per_frame(self, scrambled_stickers, monkeypatch):
+        solver = OldPochmannSolver()
+        solve_cache = SolveCache(solver)
+        calls = []
+        swaps_to_permutation = solver.swaps_to_permutation
+        monkeypatch.setattr(
+            solver,
+            "swaps_to_permutation",
+            lambda *args: calls.append(args) or swaps_to_permutation(*args),
+        )
+        other_cube = make_white_up_green_front_cube()
+        other_cube.apply_moves("F F L Di B")
+
+        for stickers in (scrambled_stickers, other_cube.as_flat_str().encode("ascii")):
+            for _ in range(2):
+                solve_cache.solve(Cube.from_bytes(stickers), "CDE", "FGH")
+
+        assert solve_cache.cache_info()[:2] == (2, 2)
+        assert len(calls) == 1
+
+    def test_eviction(self, scrambled_stickers):
+        solve_cache = SolveCache(max_size=2)
+
+        for letters in ("C", "D", "E", "C"):
+            solve_cache.solve(Cube.from_bytes(scrambled_stickers), letters, "")
+
+        assert solve_cache.cache_info() == (0, 4, 2, 2)
+
+        solve_cache.cache_clear()
+
+        assert solve_cache.cache_info() == (0, 0, 2, 0)
+
+    def test_metrics(self, scrambled_stickers):
+        metrics = Metrics()
+        solve_cache = SolveCache(OldPochmannSolver(metrics=metrics))
+
+        solve_cache.solve(Cube.from_bytes(scrambled_stickers), "C", "")
+
+        assert metrics.as_dict()["caches"]["solve_cache"]["misses"] == 1
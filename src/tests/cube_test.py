@@ -1,12 +1,16 @@
 import pytest
 
-from cube import InvalidMove, make_white_up_green_front_cube
+from cube import Backend, Color, Cube, Face, InvalidMove, make_white_up_green_front_cube
+from metrics import Metrics
+from moves import MOVE_COMPILER, MOVE_PERMUTATIONS, parse_moves
+
+SCRAMBLE_MOVES = "R U Fi Lw D B Mi Ei Rwi Dw L Ui F Bi Di Lwi M E Ri Dwi Rw"
 
 
 class TestCube:
-    @pytest.fixture
-    def cube(self):
-        return make_white_up_green_front_cube()
+    @pytest.fixture(params=list(Backend), ids=lambda backend: backend.value)
+    def cube(self, request):
+        return make_white_up_green_front_cube(request.param)
 
     def test_as_flat_str(self, cube):
         assert cube.as_flat_str() == (
@@ -68,3 +72,172 @@ class TestCube:
     def test_apply_moves_raises_invalid_move(self, cube, moves):
         with pytest.raises(InvalidMove):
             cube.apply_moves(moves)
+
+    def test_apply_moves_standard_notation(self, cube):
+        expected_cube = cube.copy()
+        expected_cube.apply_moves("R R Ui Fw Fw x S")
+
+        cube.apply_moves("R2 U' f2 x S")
+
+        assert cube.as_flat_str() == expected_cube.as_flat_str()
+
+    def test_apply_opcodes(self, cube):
+        expected_cube = cube.copy()
+        expected_cube.apply_moves(SCRAMBLE_MOVES + " R2 y' Bw")
+
+        cube.apply_opcodes(parse_moves(SCRAMBLE_MOVES + " R2 y' Bw"))
+
+        assert cube.as_flat_str() == expected_cube.as_flat_str()
+
+    @pytest.mark.parametrize("rotation", ["x", "yi", "z2"])
+    def test_rotations_keep_cube_solved(self, cube, rotation):
+        cube.apply_moves(rotation)
+
+        assert cube.is_solved()
+        assert cube.as_flat_str() != make_white_up_green_front_cube().as_flat_str()
+
+    def test_apply_permutation(self, cube):
+        cube.apply_permutation(MOVE_COMPILER.compile("L D"))
+        assert cube.as_flat_str() == (
+            "BWWBWWBWW" + "OOOWGGRRRBBY" + "OOOWGGRRRBBY" + "BBYOOOWGGRRR" + "GGGYYYYYY"
+        )
+
+    def test_iter(self, cube):
+        cube.apply_moves("L D")
+        faces = list(cube)
+
+        assert [face.as_flat_str() for face in faces] == [
+            "BWWBWWBWW",
+            "OOOOOOBBY",
+            "WGGWGGOOO",
+            "RRRRRRWGG",
+            "BBYBBYRRR",
+            "GGGYYYYYY",
+        ]
+        assert faces[2][(2, 0)] == Color.ORANGE
+        assert list(faces[0]) == [Color.BLUE, Color.WHITE, Color.WHITE] * 3
+
+    def test_iter_faces_are_unaffected_by_later_moves(self, cube):
+        up_face = next(iter(cube))
+        cube.apply_moves("L")
+        assert up_face == Face.from_single_color(Color.WHITE)
+
+    @pytest.mark.parametrize("moves", ["is_solved", "apply_moves", "_backend"])
+    def test_apply_moves_raises_invalid_move_for_non_move_attribute(self, cube, moves):
+        with pytest.raises(InvalidMove):
+            cube.apply_moves(moves)
+
+    def test_from_flat_str_round_trip(self, cube):
+        cube.apply_moves(SCRAMBLE_MOVES)
+        flat_str = cube.as_flat_str()
+
+        for backend in Backend:
+            assert Cube.from_flat_str(flat_str, backend).as_flat_str() == flat_str
+            assert Cube.from_bytes(flat_str.encode("ascii"), backend).as_flat_str() == flat_str
+
+    @pytest.mark.parametrize(
+        "flat_str",
+        [
+            pytest.param("W" * 53, id="too_short"),
+            pytest.param("W" * 53 + "X", id="unknown_color"),
+        ],
+    )
+    def test_from_flat_str_raises_value_error(self, flat_str):
+        with pytest.raises(ValueError):
+            Cube.from_flat_str(flat_str)
+
+    def test_copy_is_independent(self, cube):
+        cube.apply_moves("R U")
+        flat_str = cube.as_flat_str()
+
+        cube_copy = cube.copy()
+        cube_copy.apply_moves("F")
+
+        assert cube.as_flat_str() == flat_str
+        assert cube_copy.as_flat_str() != flat_str
+        cube.apply_moves("F")
+        assert cube.as_flat_str() == cube_copy.as_flat_str()
+
+    def test_copy_keeps_metrics(self):
+        metrics = Metrics()
+        cube = make_white_up_green_front_cube(metrics=metrics)
+
+        cube.copy().apply_moves("R U")
+
+        assert metrics.move_counts == {"R": 1, "U": 1}
+
+    @pytest.mark.parametrize(
+        "make_state",
+        [
+            pytest.param(lambda cube: cube, id="cube"),
+            pytest.param(lambda cube: cube.as_flat_str(), id="flat_str"),
+            pytest.param(lambda cube: cube.as_flat_str().encode("ascii"), id="bytes"),
+        ],
+    )
+    def test_reset_to(self, cube, make_state):
+        scrambled_cube = make_white_up_green_front_cube()
+        scrambled_cube.apply_moves(SCRAMBLE_MOVES)
+        up_face = next(iter(cube))
+
+        cube.reset_to(make_state(scrambled_cube))
+
+        assert cube.as_flat_str() == scrambled_cube.as_flat_str()
+        assert up_face == Face.from_single_color(Color.WHITE)
+        cube.apply_moves("R")
+        assert cube.as_flat_str() != scrambled_cube.as_flat_str()
+
+    def test_reset_to_raises_value_error(self, cube):
+        with pytest.raises(ValueError):
+            cube.reset_to("W" * 54 + "W")
+
+
+class TestPermutationBackend:
+    @pytest.fixture
+    def cube(self):
+        return make_white_up_green_front_cube(Backend.PERMUTATION)
+
+    @pytest.fixture
+    def reference_cube(self):
+        return make_white_up_green_front_cube(Backend.RUBIK)
+
+    @pytest.mark.parametrize("move", list(MOVE_PERMUTATIONS))
+    def test_move_matches_reference(self, cube, reference_cube, move):
+        cube.apply_moves(SCRAMBLE_MOVES)
+        reference_cube.apply_moves(SCRAMBLE_MOVES)
+
+        getattr(cube, move)()
+        getattr(reference_cube, move)()
+
+        assert cube.as_flat_str() == reference_cube.as_flat_str()
+        assert cube.is_solved() == reference_cube.is_solved()
+
+    def test_str_matches_reference(self, cube, reference_cube):
+        cube.apply_moves(SCRAMBLE_MOVES)
+        reference_cube.apply_moves(SCRAMBLE_MOVES)
+
+        assert str(cube) == str(reference_cube)
+
+
+class TestFace:
+    @pytest.fixture
+    def face(self):
+        return Face([[Color.WHITE, Color.ORANGE, Color.GREEN]] * 2 + [[Color.RED] * 3])
+
+    def test_getitem(self, face):
+        assert face[(0, 1)] == Color.ORANGE
+        assert face[(2, 2)] == Color.RED
+
+    def test_piece_colors(self, face):
+        assert face.piece_colors == [[Color.WHITE, Color.ORANGE, Color.GREEN]] * 2 + [
+            [Color.RED] * 3
+        ]
+
+    def test_as_flat_str(self, face):
+        assert face.as_flat_str() == "WOGWOGRRR"
+
+    def test_equality_of_view(self, face):
+        assert Face.view(b"--WOG--WOG--RRR", offset=2, row_stride=5) == face
+
+    def test_invalid_shape_raises_value_error(self):
+        with pytest.raises(ValueError):
+            Face([[Color.WHITE] * 3] * 2)
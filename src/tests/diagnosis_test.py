@@ -0,0 +1,73 @@
+import pytest
+
+from cube import make_white_up_green_front_cube
+from diagnosis import Diagnosis, LetterError, SolveDiagnoser
+from solver import OldPochmannSolver
+
+
+class TestSolveDiagnoser:
+    @pytest.fixture
+    def diagnoser(self):
+        return SolveDiagnoser()
+
+    @pytest.fixture
+    def scrambled_cube(self):
+        # Scrambled by the reversed memo "AC" (edges) / "BCDF" (corners)
+        cube = make_white_up_green_front_cube()
+        OldPochmannSolver().solve(cube, "CA", "FDCB")
+        return cube
+
+    def test_correct_memo(self, diagnoser, scrambled_cube):
+        assert diagnoser.diagnose(scrambled_cube, "AC", "BCDF") == Diagnosis(True, None)
+
+    @pytest.mark.parametrize("corners_first", [False, True])
+    def test_correct_traced_memo(self, diagnoser, corners_first):
+        cube = make_white_up_green_front_cube()
+        cube.apply_moves("F R U Ri Ui Fi L D Bi R R Ui")
+        memo = diagnoser.memo_tracer.trace(cube, corners_first=corners_first)
+
+        diagnosis = diagnoser.diagnose(
+            cube, memo.edge_swap_letters, memo.corner_swap_letters, corners_first=corners_first
+        )
+
+        assert diagnosis == Diagnosis(True, None)
+
+    @pytest.mark.parametrize(
+        "edge_swap_letters, corner_swap_letters, expected_first_error",
+        [
+            pytest.param("AD", "BCDF", LetterError("edge", 1, "D", "C"), id="edge_typo"),
+            pytest.param("BC", "BCDF", LetterError("edge", 0, "B", "A"), id="edge_first_letter"),
+            pytest.param("AC", "BCDG", LetterError("corner", 3, "G", "F"), id="corner_typo"),
+            pytest.param("A", "BCDF", LetterError("edge", 1, None, "C"), id="missing_letter"),
+            pytest.param("AC", "BQDF", LetterError("corner", 1, "Q", "C"), id="unknown_letter"),
+        ],
+    )
+    def test_first_error(
+        self,
+        diagnoser,
+        scrambled_cube,
+        edge_swap_letters,
+        corner_swap_letters,
+        expected_first_error,
+    ):
+        diagnosis = diagnoser.diagnose(scrambled_cube, edge_swap_letters, corner_swap_letters)
+        assert diagnosis == Diagnosis(False, expected_first_error)
+
+    @pytest.mark.parametrize(
+        "edge_swap_letters, expected_diagnosis",
+        [
+            pytest.param("EGE", Diagnosis(True, None), id="break_into_first_piece"),
+            pytest.param("GEG", Diagnosis(True, None), id="break_into_second_piece"),
+            pytest.param(
+                "AGE", Diagnosis(False, LetterError("edge", 0, "A", "D")), id="solved_piece"
+            ),
+        ],
+    )
+    def test_cycle_break(self, diagnoser, edge_swap_letters, expected_diagnosis):
+        # The buffer piece is in place, so the memo may break into any unsolved piece
+        cube = make_white_up_green_front_cube()
+        OldPochmannSolver().solve(cube, "EGE", "", apply_parity=False)
+
+        diagnosis = diagnoser.diagnose(cube, edge_swap_letters, "", apply_parity=False)
+
+        assert diagnosis == expected_diagnosis
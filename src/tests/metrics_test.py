@@ -0,0 +1,100 @@
+import collections
+
+import pytest
+
+from cube import make_white_up_green_front_cube
+from metrics import Metrics
+from solver import OldPochmannSolver
+
+EDGE_SWAP_LETTERS = "CSWJVNFYIDE"
+CORNER_SWAP_LETTERS = "WCMDIHTOY"
+
+
+class TestMetrics:
+    @pytest.fixture
+    def metrics(self):
+        return Metrics()
+
+    @pytest.fixture
+    def solver(self, metrics):
+        return OldPochmannSolver(metrics=metrics)
+
+    @pytest.mark.parametrize("apply_parity", [False, True])
+    @pytest.mark.parametrize("corners_first", [False, True])
+    def test_instrumented_solve_matches_solve(self, solver, corners_first, apply_parity):
+        cube = make_white_up_green_front_cube()
+        expected_cube = make_white_up_green_front_cube()
+        solve_args = (EDGE_SWAP_LETTERS, CORNER_SWAP_LETTERS, corners_first, apply_parity)
+
+        solver.solve(cube, *solve_args)
+        OldPochmannSolver().solve(expected_cube, *solve_args)
+
+        assert cube.as_flat_str() == expected_cube.as_flat_str()
+
+    @pytest.mark.parametrize(
+        "apply_parity, expected_phases",
+        [
+            pytest.param(True, {"edges", "corners", "parity", "compose", "apply"}, id="parity"),
+            pytest.param(False, {"edges", "corners", "compose", "apply"}, id="no_parity"),
+        ],
+    )
+    def test_solve_records_moves_letters_and_phases(
+        self, metrics, solver, apply_parity, expected_phases
+    ):
+        solver.solve(
+            make_white_up_green_front_cube(),
+            EDGE_SWAP_LETTERS,
+            CORNER_SWAP_LETTERS,
+            apply_parity=apply_parity,
+        )
+
+        moves = OldPochmannSolver().swaps_to_moves(
+            EDGE_SWAP_LETTERS, CORNER_SWAP_LETTERS, apply_parity=apply_parity
+        )
+        metrics_dict = metrics.as_dict()
+        assert metrics_dict["moves"] == dict(
+            sorted(collections.Counter(move[0] for move in moves.split()).items())
+        )
+        assert sum(metrics_dict["letters"]["edge"].values()) == len(EDGE_SWAP_LETTERS)
+        assert sum(metrics_dict["letters"]["corner"].values()) == len(CORNER_SWAP_LETTERS)
+        assert set(metrics_dict["phases"]) == expected_phases
+        assert metrics_dict["caches"]["move_compiler"]["currsize"] > 0
+
+    def test_swaps_to_moves_records_phase(self, metrics, solver):
+        solver.swaps_to_moves(EDGE_SWAP_LETTERS, CORNER_SWAP_LETTERS)
+        assert metrics.as_dict()["phases"]["moves_string"]["calls"] == 1
+
+    def test_cube_records_moves(self, metrics):
+        cube = make_white_up_green_front_cube(metrics=metrics)
+
+        cube.apply_moves("R U Ri Lw")
+        cube.Di()
+        cube.apply_permutation(OldPochmannSolver().swaps_to_permutation("A", ""))
+
+        metrics_dict = metrics.as_dict()
+        assert metrics_dict["moves"] == {"D": 1, "L": 1, "R": 2, "U": 1}
+        assert metrics_dict["permutations"] == 1
+
+    def test_reset(self, metrics, solver):
+        solver.solve(make_white_up_green_front_cube(), EDGE_SWAP_LETTERS, CORNER_SWAP_LETTERS)
+        metrics.reset()
+
+        metrics_dict = metrics.as_dict()
+        assert (metrics_dict["moves"], metrics_dict["letters"], metrics_dict["phases"]) == (
+            {},
+            {},
+            {},
+        )
+
+    def test_to_prometheus(self, metrics):
+        metrics.count_moves(["R", "Ri", "U"])
+        metrics.count_letters("edge", "AA")
+        metrics.add_phase_time("edges", 0.5)
+
+        lines = metrics.to_prometheus(namespace="test").splitlines()
+
+        assert "# TYPE test_moves_total counter" in lines
+        assert 'test_moves_total{face="R"} 2' in lines
+        assert 'test_letters_total{piece_type="edge",letter="A"} 2' in lines
+        assert 'test_phase_seconds_total{phase="edges"} 0.5' in lines
+        assert "test_permutations_total 0" in lines
@@ -0,0 +1,184 @@
+import numpy as np
+import pytest
+
+from cube import make_white_up_green_front_cube
+from moves import (
+    IDENTITY,
+    INVERSE_ROTATION_PERMUTATIONS,
+    MOVE_PERMUTATIONS,
+    OPCODES,
+    ROTATION_PERMUTATIONS,
+    InvalidMove,
+    MoveCompiler,
+    are_solved,
+    compile_opcodes,
+    compose,
+    format_opcodes,
+    invert,
+    parse_moves,
+    simplify_moves,
+)
+from solver import CORNER_SWAP_MOVES, EDGE_SWAP_MOVES, PARITY_MOVES
+
+
+class TestPermutations:
+    @pytest.mark.parametrize("move", list(MOVE_PERMUTATIONS))
+    def test_four_quarter_turns_are_identity(self, move):
+        permutation = MOVE_PERMUTATIONS[move]
+        assert np.array_equal(compose(*[permutation] * 4), IDENTITY)
+
+    @pytest.mark.parametrize("move", list(MOVE_PERMUTATIONS))
+    def test_invert(self, move):
+        permutation = MOVE_PERMUTATIONS[move]
+        assert np.array_equal(compose(permutation, invert(permutation)), IDENTITY)
+
+    def test_rotations(self):
+        solved_state = np.frombuffer(make_white_up_green_front_cube().as_flat_str().encode(), "u1")
+        rotations = {rotation.tobytes() for rotation in ROTATION_PERMUTATIONS}
+
+        assert len(rotations) == 24
+        assert np.array_equal(ROTATION_PERMUTATIONS[0], IDENTITY)
+        # Turning all the layers of an axis the same way rotates the cube
+        for moves in (("R", "Mi", "Li"), ("U", "Ei", "Di")):
+            assert compose(*(MOVE_PERMUTATIONS[move] for move in moves)).tobytes() in rotations
+        assert are_solved(solved_state[ROTATION_PERMUTATIONS]).all()
+        for rotation, inverse_rotation in zip(ROTATION_PERMUTATIONS, INVERSE_ROTATION_PERMUTATIONS):
+            assert np.array_equal(compose(rotation, inverse_rotation), IDENTITY)
+
+
+class TestMoveCompiler:
+    @pytest.fixture
+    def move_compiler(self):
+        return MoveCompiler(cache_size=2)
+
+    @pytest.mark.parametrize("moves", [EDGE_SWAP_MOVES, CORNER_SWAP_MOVES, PARITY_MOVES])
+    def test_compile_matches_sequential_moves(self, move_compiler, moves):
+        expected_permutation = compose(*(MOVE_PERMUTATIONS[move] for move in moves.split()))
+        assert np.array_equal(move_compiler.compile(moves), expected_permutation)
+
+    def test_compile_empty(self, move_compiler):
+        assert np.array_equal(move_compiler.compile("  "), IDENTITY)
+
+    def test_cache_is_keyed_by_normalized_moves(self, move_compiler):
+        move_compiler.compile("R U Ri")
+        move_compiler.compile("  R  U\tRi ")
+
+        cache_info = move_compiler.cache_info()
+        assert (cache_info.hits, cache_info.misses) == (1, 1)
+
+    def test_cache_is_bounded(self, move_compiler):
+        for moves in ("R", "U", "F", "R"):
+            move_compiler.compile(moves)
+
+        cache_info = move_compiler.cache_info()
+        assert (cache_info.hits, cache_info.misses, cache_info.currsize) == (0, 4, 2)
+
+    def test_compile_opcodes(self, move_compiler):
+        permutation = move_compiler.compile_opcodes(parse_moves("R2 U'"))
+        move_compiler.compile_opcodes(parse_moves("R2' Ui"))
+
+        assert np.array_equal(permutation, move_compiler.compile("R R Ui"))
+        cache_info = move_compiler.opcodes_cache_info()
+        assert (cache_info.hits, cache_info.misses) == (1, 1)
+
+    def test_compiled_permutation_is_read_only(self, move_compiler):
+        with pytest.raises(ValueError):
+            move_compiler.compile("R U")[0] = 0
+
+    def test_compile_raises_invalid_move_with_position(self, move_compiler):
+        with pytest.raises(InvalidMove, match="'Q' at position 2"):
+            move_compiler.compile("R U Q")
+
+
+class TestParseMoves:
+    @pytest.mark.parametrize(
+        "moves, expected_moves",
+        [
+            pytest.param("R Ri R' R2 R2'", "R Ri Ri R2 R2", id="suffixes"),
+            pytest.param("Rw r' Uw2 u Fwi f2 Bw b'", "Rw Rwi Uw2 Uw Fwi Fw2 Bw Bwi", id="wide"),
+            pytest.param("M' E2 S Si", "Mi E2 S Si", id="slices"),
+            pytest.param("x y' z2", "x yi z2", id="rotations"),
+            pytest.param(" \tR\n U ", "R U", id="whitespace"),
+            pytest.param("", "", id="empty"),
+        ],
+    )
+    def test_notation(self, moves, expected_moves):
+        opcodes = parse_moves(moves)
+
+        assert opcodes.typecode == "B"
+        assert format_opcodes(opcodes) == expected_moves
+
+    @pytest.mark.parametrize(
+        "moves, expected_message",
+        [
+            pytest.param("R U Q", r"'Q' at position 2 \(character 4\)", id="unknown"),
+            pytest.param("R  U'' F", r"'U''' at position 1 \(character 3\)", id="double_prime"),
+            pytest.param("R3", r"'R3' at position 0 \(character 0\)", id="triple_turn"),
+            pytest.param("F X", r"'X' at position 1 \(character 2\)", id="uppercase_rotation"),
+        ],
+    )
+    def test_invalid_move_position(self, moves, expected_message):
+        with pytest.raises(InvalidMove, match=expected_message):
+            parse_moves(moves)
+
+    @pytest.mark.parametrize("move", ["R", "Uw", "S", "x", "y", "z"])
+    def test_double_turn(self, move):
+        assert np.array_equal(
+            compile_opcodes(parse_moves(f"{move}2")), compile_opcodes(parse_moves(f"{move} {move}"))
+        )
+        assert parse_moves(f"{move}2'")[0] == OPCODES[f"{move}2"]
+
+    @pytest.mark.parametrize("moves", [EDGE_SWAP_MOVES, "R2 U' x Fw2 b S' z2"])
+    def test_compile_opcodes_matches_compiler(self, moves):
+        assert np.array_equal(compile_opcodes(parse_moves(moves)), MoveCompiler().compile(moves))
+
+    def test_rotation_moves_rotate_the_cube(self):
+        rotations = {rotation.tobytes() for rotation in ROTATION_PERMUTATIONS}
+
+        for rotation, equivalent_moves in (("x", "R Mi Li"), ("y", "U Ei Di"), ("z", "F S Bi")):
+            permutation = compile_opcodes(parse_moves(rotation))
+            assert permutation.tobytes() in rotations
+            assert np.array_equal(permutation, compile_opcodes(parse_moves(equivalent_moves)))
+
+
+class TestSimplifyMoves:
+    @pytest.mark.parametrize(
+        "moves, expected_moves",
+        [
+            pytest.param("", "", id="empty"),
+            pytest.param("R U Ri Fi", "R U Ri Fi", id="nothing_to_simplify"),
+            pytest.param("L L L L", "", id="full_turn"),
+            pytest.param("Li L", "", id="inverse"),
+            pytest.param("L L L", "Li", id="three_quarter_turns"),
+            pytest.param("R L", "L R", id="canonical_order"),
+            pytest.param("Lw Lw Li Mi", "Lw", id="wide_merge"),
+            pytest.param("Lw Li", "M", id="wide_split"),
+            pytest.param("Dw Di", "E", id="wide_split_down"),
+            pytest.param("Rwi Mi", "Ri", id="wide_split_right"),
+            pytest.param("R U Ui Ri", "", id="nested_cancellation"),
+            pytest.param("L L Di Lw Lw Lw Lw D L L", "", id="setup_and_inverse"),
+            pytest.param("R2 R' U' U2", "R U", id="standard_notation"),
+            pytest.param("x", "Lwi R", id="rotation"),
+            pytest.param("Fw Fi", "S", id="standing_slice"),
+        ],
+    )
+    def test_simplify_moves(self, moves, expected_moves):
+        assert simplify_moves(moves) == expected_moves
+
+    @pytest.mark.parametrize(
+        "moves",
+        [
+            "Lw Lw Di L L R U Ri L L D Lw Lw",
+            "Dwi L Rw M E Dw Li Dw Rwi L",
+            "x2 R' Uw y Fw2 S b z' Bw2",
+        ],
+    )
+    def test_simplify_moves_preserves_effect(self, moves):
+        move_compiler = MoveCompiler()
+        assert np.array_equal(
+            move_compiler.compile(simplify_moves(moves)), move_compiler.compile(moves)
+        )
+
+    def test_simplify_moves_raises_invalid_move(self):
+        with pytest.raises(InvalidMove):
+            simplify_moves("R Q")
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from moves import PERMUTATION_DTYPE, compose
+from pair_table import LetterPairTable
+from solver import OldPochmannSolver, SetupMove
+
+SWAP_LETTERS = [
+    pytest.param("", "", id="empty"),
+    pytest.param("C", "", id="single_edge"),
+    pytest.param("CD", "FG", id="even"),
+    pytest.param("CDE", "FGH", id="odd"),
+    pytest.param("", "FGH", id="corners_only"),
+    pytest.param("DCEW", "WVF", id="mixed"),
+]
+
+
+class TestLetterPairTable:
+    @pytest.fixture
+    def solver(self):
+        return OldPochmannSolver()
+
+    @pytest.fixture
+    def table_solver(self, tmp_path):
+        return OldPochmannSolver(pair_tables_dir=tmp_path)
+
+    @pytest.mark.parametrize("edge_swap_letters, corner_swap_letters", SWAP_LETTERS)
+    @pytest.mark.parametrize("corners_first", [False, True])
+    @pytest.mark.parametrize("apply_parity", [False, True])
+    def test_matches_letter_transforms(
+        self,
+        solver,
+        table_solver,
+        edge_swap_letters,
+        corner_swap_letters,
+        corners_first,
+        apply_parity,
+    ):
+        args = (edge_swap_letters, corner_swap_letters, corners_first, apply_parity)
+
+        permutations = table_solver.swaps_to_permutations(*args)
+
+        assert np.array_equal(compose(*permutations), solver.swaps_to_permutation(*args))
+
+    def test_halves_compositions(self, solver, table_solver):
+        args = ("CDEF", "GHIJ", False, True)
+        assert len(table_solver.swaps_to_permutations(*args)) == 4
+        assert len(solver.swaps_to_permutations(*args)) == 8
+
+    def test_table_is_memory_mapped(self, table_solver, tmp_path):
+        table_solver.letter_pair_table
+        (path,) = tmp_path.glob("letter_pairs_*.npy")
+
+        table = np.load(path, mmap_mode="r")
+
+        n_edges = len(table_solver.edge_setup_moves_mapping)
+        n_corners = len(table_solver.corner_setup_moves_mapping)
+        assert isinstance(table, np.memmap)
+        assert table.shape == (n_edges * (n_edges + 2) + n_corners * (n_corners + 2), 54)
+        assert table.dtype == PERMUTATION_DTYPE
+
+    def test_table_file_is_reused(self, tmp_path):
+        OldPochmannSolver(pair_tables_dir=tmp_path).letter_pair_table
+        (path,) = tmp_path.glob("letter_pairs_*.npy")
+        mtime_ns = path.stat().st_mtime_ns
+
+        OldPochmannSolver(pair_tables_dir=tmp_path).letter_pair_table
+
+        assert path.stat().st_mtime_ns == mtime_ns
+
+    def test_table_file_depends_on_moves(self, tmp_path):
+        OldPochmannSolver(pair_tables_dir=tmp_path).letter_pair_table
+        solver = OldPochmannSolver(
+            edge_setup_moves_mapping={"C": SetupMove("", ""), "D": SetupMove("U", "Ui")},
+            pair_tables_dir=tmp_path,
+        )
+
+        permutations = solver.swaps_to_permutations("DC", "", apply_parity=False)
+
+        assert len(list(tmp_path.glob("letter_pairs_*.npy"))) == 2
+        assert np.array_equal(
+            compose(*permutations),
+            compose(solver.letter_transforms.edges["D"], solver.letter_transforms.edges["C"]),
+        )
+
+    def test_loading_built_table_does_not_compile_letters(self, tmp_path):
+        OldPochmannSolver(pair_tables_dir=tmp_path).letter_pair_table
+        solver = OldPochmannSolver(pair_tables_dir=tmp_path)
+
+        permutations = solver.swaps_to_permutations("CDE", "FGH")
+
+        assert "letter_transforms" not in vars(solver)
+        assert np.array_equal(
+            compose(*permutations), OldPochmannSolver().swaps_to_permutation("CDE", "FGH")
+        )
+
+    def test_invalid_table_raises_value_error(self, solver):
+        letter_transforms = solver.letter_transforms
+        with pytest.raises(ValueError):
+            LetterPairTable(
+                np.zeros((3, 54), dtype=PERMUTATION_DTYPE),
+                "".join(sorted(letter_transforms.edges)),
+                "".join(sorted(letter_transforms.corners)),
+                letter_transforms.parity,
+            )
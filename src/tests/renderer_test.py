@@ -1,7 +1,10 @@
+import numpy as np
 import pytest
+from PIL import Image
 
 from cube import make_white_up_green_front_cube
-from renderer import CubeRenderer
+from renderer import CubeRenderer, RasterCubeRenderer
+from solver import OldPochmannSolver
 
 
 class TestCubeRenderer:
@@ -16,3 +19,54 @@ class TestCubeRenderer:
     def test_image_size_matches(self, cube, renderer):
         image = renderer.render(cube)
         assert image.size == (800, 600)
+
+
+class TestRasterCubeRenderer:
+    @pytest.fixture
+    def cubes(self):
+        scrambled_cube = make_white_up_green_front_cube()
+        OldPochmannSolver().solve(scrambled_cube, "EDIYFNVJWSC", "YOTHIDMCW")
+        return [scrambled_cube, make_white_up_green_front_cube()]
+
+    @pytest.mark.parametrize(
+        "image_width, image_height, border_size_percent",
+        [
+            pytest.param(800, 600, 0.02, id="default_border"),
+            pytest.param(100, 100, 0.0, id="no_border"),
+            pytest.param(50, 400, 0.3, id="thick_border"),
+            pytest.param(7, 5, 0.02, id="tiny"),
+        ],
+    )
+    def test_matches_cube_renderer(self, cubes, image_width, image_height, border_size_percent):
+        renderer_args = (image_width, image_height)
+        renderer_kwargs = {"border_size_percent": border_size_percent}
+        renderer = RasterCubeRenderer(*renderer_args, **renderer_kwargs)
+        expected_images = [
+            np.asarray(CubeRenderer(*renderer_args, **renderer_kwargs).render(cube))
+            for cube in cubes
+        ]
+
+        assert all(
+            np.array_equal(np.asarray(renderer.render(cube)), expected_image)
+            for cube, expected_image in zip(cubes, expected_images)
+        )
+        assert np.array_equal(renderer.render_arrays(cubes), np.stack(expected_images))
+
+    def test_contact_sheet(self, cubes):
+        renderer = RasterCubeRenderer(40, 30)
+
+        sheet = np.asarray(renderer.render_contact_sheet(cubes * 3, n_columns=4, batch_size=4))
+
+        assert sheet.shape == (60, 160, 3)
+        assert np.array_equal(sheet[30:, 40:80], np.asarray(renderer.render(cubes[1])))
+        # Cells without a cube are left as the background
+        assert (sheet[30:, 80:] == renderer.background_color).all()
+
+    def test_write_pngs(self, cubes, tmp_path):
+        renderer = RasterCubeRenderer(40, 30)
+
+        paths = list(renderer.write_pngs(cubes, tmp_path / "pngs"))
+
+        assert [path.name for path in paths] == ["cube_00000.png", "cube_00001.png"]
+        with Image.open(paths[0]) as image:
+            assert np.array_equal(np.asarray(image), np.asarray(renderer.render(cubes[0])))
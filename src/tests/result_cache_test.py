@@ -0,0 +1,151 @@
+import multiprocessing
+import pickle
+
+import pytest
+
+import result_cache
+from cube import make_white_up_green_front_cube
+from result_cache import CachedResult, ResultCache, SolveKey
+from solver import EDGE_SETUP_MOVES, OldPochmannSolver, SetupMove
+from state import PackedState
+
+SOLVED_FLAT_STR = make_white_up_green_front_cube().as_flat_str()
+
+
+def _key(edge_swap_letters, config_hash=b"config"):
+    return SolveKey(
+        config_hash, PackedState.from_flat_str(SOLVED_FLAT_STR), edge_swap_letters, "", False, True
+    )
+
+
+def _put_results(cache, edge_swap_letters):
+    for letters in edge_swap_letters:
+        cache.put(_key(letters), CachedResult(PackedState.from_flat_str(SOLVED_FLAT_STR), True))
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / "results.db"
+
+
+class TestResultCache:
+    def test_put_get(self, cache_path):
+        cache = ResultCache(cache_path)
+        cached_result = CachedResult(PackedState.from_flat_str(SOLVED_FLAT_STR), True)
+
+        cache.put(_key("C"), cached_result)
+
+        assert cache.get(_key("C")) == cached_result
+        assert cache.get(_key("D")) is None
+        assert cache.get(_key("C", config_hash=b"other config")) is None
+
+    def test_persists_across_instances(self, cache_path):
+        cache = ResultCache(cache_path)
+        _put_results(cache, ["C", "D"])
+        cache.close()
+
+        assert len(ResultCache(cache_path)) == 2
+
+    def test_eviction(self, cache_path, monkeypatch):
+        monkeypatch.setattr(result_cache, "EVICTION_INTERVAL", 4)
+        cache = ResultCache(cache_path, max_entries=3)
+
+        _put_results(cache, ["C", "D", "E", "F", "G", "H", "I"])
+
+        # The oldest entry is evicted at the 4th insertion only
+        assert len(cache) == 6
+        assert cache.get(_key("C")) is None
+
+        _put_results(cache, ["J"])
+
+        assert len(cache) == 3
+        assert cache.get(_key("G")) is None
+        assert cache.get(_key("H")) is not None
+
+    def test_concurrent_processes(self, cache_path):
+        cache = ResultCache(cache_path)
+        # Every process writes some of the same results
+        letters_chunks = [["C", "D", "E", "F"], ["E", "F", "G", "H"], ["G", "H", "C", "D"]]
+
+        with multiprocessing.Pool(3) as pool:
+            pool.starmap(_put_results, [(cache, letters) for letters in letters_chunks])
+
+        assert len(cache) == 6
+
+    def test_pickle_drops_connection(self, cache_path):
+        cache = ResultCache(cache_path)
+        _put_results(cache, ["C"])
+
+        unpickled_cache = pickle.loads(pickle.dumps(cache))
+
+        assert len(unpickled_cache) == 1
+
+
+class TestSolverResultCache:
+    def test_solve_results_are_cached(self, cache_path):
+        solver = OldPochmannSolver(result_cache=ResultCache(cache_path))
+        cube = make_white_up_green_front_cube()
+        solver.solve(cube, "CDE", "FG")
+        expected_flat_str = cube.as_flat_str()
+
+        cube = make_white_up_green_front_cube()
+        OldPochmannSolver(result_cache=ResultCache(cache_path)).solve(cube, "CDE", "FG")
+
+        assert cube.as_flat_str() == expected_flat_str
+        assert len(solver.result_cache) == 1
+
+    def test_cache_is_consulted_before_solving(self, cache_path):
+        cache = ResultCache(cache_path)
+        solver = OldPochmannSolver(result_cache=cache)
+        scrambled_cube = make_white_up_green_front_cube()
+        scrambled_cube.apply_moves("R U")
+        # A wrong result planted in the cache is returned as is
+        cache.put(
+            SolveKey(
+                solver.config_hash,
+                PackedState.from_flat_str(SOLVED_FLAT_STR),
+                "C",
+                "",
+                False,
+                True,
+            ),
+            CachedResult(PackedState.from_cube(scrambled_cube), False),
+        )
+
+        cube = make_white_up_green_front_cube()
+        solver.solve(cube, "C", "")
+
+        assert cube.as_flat_str() == scrambled_cube.as_flat_str()
+        assert solver.solve_flat_str(SOLVED_FLAT_STR, "C", "") == (
+            scrambled_cube.as_flat_str(),
+            False,
+        )
+
+    def test_solve_flat_str(self, cache_path):
+        solver = OldPochmannSolver(result_cache=ResultCache(cache_path))
+        cube = make_white_up_green_front_cube()
+        OldPochmannSolver().solve(cube, "CD", "FG", corners_first=True)
+
+        results = [
+            solver.solve_flat_str(SOLVED_FLAT_STR, "CD", "FG", corners_first=True) for _ in range(2)
+        ]
+
+        assert results == [(cube.as_flat_str(), False)] * 2
+        assert len(solver.result_cache) == 1
+
+    def test_unknown_colors_are_not_cached(self, cache_path):
+        solver = OldPochmannSolver(result_cache=ResultCache(cache_path))
+
+        flat_str, solved = solver.solve_flat_str("X" * 54, "C", "")
+
+        assert (flat_str, solved) == ("X" * 54, True)
+        assert len(solver.result_cache) == 0
+
+    def test_config_hash(self):
+        edge_setup_moves = {**EDGE_SETUP_MOVES, "L": SetupMove("Lwi", "Lw")}
+
+        assert OldPochmannSolver().config_hash == OldPochmannSolver().config_hash
+        assert (
+            OldPochmannSolver().config_hash
+            != OldPochmannSolver(edge_setup_moves_mapping=edge_setup_moves).config_hash
+        )
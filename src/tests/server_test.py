@@ -0,0 +1,131 @@
+import asyncio
+import concurrent.futures
+import http.client
+import threading
+
+import pytest
+
+import server as server_module
+from server import VerificationClient, VerificationServer
+
+T_PERM_FLAT_STR = "WWWWWWWWW" + "OROGGRBOGRBB" + "OOOGGGRRRBBB" * 2 + "YYYYYYYYY"
+
+
+class TestVerificationServer:
+    @pytest.fixture
+    def event_loop_thread(self):
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        yield loop
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    @pytest.fixture
+    def make_server(self, event_loop_thread):
+        servers = []
+
+        def make_server(**kwargs):
+            server = VerificationServer(port=0, processes=1, **kwargs)
+            asyncio.run_coroutine_threadsafe(server.start(), event_loop_thread).result()
+            servers.append(server)
+            return server
+
+        yield make_server
+        for server in servers:
+            asyncio.run_coroutine_threadsafe(server.close(), event_loop_thread).result()
+
+    @pytest.fixture
+    def server(self, make_server):
+        return make_server()
+
+    @pytest.fixture
+    def client(self, server):
+        with VerificationClient(port=server.port) as client:
+            yield client
+
+    def test_health(self, client):
+        assert client.health() == {"status": "ok"}
+
+    def test_verify(self, client):
+        result = client.verify("D", "")
+        assert (result["flat_str"], result["solved"]) == (T_PERM_FLAT_STR, False)
+
+    def test_verify_options(self, client):
+        result = client.verify("C", "", initial_flat_str=T_PERM_FLAT_STR, reverse_swap_letters=True)
+        assert (result["solved"], result["suggested_letter"]) == (False, "D")
+
+    def test_concurrent_requests_on_one_connection_each(self, server):
+        def verify(edge_swap_letters):
+            with VerificationClient(port=server.port) as client:
+                return [client.verify(edge_swap_letters, "")["solved"] for _ in range(5)]
+
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(verify, ["DD", "D", "DD", "D"]))
+
+        assert results == [[True] * 5, [False] * 5] * 2
+
+    def test_render(self, client):
+        image = client.render("D", "W", image_width=64, image_height=48)
+        assert image.startswith(b"\x89PNG")
+
+    def test_render_invalid_size(self, client):
+        with pytest.raises(http.client.HTTPException, match="400"):
+            client.render("D", "W", image_width=0)
+
+    def test_busy_server_rejects_requests(self, make_server):
+        server = make_server(max_pending=0)
+        with VerificationClient(port=server.port) as client:
+            assert client.health() == {"status": "ok"}
+            with pytest.raises(http.client.HTTPException, match="503"):
+                client.verify("D", "")
+
+    @pytest.mark.parametrize(
+        "method, path, body, expected_status",
+        [
+            pytest.param("GET", "/unknown", None, 404, id="unknown_path"),
+            pytest.param("GET", "/verify", None, 405, id="wrong_method"),
+            pytest.param("POST", "/verify", b"{", 400, id="invalid_json"),
+            pytest.param("POST", "/verify", b"[]", 400, id="not_an_object"),
+            pytest.param(
+                "POST", "/verify", b'{"edge_swap_letters": 5}', 400, id="letters_not_a_string"
+            ),
+            pytest.param(
+                "POST", "/render", b'{"initial_flat_str": []}', 400, id="state_not_a_string"
+            ),
+            pytest.param(
+                "POST", "/verify", b'{"edge_swap_letters": "Q"}', 400, id="unknown_letter"
+            ),
+            pytest.param(
+                "POST", "/verify", b'{"initial_flat_str": "W"}', 400, id="state_too_short"
+            ),
+            pytest.param("GET", "/" + "a" * (1 << 16), None, 400, id="line_too_long"),
+        ],
+    )
+    def test_invalid_requests(self, server, method, path, body, expected_status):
+        connection = http.client.HTTPConnection("127.0.0.1", server.port)
+        connection.request(method, path, body=body)
+        assert connection.getresponse().status == expected_status
+        connection.close()
+
+    def test_worker_errors_return_500(self, server, monkeypatch):
+        def fail(record):
+            raise RuntimeError("worker failed")
+
+        # Workers are threads here, so that they see the patched function
+        server._executor.shutdown()
+        server._executor = concurrent.futures.ThreadPoolExecutor(1)
+        monkeypatch.setattr(server_module, "_verify", fail)
+
+        with VerificationClient(port=server.port) as client:
+            with pytest.raises(http.client.HTTPException, match="500.*worker failed"):
+                client.verify("D", "")
+            assert client.health() == {"status": "ok"}
+
+    def test_sockets(self, server):
+        assert server.sockets[0].getsockname()[1] == server.port != 0
+
+    def test_client_only_connects_to_loopback(self):
+        with pytest.raises(ValueError, match="loopback"):
+            VerificationClient("192.0.2.1")
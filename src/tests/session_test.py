@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from cube import make_white_up_green_front_cube
+from session import SolveSession
+from solver import OldPochmannSolver
+
+T_PERM_FLAT_STR = "WWWWWWWWW" + "OROGGRBOGRBB" + "OOOGGGRRRBBB" * 2 + "YYYYYYYYY"
+
+
+def _solve(session):
+    cube = make_white_up_green_front_cube()
+    cube.reset_to(session._initial_stickers.tobytes())
+    session.solver.solve(
+        cube,
+        session.edge_swap_letters,
+        session.corner_swap_letters,
+        session.corners_first,
+        session.apply_parity,
+    )
+    return cube.as_flat_str()
+
+
+class TestSolveSession:
+    @pytest.mark.parametrize("corners_first", [False, True])
+    def test_random_edits_match_solver(self, corners_first):
+        solver = OldPochmannSolver()
+        session = SolveSession(solver, corners_first=corners_first)
+        edge_letters = list(solver.edge_setup_moves_mapping)
+        corner_letters = list(solver.corner_setup_moves_mapping)
+        rng = np.random.default_rng(0)
+
+        for _ in range(200):
+            action = rng.integers(5)
+            if action == 0:
+                session.append_edge(rng.choice(edge_letters))
+            elif action == 1:
+                session.append_corner(rng.choice(corner_letters))
+            elif action == 2 and session.edge_swap_letters:
+                session.pop_edge()
+            elif action == 3 and session.corner_swap_letters:
+                session.pop_corner()
+            elif action == 4:
+                session.toggle_parity()
+
+            assert session.flat_str == _solve(session)
+
+    def test_solving_memo(self):
+        session = SolveSession(initial_flat_str=T_PERM_FLAT_STR, apply_parity=False)
+        assert not session.is_solved()
+
+        session.append_edge("D")
+
+        assert session.is_solved()
+        assert session.as_cube().is_solved()
+
+        assert session.pop_edge() == "D"
+
+        assert session.flat_str == T_PERM_FLAT_STR
+
+    def test_parity(self):
+        session = SolveSession(apply_parity=False)
+        session.append_edge("C")
+        without_parity = session.flat_str
+
+        session.toggle_parity()
+
+        assert session.apply_parity
+        assert session.flat_str != without_parity
+        assert session.flat_str == _solve(session)
+
+    def test_set_letters(self):
+        session = SolveSession()
+        session.set_letters("CDE", "FG")
+        edge_permutations = list(session._edge_permutations)
+
+        session.set_letters("CDF", "")
+
+        assert (session.edge_swap_letters, session.corner_swap_letters) == ("CDF", "")
+        # The permutations of the common prefix are kept
+        assert all(
+            permutation is kept_permutation
+            for permutation, kept_permutation in zip(
+                edge_permutations[:3], session._edge_permutations
+            )
+        )
+        assert session.flat_str == _solve(session)
+
+    def test_unknown_letter(self):
+        session = SolveSession()
+        session.append_edge("C")
+
+        with pytest.raises(KeyError):
+            session.append_edge("Q")
+
+        assert session.edge_swap_letters == "C"
+        assert session.flat_str == _solve(session)
+
+    def test_stickers_are_read_only(self):
+        session = SolveSession()
+
+        with pytest.raises(ValueError):
+            session.stickers[0] = 0
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from setup_search import SetupSearch, format_mapping
+from setup_validation import SetupMoveValidator
+from solver import CORNER_SETUP_MOVES, EDGE_SETUP_MOVES, OldPochmannSolver, SetupMove
+
+
+# Building the pruning tables takes a fraction of a second, so they are shared by the tests
+@pytest.fixture(scope="module")
+def tables_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("pruning_tables")
+
+
+@pytest.fixture(scope="module")
+def mappings(tables_dir):
+    return SetupSearch(tables_dir=tables_dir).search()
+
+
+class TestSetupSearch:
+    def test_mappings_are_valid(self, mappings):
+        edge_mapping, corner_mapping = mappings
+        solver = OldPochmannSolver(
+            edge_setup_moves_mapping=edge_mapping, corner_setup_moves_mapping=corner_mapping
+        )
+
+        assert SetupMoveValidator(solver).validate().ok
+
+    @pytest.mark.parametrize(
+        "mapping_index, current_mapping",
+        [
+            pytest.param(0, EDGE_SETUP_MOVES, id="edges"),
+            pytest.param(1, CORNER_SETUP_MOVES, id="corners"),
+        ],
+    )
+    def test_setups_are_not_longer(self, mappings, mapping_index, current_mapping):
+        mapping = mappings[mapping_index]
+
+        assert mapping.keys() == current_mapping.keys()
+        assert all(
+            len(mapping[letter].moves.split()) <= len(setup_move.moves.split())
+            for letter, setup_move in current_mapping.items()
+        )
+
+    def test_shorter_setups_are_found(self, mappings):
+        edge_mapping, _ = mappings
+
+        assert edge_mapping["O"] == SetupMove("D Bi L B", "Bi Li B Di")
+
+    def test_optimal_setups_are_kept(self, mappings):
+        _, corner_mapping = mappings
+
+        assert corner_mapping == CORNER_SETUP_MOVES
+
+    def test_pruning_tables_are_memory_mapped(self, tables_dir, mappings):
+        n_tables = len(list(tables_dir.iterdir()))
+
+        distances = SetupSearch(tables_dir=tables_dir).pruning_table((3, 5, 2, 8))
+
+        assert isinstance(distances, np.memmap)
+        # Only the goal is at no moves from the goal
+        assert np.count_nonzero(distances == 0) == 1
+        assert len(list(tables_dir.iterdir())) == n_tables == 2
+
+    def test_unreachable_setup(self, tables_dir):
+        search = SetupSearch(tables_dir=tables_dir)
+        distances = search.pruning_table((3, 5, 2, 8))
+
+        with pytest.raises(ValueError):
+            # The buffer sticker cannot be brought to the target while staying in place
+            search.find_setup_moves((5, 5, 2, 8), distances)
+
+    def test_format_mapping(self):
+        mapping = {"D": SetupMove("", ""), "L": SetupMove("Li", "L")}
+
+        assert format_mapping("SETUPS", mapping) == "\n".join(
+            [
+                "SETUPS = {",
+                '    "D": SetupMove("", ""),',
+                '    "L": SetupMove("Li", "L"),',
+                "}",
+            ]
+        )
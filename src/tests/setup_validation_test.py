@@ -0,0 +1,79 @@
+import pytest
+
+from setup_validation import SetupMoveIssue, SetupMoveValidator
+from solver import CORNER_SETUP_MOVES, EDGE_SETUP_MOVES, OldPochmannSolver, SetupMove
+
+
+def _validate(edge_setup_moves=None, corner_setup_moves=None, **validate_kwargs):
+    solver = OldPochmannSolver(
+        edge_setup_moves_mapping={**EDGE_SETUP_MOVES, **(edge_setup_moves or {})},
+        corner_setup_moves_mapping={**CORNER_SETUP_MOVES, **(corner_setup_moves or {})},
+    )
+    return SetupMoveValidator(solver).validate(**validate_kwargs)
+
+
+class TestSetupMoveValidator:
+    def test_default_setup_moves_are_valid(self):
+        report = SetupMoveValidator().validate()
+
+        assert report.ok, report.issues
+        assert report.n_letters == {"edge": 22, "corner": 21}
+        assert report.n_pairs == {"edge": 22 * 22, "corner": 21 * 21}
+
+    def test_parallel_report_matches(self):
+        edge_setup_moves = {"E": SetupMove("L Dwi L", "Li Dw L")}
+
+        assert _validate(edge_setup_moves, processes=2) == _validate(edge_setup_moves)
+
+    @pytest.mark.parametrize(
+        "edge_setup_moves, corner_setup_moves, expected_letters_checks",
+        [
+            pytest.param(
+                {"E": SetupMove("L Dwi L", "Li Dw L")},
+                {},
+                {("E", "inverse"), ("E", "side_effects")},
+                id="not_inverse",
+            ),
+            pytest.param(
+                {"F": SetupMove("Dw L", "Li Dwi")},
+                {},
+                {("F", "target"), ("F", "side_effects")},
+                id="wrong_target",
+            ),
+            pytest.param(
+                {},
+                {"V": SetupMove("L", "Li")},
+                {("V", "target"), ("V", "buffer"), ("V", "side_effects")},
+                id="moves_buffer",
+            ),
+            pytest.param(
+                {"Q": SetupMove("", "")}, {}, {("Q", "unknown")}, id="letter_not_in_scheme"
+            ),
+            pytest.param(
+                {"M": SetupMove("", "")}, {}, {("M", "unknown")}, id="letter_on_buffer_piece"
+            ),
+            pytest.param({"L": SetupMove("Li", "Ly")}, {}, {("L", "moves")}, id="invalid_move"),
+        ],
+    )
+    def test_issues(self, edge_setup_moves, corner_setup_moves, expected_letters_checks):
+        report = _validate(edge_setup_moves, corner_setup_moves)
+
+        assert not report.ok
+        assert {(issue.letters, issue.check) for issue in report.issues} == expected_letters_checks
+
+    def test_missing_letter(self):
+        edge_setup_moves = dict(EDGE_SETUP_MOVES)
+        del edge_setup_moves["Z"]
+
+        report = SetupMoveValidator(
+            OldPochmannSolver(edge_setup_moves_mapping=edge_setup_moves)
+        ).validate()
+
+        assert report.issues == [
+            SetupMoveIssue("edge", "Z", "missing", "no setup moves for the letter")
+        ]
+        assert report.n_pairs["edge"] == 21 * 21
+
+    def test_invalid_letter_scheme(self):
+        with pytest.raises(ValueError):
+            SetupMoveValidator(letter_scheme="ABC")
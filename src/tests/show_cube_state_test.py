@@ -0,0 +1,61 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from show_cube_state import main
+
+SOLVED_FLAT_STR = "WWWWWWWWW" + "OOOGGGRRRBBB" * 3 + "YYYYYYYYY"
+T_PERM_FLAT_STR = "WWWWWWWWW" + "OROGGRBOGRBB" + "OOOGGGRRRBBB" * 2 + "YYYYYYYYY"
+
+
+class TestShowCubeState:
+    @pytest.fixture
+    def runner(self):
+        return CliRunner()
+
+    @pytest.mark.parametrize(
+        "args, expected_output, expected_exit_code",
+        [
+            pytest.param(["", ""], SOLVED_FLAT_STR, 0, id="solved"),
+            pytest.param(["D", ""], T_PERM_FLAT_STR, 1, id="unsolved"),
+            pytest.param(["DD", "WW"], SOLVED_FLAT_STR, 0, id="solve"),
+        ],
+    )
+    def test_flat_output(self, runner, args, expected_output, expected_exit_code):
+        result = runner.invoke(main, [*args, "-f", "flat"])
+
+        assert result.exit_code == expected_exit_code
+        assert result.output == expected_output + "\n"
+
+    def test_text_output(self, runner):
+        result = runner.invoke(main, ["D", "", "-f", "text"])
+        assert result.output.splitlines()[3] == "ORO GGR BOG RBB"
+
+    def test_ansi_output(self, runner):
+        result = runner.invoke(main, ["", "", "-f", "ansi"], color=True)
+
+        lines = result.output.splitlines()
+        assert len(lines) == 9
+        assert lines[0] == " " * 8 + "\x1b[107m  \x1b[0m" * 3
+
+    def test_headless_output_does_not_import_renderer(self):
+        code = (
+            "import sys\n"
+            "from show_cube_state import main\n"
+            "try:\n"
+            "    main(['D', 'W', '-f', 'flat'])\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "print(sorted({'renderer', 'PIL'} & set(sys.modules)))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).parents[1],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert result.stdout.splitlines()[-1] == "[]"
@@ -1,6 +1,6 @@
 import pytest
 
-from cube import make_white_up_green_front_cube
+from cube import Backend, make_white_up_green_front_cube
 from solver import (
     CORNER_SETUP_MOVES,
     CORNER_SWAP_MOVES,
@@ -91,6 +91,21 @@ class TestDummyOldPochmannSolver:
         )
         assert moves == expected_moves
 
+    @pytest.mark.parametrize(
+        "edge_items, corners_first, apply_parity, expected_items",
+        [
+            pytest.param("AB", False, True, ["A", "B", "c"], id="even"),
+            pytest.param("A", False, True, ["A", "p", "c"], id="odd"),
+            pytest.param("A", True, True, ["c", "p", "A"], id="odd_corners_first"),
+            pytest.param("A", False, False, ["A", "c"], id="odd_without_parity"),
+        ],
+    )
+    def test_arrange_phases(self, edge_items, corners_first, apply_parity, expected_items):
+        items = OldPochmannSolver.arrange_phases(
+            list(edge_items), ["c"], "p", corners_first, apply_parity
+        )
+        assert items == expected_items
+
 
 class TestRealOldPochmannSolver:
     @pytest.fixture
@@ -147,6 +162,14 @@ class TestRealOldPochmannSolver:
                 "RWWWWWWWW" + "YBOGGRBOGRRG" + "OOOGGGRRRBBB" + "OOOGGBWRRBBB" + "YYOYYYYYY",
                 id="D_edge_W_corner_no_setup",
             ),
+            pytest.param(
+                "I",
+                "",
+                False,
+                False,
+                "WWWWWGWRW" + "OOOGWRBWGRBB" + "OOOGGGRRRBBB" + "OOOGGGRRRBBB" + "YYYYYYYYY",
+                id="edge_I_swaps_UF",
+            ),
         ],
     )
     def test_solve(
@@ -163,3 +186,68 @@ class TestRealOldPochmannSolver:
             cube, edge_swap_letters, corner_swap_letters, corners_first, apply_parity
         )
         assert cube.as_flat_str() == expected_cube_flat_str
+
+    @pytest.mark.parametrize("backend", list(Backend), ids=lambda backend: backend.value)
+    @pytest.mark.parametrize("corners_first", [False, True])
+    @pytest.mark.parametrize("apply_parity", [False, True])
+    def test_solve_matches_move_replay(
+        self, old_pochmann_solver, backend, corners_first, apply_parity
+    ):
+        edge_swap_letters = "".join(EDGE_SETUP_MOVES)
+        corner_swap_letters = "".join(CORNER_SETUP_MOVES)
+        cube = make_white_up_green_front_cube(backend)
+        reference_cube = make_white_up_green_front_cube(Backend.RUBIK)
+
+        old_pochmann_solver.solve(
+            cube, edge_swap_letters, corner_swap_letters, corners_first, apply_parity
+        )
+        reference_cube.apply_moves(
+            old_pochmann_solver.swaps_to_moves(
+                edge_swap_letters, corner_swap_letters, corners_first, apply_parity
+            )
+        )
+
+        assert cube.as_flat_str() == reference_cube.as_flat_str()
+
+    def test_simplified_swaps_to_moves(self):
+        edge_swap_letters = "".join(EDGE_SETUP_MOVES)
+        corner_swap_letters = "".join(CORNER_SETUP_MOVES)
+        moves = OldPochmannSolver().swaps_to_moves(edge_swap_letters, corner_swap_letters)
+        simplified_moves = OldPochmannSolver(simplify=True).swaps_to_moves(
+            edge_swap_letters, corner_swap_letters
+        )
+        cube = make_white_up_green_front_cube()
+        simplified_cube = make_white_up_green_front_cube()
+
+        cube.apply_moves(moves)
+        simplified_cube.apply_moves(simplified_moves)
+
+        assert len(simplified_moves.split()) < len(moves.split())
+        assert simplified_cube.as_flat_str() == cube.as_flat_str()
+
+    def test_letter_transforms_cover_mappings(self, old_pochmann_solver):
+        letter_transforms = old_pochmann_solver.letter_transforms
+        assert letter_transforms.edges.keys() == EDGE_SETUP_MOVES.keys()
+        assert letter_transforms.corners.keys() == CORNER_SETUP_MOVES.keys()
+
+    @pytest.mark.parametrize("corners_first", [False, True])
+    @pytest.mark.parametrize("apply_parity", [False, True])
+    def test_solve_batch_matches_solve(self, old_pochmann_solver, corners_first, apply_parity):
+        swap_letters = [("D", ""), ("", "W"), ("AC", "BCDF"), ("", ""), ("EFGHIJK", "ZYV")]
+
+        batch_result = old_pochmann_solver.solve_batch(swap_letters, corners_first, apply_parity)
+
+        for (edge_swap_letters, corner_swap_letters), flat_str, solved in zip(
+            swap_letters, batch_result.flat_strs(), batch_result.solved
+        ):
+            cube = make_white_up_green_front_cube()
+            old_pochmann_solver.solve(
+                cube, edge_swap_letters, corner_swap_letters, corners_first, apply_parity
+            )
+            assert flat_str == cube.as_flat_str()
+            assert solved == cube.is_solved()
+
+    def test_solve_batch_empty(self, old_pochmann_solver):
+        batch_result = old_pochmann_solver.solve_batch([])
+        assert batch_result.states.shape == (0, 54)
+        assert batch_result.solved.shape == (0,)
@@ -0,0 +1,79 @@
+import pytest
+
+from cube import Backend, make_white_up_green_front_cube
+from state import N_BYTES, PackedState
+
+SCRAMBLE_MOVES = "R U Fi Lw D B Mi Ei Rwi Dw L Ui F Bi Di Lwi M E Ri Dwi Rw"
+
+
+class TestPackedState:
+    @pytest.fixture
+    def cube(self):
+        return make_white_up_green_front_cube()
+
+    @pytest.fixture
+    def scrambled_cube(self, cube):
+        cube.apply_moves(SCRAMBLE_MOVES)
+        return cube
+
+    def test_flat_str_round_trip(self, scrambled_cube):
+        flat_str = scrambled_cube.as_flat_str()
+        assert PackedState.from_flat_str(flat_str).to_flat_str() == flat_str
+
+    def test_bytes_round_trip(self, scrambled_cube):
+        packed_state = PackedState.from_cube(scrambled_cube)
+        state_bytes = packed_state.to_bytes()
+
+        assert len(state_bytes) == N_BYTES
+        assert PackedState.from_bytes(state_bytes) == packed_state
+
+    @pytest.mark.parametrize("backend", list(Backend), ids=lambda backend: backend.value)
+    def test_cube_round_trip(self, scrambled_cube, backend):
+        cube = PackedState.from_cube(scrambled_cube).to_cube(backend)
+        assert cube.as_flat_str() == scrambled_cube.as_flat_str()
+
+    def test_hashable(self, scrambled_cube):
+        states = {PackedState.from_cube(make_white_up_green_front_cube()): "solved"}
+        states[PackedState.from_cube(scrambled_cube)] = "scrambled"
+
+        assert states[PackedState.from_flat_str(scrambled_cube.as_flat_str())] == "scrambled"
+        assert len(states) == 2
+
+    @pytest.mark.parametrize(
+        "moves, expected_is_solved",
+        [
+            pytest.param("", True, id="solved"),
+            pytest.param("Lw Ri Dw Ui", True, id="whole_cube_rotation"),
+            pytest.param("R", False, id="single_move"),
+            pytest.param(SCRAMBLE_MOVES, False, id="scrambled"),
+        ],
+    )
+    def test_is_solved(self, cube, moves, expected_is_solved):
+        cube.apply_moves(moves)
+        assert PackedState.from_cube(cube).is_solved() == expected_is_solved == cube.is_solved()
+
+    @pytest.mark.parametrize(
+        "flat_str",
+        [
+            pytest.param("W" * 53, id="too_short"),
+            pytest.param("X" * 54, id="unknown_color"),
+            pytest.param("0" * 54, id="digits"),
+            pytest.param("W" * 26 + "_" + "W" * 27, id="underscore"),
+        ],
+    )
+    def test_from_flat_str_raises_value_error(self, flat_str):
+        with pytest.raises(ValueError):
+            PackedState.from_flat_str(flat_str)
+
+    @pytest.mark.parametrize(
+        "state_bytes",
+        [
+            pytest.param(b"\x00", id="too_short"),
+            pytest.param(b"\xff" * N_BYTES, id="out_of_range"),
+            pytest.param((6).to_bytes(N_BYTES, "big"), id="color_code_6"),
+            pytest.param((7 << 30).to_bytes(N_BYTES, "big"), id="color_code_7"),
+        ],
+    )
+    def test_from_bytes_raises_value_error(self, state_bytes):
+        with pytest.raises(ValueError):
+            PackedState.from_bytes(state_bytes)
@@ -0,0 +1,96 @@
+import collections
+
+import numpy as np
+import pytest
+
+from cube import Backend, Cube, make_white_up_green_front_cube
+from moves import are_solved
+from solver import OldPochmannSolver
+from stress import RoundTrip, random_scrambles, run_stress_test
+from tracer import MemoTracer
+
+
+class TestRandomScrambles:
+    def test_deterministic(self):
+        scrambles_1 = random_scrambles(np.random.default_rng(1), 10)
+        scrambles_2 = random_scrambles(np.random.default_rng(1), 10)
+
+        assert np.array_equal(scrambles_1, scrambles_2)
+        assert not are_solved(scrambles_1).any()
+
+    def test_no_moves(self):
+        scrambles = random_scrambles(np.random.default_rng(1), 3, scramble_length=0)
+
+        solved_flat_str = make_white_up_green_front_cube().as_flat_str()
+        assert [scramble.tobytes().decode("ascii") for scramble in scrambles] == [
+            solved_flat_str
+        ] * 3
+
+
+class TestRunStressTest:
+    @pytest.mark.parametrize(
+        "backend, corners_first",
+        [
+            pytest.param(Backend.PERMUTATION, False, id="permutation"),
+            pytest.param(Backend.PERMUTATION, True, id="corners_first"),
+            pytest.param(Backend.RUBIK, False, id="rubik"),
+        ],
+    )
+    def test_all_solved(self, backend, corners_first):
+        report = run_stress_test(50, chunk_size=20, backend=backend, corners_first=corners_first)
+
+        assert report.n_scrambles == 50
+        assert report.n_failures == 0
+        assert sum(report.move_counts.values()) == 50
+
+    def test_processes_do_not_change_results(self):
+        report_1 = run_stress_test(60, seed=3, processes=1, chunk_size=20)
+        report_2 = run_stress_test(60, seed=3, processes=2, chunk_size=20)
+
+        assert report_1.move_counts == report_2.move_counts
+
+    def test_failures_are_reported(self):
+        # With wrong parity moves, scrambles with an odd no. of swaps cannot be solved
+        report = run_stress_test(20, solver=OldPochmannSolver(parity_moves="U"))
+
+        assert 0 < report.n_failures < 20
+        assert report.n_failures + sum(report.move_counts.values()) == 20
+        assert {"seed", "chunk_index", "index", "flat_str", "error"} <= report.failures[0].keys()
+
+    def test_report_as_dict(self):
+        report = run_stress_test(10)
+
+        report_dict = report.as_dict()
+
+        assert report_dict["scrambles_per_second"] > 0
+        assert report_dict["move_counts"]["min"] <= report_dict["move_counts"]["max"]
+        assert sum(report_dict["move_counts"]["histogram"].values()) == 10
+
+
+class TestRoundTrip:
+    def test_move_counts_match_move_strings(self):
+        solver = OldPochmannSolver()
+        round_trip = RoundTrip(solver)
+        tracer = MemoTracer(solver)
+        states = random_scrambles(np.random.default_rng([0, 0]), 5)
+
+        chunk_result = round_trip.run_chunk(0, 0, 5)
+
+        expected_move_counts = collections.Counter()
+        for state in states:
+            memo = tracer.trace(state.tobytes().decode("ascii"))
+            moves = solver.swaps_to_moves(memo.edge_swap_letters, memo.corner_swap_letters)
+            expected_move_counts[len(moves.split())] += 1
+        assert chunk_result.move_counts == expected_move_counts
+
+    @pytest.mark.parametrize("backend", list(Backend), ids=lambda backend: backend.value)
+    def test_moves_are_replayed_on_the_backend(self, monkeypatch, backend):
+        apply_moves = Cube.apply_moves
+        # Dropping the last move of every solve must be caught
+        monkeypatch.setattr(
+            Cube, "apply_moves", lambda cube, moves: apply_moves(cube, moves.rsplit(" ", 1)[0])
+        )
+
+        report = run_stress_test(10, backend=backend)
+
+        assert report.n_failures == 10
@@ -0,0 +1,64 @@
+import pytest
+
+from cube import make_white_up_green_front_cube
+from solver import OldPochmannSolver
+from tracer import Memo, MemoTracer, UntraceableState
+
+SOLVED_FLAT_STR = "WWWWWWWWW" + "OOOGGGRRRBBB" * 3 + "YYYYYYYYY"
+
+
+class TestMemoTracer:
+    @pytest.fixture
+    def memo_tracer(self):
+        return MemoTracer()
+
+    @pytest.fixture
+    def cube(self):
+        return make_white_up_green_front_cube()
+
+    def test_trace_solved(self, memo_tracer, cube):
+        assert memo_tracer.trace(cube) == Memo("", "")
+
+    @pytest.mark.parametrize(
+        "edge_swap_letters, corner_swap_letters",
+        [
+            pytest.param("D", "W", id="no_setup"),
+            pytest.param("AC", "", id="edge_three_cycle"),
+            pytest.param("", "BCDF", id="corner_cycles"),
+        ],
+    )
+    def test_trace_reverses_solve(self, memo_tracer, cube, edge_swap_letters, corner_swap_letters):
+        # Every letter is an exchange, so the memo applied in reverse order undoes the solve
+        OldPochmannSolver().solve(cube, edge_swap_letters[::-1], corner_swap_letters[::-1])
+        assert memo_tracer.trace(cube) == Memo(edge_swap_letters, corner_swap_letters)
+
+    @pytest.mark.parametrize("corners_first", [False, True])
+    @pytest.mark.parametrize(
+        "scramble_moves",
+        [
+            "R U Ri Ui",
+            "F R U Ri Ui Fi",
+            "D L Bi Ui R F Di Li B U Ri Fi D D L L B U U Ri",
+            "Ri Di F Li Ui B R D Fi L U Bi Ri Ri Di Di F F L Ui",
+        ],
+    )
+    def test_round_trip(self, memo_tracer, cube, scramble_moves, corners_first):
+        cube.apply_moves(scramble_moves)
+
+        memo = memo_tracer.trace(cube.as_flat_str(), corners_first=corners_first)
+        OldPochmannSolver().solve(
+            cube, memo.edge_swap_letters, memo.corner_swap_letters, corners_first=corners_first
+        )
+
+        assert cube.is_solved()
+
+    def test_trace_flipped_buffer_raises_untraceable_state(self, memo_tracer):
+        flipped_buffer_flat_str = SOLVED_FLAT_STR[:5] + "R" + SOLVED_FLAT_STR[6:16] + "W"
+        flipped_buffer_flat_str += SOLVED_FLAT_STR[17:]
+
+        with pytest.raises(UntraceableState):
+            memo_tracer.trace(flipped_buffer_flat_str)
+
+    def test_trace_unknown_colors_raises_untraceable_state(self, memo_tracer):
+        with pytest.raises(UntraceableState):
+            memo_tracer.trace("X" + SOLVED_FLAT_STR[1:])
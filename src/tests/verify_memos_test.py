@@ -0,0 +1,157 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from verify_memos import main
+
+SOLVED_FLAT_STR = "WWWWWWWWW" + "OOOGGGRRRBBB" * 3 + "YYYYYYYYY"
+T_PERM_FLAT_STR = "WWWWWWWWW" + "OROGGRBOGRBB" + "OOOGGGRRRBBB" * 2 + "YYYYYYYYY"
+
+
+class TestVerifyMemos:
+    @pytest.fixture
+    def runner(self):
+        return CliRunner()
+
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_results_are_in_input_order(self, runner, processes):
+        records = [
+            {"edge_swap_letters": "D", "corner_swap_letters": ""},
+            {"edge_swap_letters": "DD", "corner_swap_letters": "WW"},
+            {
+                "edge_swap_letters": "D",
+                "corner_swap_letters": "",
+                "initial_flat_str": T_PERM_FLAT_STR,
+            },
+        ] * 3
+        input_str = "".join(json.dumps(record) + "\n" for record in records)
+
+        result = runner.invoke(main, ["-p", str(processes), "-c", "1"], input=input_str)
+
+        assert result.exit_code == 0
+        results = [json.loads(line) for line in result.output.splitlines()]
+        assert [result["flat_str"] for result in results] == [
+            T_PERM_FLAT_STR,
+            SOLVED_FLAT_STR,
+            SOLVED_FLAT_STR,
+        ] * 3
+        assert [result["solved"] for result in results] == [False, True, True] * 3
+        assert [result["n_moves"] for result in results] == [15, 60, 15] * 3
+
+    def test_csv_input(self, runner):
+        result = runner.invoke(
+            main,
+            ["--input-format", "csv", "-p", "1"],
+            input="edge_swap_letters,corner_swap_letters\nD,\n",
+        )
+
+        assert result.exit_code == 0
+        assert json.loads(result.output)["flat_str"] == T_PERM_FLAT_STR
+
+    def test_unknown_letter(self, runner):
+        result = runner.invoke(
+            main, ["-p", "1"], input='{"edge_swap_letters": "DM", "corner_swap_letters": "W"}\n'
+        )
+
+        assert result.exit_code == 0
+        verification = json.loads(result.output)
+        assert verification["first_failing_letter"] == "M"
+        assert not verification["solved"]
+
+    @pytest.mark.parametrize(
+        "record, expected_error",
+        [
+            pytest.param(
+                {"edge_swap_letters": 5}, "'edge_swap_letters' must be a string", id="int"
+            ),
+            pytest.param({"corner_swap_letters": ["W"]}, "must be a string", id="list"),
+            pytest.param({"initial_flat_str": []}, "must be a string", id="empty_list"),
+            pytest.param({"edge_swap_letters": 0}, "must be a string", id="zero"),
+            pytest.param({"initial_flat_str": "W" * 53}, "53 stickers instead of 54", id="short"),
+            pytest.param({"initial_flat_str": "é" * 54}, "unknown colors 'é'", id="non_ascii"),
+            pytest.param({"initial_flat_str": "X" * 54}, "unknown colors 'X'", id="unknown_color"),
+        ],
+    )
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_invalid_records_are_reported(self, runner, record, expected_error, processes):
+        input_str = json.dumps(record) + "\n" + '{"edge_swap_letters": "DD"}\n'
+
+        result = runner.invoke(main, ["-p", str(processes), "-c", "1"], input=input_str)
+
+        assert result.exit_code == 0
+        verifications = [json.loads(line) for line in result.output.splitlines()]
+        assert expected_error in verifications[0]["error"]
+        assert not verifications[0]["solved"]
+        assert verifications[1]["solved"]
+
+    @pytest.mark.parametrize(
+        "line, expected_error",
+        [
+            pytest.param('{"edge_swap_letters": ', "invalid JSON on line 1", id="malformed_json"),
+            pytest.param("[1, 2]", "must be a JSON object, not list", id="not_an_object"),
+            pytest.param('"D"', "must be a JSON object, not str", id="string"),
+        ],
+    )
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_unparsable_records_are_reported_in_order(
+        self, runner, line, expected_error, processes
+    ):
+        input_str = line + "\n" + '{"edge_swap_letters": "DD"}\n'
+
+        result = runner.invoke(main, ["-p", str(processes), "-c", "1"], input=input_str)
+
+        assert result.exit_code == 0
+        verifications = [json.loads(line) for line in result.output.splitlines()]
+        assert expected_error in verifications[0]["error"]
+        assert not verifications[0]["solved"]
+        assert verifications[1]["solved"]
+
+    def test_failed_solve_reports_first_wrong_letter(self, runner):
+        record = {
+            "edge_swap_letters": "C",
+            "corner_swap_letters": "",
+            "initial_flat_str": T_PERM_FLAT_STR,
+        }
+
+        result = runner.invoke(main, ["-p", "1"], input=json.dumps(record) + "\n")
+
+        assert result.exit_code == 0
+        verification = json.loads(result.output)
+        assert not verification["solved"]
+        assert verification["first_failing_letter"] == "C"
+        assert verification["suggested_letter"] == "D"
+
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_result_cache(self, runner, tmp_path, processes):
+        records = [
+            {"edge_swap_letters": "D", "corner_swap_letters": ""},
+            {"edge_swap_letters": "DD", "corner_swap_letters": "WW"},
+        ]
+        input_str = "".join(json.dumps(record) + "\n" for record in records)
+        args = ["-p", str(processes), "-c", "1", "--result-cache", str(tmp_path / "results.db")]
+
+        first_result = runner.invoke(main, args, input=input_str)
+        second_result = runner.invoke(main, args, input=input_str)
+
+        assert first_result.exit_code == second_result.exit_code == 0
+        assert first_result.output == second_result.output
+        assert [json.loads(line)["solved"] for line in second_result.output.splitlines()] == [
+            False,
+            True,
+        ]
+
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_pair_tables_dir(self, runner, tmp_path, processes):
+        records = [
+            {"edge_swap_letters": "D", "corner_swap_letters": ""},
+            {"edge_swap_letters": "DDC", "corner_swap_letters": "WW"},
+        ]
+        input_str = "".join(json.dumps(record) + "\n" for record in records)
+        args = ["-p", str(processes), "-c", "1"]
+
+        result = runner.invoke(main, [*args, "--pair-tables-dir", str(tmp_path)], input=input_str)
+
+        assert result.exit_code == 0
+        assert result.output == runner.invoke(main, args, input=input_str).output
+        assert len(list(tmp_path.glob("letter_pairs_*.npy"))) == 1
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import dataclasses
+import functools
+import itertools
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from moves import (
+    FACE_STICKER_INDICES,
+    STICKER_COORDINATES,
+    STICKER_DTYPE,
+    are_solved,
+    compose,
+)
+from solver import OldPochmannSolver
+
+if TYPE_CHECKING:
+    from typing import Callable
+
+    from cube import Cube
+    from solver import SetupMove
+
+_CENTER_STICKERS = tuple(FACE_STICKER_INDICES[:, 4].tolist())
+
+# Stickers the setup moves bring the traced piece to, i.e., the stickers that the edge and
+# corner swap algorithms exchange with the buffer when no setup moves are needed
+EDGE_TARGET_STICKER = 3
+CORNER_TARGET_STICKER = 47
+
+
+class UntraceableState(Exception):
+    """Raise when a cube state cannot be traced into swap letters of the solver."""
+
+
+@dataclasses.dataclass(frozen=True)
+class Memo:
+    edge_swap_letters: str
+    corner_swap_letters: str
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class PieceTables:
+    """Sticker lookup tables of one piece type (edges or corners).
+
+    Stickers of every piece are listed in the same cyclic order, so a piece keeps the order of
+    its colors wherever it is moved.
+    """
+
+    pieces: list[tuple[int, ...]]
+    piece_indices: dict[int, int]  # sticker -> index of its piece
+    piece_stickers_from: dict[int, tuple[int, ...]]  # sticker -> piece stickers starting with it
+    sticker_letters: dict[int, str]
+    letter_stickers: dict[str, int]
+    piece_reference_stickers: list[int | None]  # sticker with the lowest letter of each piece
+    buffer_sticker: int
+
+    @property
+    def buffer_piece_index(self) -> int:
+        return self.piece_indices[self.buffer_sticker]
+
+    def home_sticker_lookup(self, flat_str: str) -> Callable[[int], int]:
+        """Return a function finding the sticker where the color at a given sticker belongs."""
+        home_stickers = _home_stickers_lookup("".join(flat_str[i] for i in _CENTER_STICKERS), self)
+
+        def home_sticker(sticker: int) -> int:
+            colors = "".join(flat_str[i] for i in self.piece_stickers_from[sticker])
+            try:
+                return home_stickers[colors]
+            except KeyError:
+                raise UntraceableState(f"unrecognized piece colors '{colors}'")
+
+        return home_sticker
+
+    def letter(self, sticker: int) -> str:
+        try:
+            return self.sticker_letters[sticker]
+        except KeyError:
+            raise UntraceableState(f"no swap letter is assigned to sticker {sticker}")
+
+    @classmethod
+    def build(
+        cls,
+        n_piece_stickers: int,
+        setup_moves_mapping: dict[str, SetupMove],
+        swap_permutation: np.ndarray,
+        target_sticker: int,
+        compile_moves: Callable[[str], np.ndarray],
+    ) -> PieceTables:
+        stickers_by_position = {}
+        for sticker, (position, _) in enumerate(STICKER_COORDINATES):
+            stickers_by_position.setdefault(position, []).append(sticker)
+        pieces = [
+            _in_cyclic_order(tuple(stickers))
+            for stickers in stickers_by_position.values()
+            if len(stickers) == n_piece_stickers
+        ]
+
+        piece_indices = {}
+        piece_stickers_from = {}
+        for piece_index, piece in enumerate(pieces):
+            for i, sticker in enumerate(piece):
+                piece_indices[sticker] = piece_index
+                piece_stickers_from[sticker] = piece[i:] + piece[:i]
+
+        # The setup moves of a letter bring the sticker of the letter to the target sticker
+        letter_stickers = {}
+        sticker_letters = {}
+        for letter, setup_move in setup_moves_mapping.items():
+            sticker = int(compile_moves(setup_move.moves)[target_sticker])
+            letter_stickers[letter] = sticker
+            sticker_letters.setdefault(sticker, letter)
+
+        piece_reference_stickers = [
+            min(
+                (sticker for sticker in piece if sticker in sticker_letters),
+                key=sticker_letters.get,
+                default=None,
+            )
+            for piece in pieces
+        ]
+
+        return cls(
+            pieces=pieces,
+            piece_indices=piece_indices,
+            piece_stickers_from=piece_stickers_from,
+            sticker_letters=sticker_letters,
+            letter_stickers=letter_stickers,
+            piece_reference_stickers=piece_reference_stickers,
+            buffer_sticker=int(swap_permutation[target_sticker]),
+        )
+
+
+def _in_cyclic_order(stickers: tuple[int, ...]) -> tuple[int, ...]:
+    if len(stickers) != 3:
+        return stickers
+    # Rotations preserve the handedness of the sticker normals
+    normals = [STICKER_COORDINATES[sticker][1] for sticker in stickers]
+    if round(np.linalg.det(normals)) < 0:
+        stickers = (stickers[0], stickers[2], stickers[1])
+    return stickers
+
+
+class MemoTracer:
+    """Derive the Old Pochmann swap letters that solve a given cube state.
+
+    Pieces are traced from the buffer piece, breaking into a new cycle at the unsolved piece with
+    the lowest letter whenever the buffer piece returns to the buffer. Flipped or twisted pieces
+    that are already in place are resolved by the cycle breaks too.
+    """
+
+    def __init__(
+        self,
+        solver: OldPochmannSolver | None = None,
+        edge_target_sticker: int = EDGE_TARGET_STICKER,
+        corner_target_sticker: int = CORNER_TARGET_STICKER,
+    ) -> None:
+        if solver is None:
+            solver = OldPochmannSolver()
+        self.solver = solver
+
+        compile_moves = solver.move_compiler.compile
+        self.edge_tables = PieceTables.build(
+            2,
+            solver.edge_setup_moves_mapping,
+            compile_moves(solver.edge_swap_moves),
+            edge_target_sticker,
+            compile_moves,
+        )
+        self.corner_tables = PieceTables.build(
+            3,
+            solver.corner_setup_moves_mapping,
+            compile_moves(solver.corner_swap_moves),
+            corner_target_sticker,
+            compile_moves,
+        )
+
+    def trace(self, cube: Cube | str, corners_first: bool = False) -> Memo:
+        """Trace the letters that solve the cube (given as a `Cube` or a flat string).
+
+        The second phase is traced on the state left by the first one (followed by the parity
+        moves if there is an odd number of edge swaps) since the swap algorithms of one piece type
+        exchange two pieces of the other type as a side effect.
+        """
+        flat_str = cube if isinstance(cube, str) else cube.as_flat_str()
+        letter_transforms = self.solver.letter_transforms
+
+        first_tables, second_tables = self.edge_tables, self.corner_tables
+        first_transforms, second_transforms = letter_transforms.edges, letter_transforms.corners
+        if corners_first:
+            first_tables, second_tables = second_tables, first_tables
+            first_transforms, second_transforms = second_transforms, first_transforms
+
+        first_letters = self._trace_pieces(flat_str, first_tables)
+
+        permutations = [first_transforms[letter] for letter in first_letters]
+        # The no. of edge swaps and of corner swaps of a solvable cube have the same parity
+        if len(first_letters) % 2 == 1:
+            permutations.append(letter_transforms.parity)
+        stickers = np.frombuffer(flat_str.encode("ascii"), dtype=STICKER_DTYPE)
+        stickers = stickers[compose(*permutations)]
+
+        second_letters = self._trace_pieces(stickers.tobytes().decode("ascii"), second_tables)
+        stickers = stickers[compose(*(second_transforms[letter] for letter in second_letters))]
+        if not are_solved(stickers):
+            raise UntraceableState("state is not solvable")
+
+        if corners_first:
+            return Memo(edge_swap_letters=second_letters, corner_swap_letters=first_letters)
+        return Memo(edge_swap_letters=first_letters, corner_swap_letters=second_letters)
+
+    def _trace_pieces(self, flat_str: str, tables: PieceTables) -> str:
+        letter = tables.letter
+        home_sticker = tables.home_sticker_lookup(flat_str)
+
+        buffer_piece_index = tables.buffer_piece_index
+        unsolved_piece_indices = sorted(
+            (
+                piece_index
+                for piece_index, piece in enumerate(tables.pieces)
+                if (piece_index != buffer_piece_index) and (home_sticker(piece[0]) != piece[0])
+            ),
+            key=lambda piece_index: tables.sticker_letters.get(
+                tables.piece_reference_stickers[piece_index], ""
+            ),
+        )
+        visited_piece_indices = set()
+
+        letters = []
+        cycle_piece_index = buffer_piece_index
+        sticker = tables.buffer_sticker
+        while True:
+            target_sticker = home_sticker(sticker)
+            target_piece_index = tables.piece_indices[target_sticker]
+
+            if target_piece_index == cycle_piece_index:
+                if cycle_piece_index != buffer_piece_index:
+                    letters.append(letter(target_sticker))
+                cycle_piece_index = next(
+                    (
+                        piece_index
+                        for piece_index in unsolved_piece_indices
+                        if piece_index not in visited_piece_indices
+                    ),
+                    None,
+                )
+                if cycle_piece_index is None:
+                    break
+                # Cycle break: the buffer piece is shot to an unsolved piece
+                visited_piece_indices.add(cycle_piece_index)
+                sticker = tables.piece_reference_stickers[cycle_piece_index]
+                letters.append(letter(sticker))
+            else:
+                visited_piece_indices.add(target_piece_index)
+                letters.append(letter(target_sticker))
+                sticker = target_sticker
+
+        return "".join(letters)
+
+
+@functools.lru_cache(maxsize=64)
+def _home_stickers_lookup(center_colors: str, tables: PieceTables) -> dict[str, int]:
+    """Map colors of a piece (in the cyclic order) to the sticker where the first color belongs."""
+    face_colors = {}
+    for face_index, center_color in enumerate(center_colors):
+        normal = STICKER_COORDINATES[FACE_STICKER_INDICES[face_index, 4]][1]
+        face_colors[normal] = center_color
+
+    home_stickers = {}
+    for sticker in itertools.chain.from_iterable(tables.pieces):
+        colors = "".join(
+            face_colors[STICKER_COORDINATES[piece_sticker][1]]
+            for piece_sticker in tables.piece_stickers_from[sticker]
+        )
+        home_stickers[colors] = sticker
+    return home_stickers
@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import csv
+import dataclasses
+import json
+import multiprocessing
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import click
+import more_itertools
+
+from cube import Color, make_white_up_green_front_cube
+from diagnosis import SolveDiagnoser
+from moves import N_STICKERS
+from pair_table import LetterPairTable
+from result_cache import DEFAULT_MAX_ENTRIES, ResultCache
+from solver import OldPochmannSolver
+from tracer import MemoTracer, UntraceableState
+
+if TYPE_CHECKING:
+    from typing import IO, Any, Iterable, Iterator, TypeAlias
+
+    Record: TypeAlias = dict[str, Any]
+
+# No. of chunks per worker process that are read ahead of the writer
+N_CHUNKS_IN_FLIGHT_PER_PROCESS = 4
+
+_COLOR_VALUES = {color.value for color in Color}
+
+_worker_options: dict[str, bool] = {}
+_worker_verifier: MemoVerifier | None = None
+
+
+@click.command()
+@click.argument("input_file", type=click.File("r"), default="-")
+@click.option(
+    "-o",
+    "--output-file",
+    type=click.File("w"),
+    default="-",
+    show_default=True,
+    help="JSONL file to write the results to",
+)
+@click.option(
+    "--input-format",
+    type=click.Choice(["jsonl", "csv"]),
+    default=None,
+    help="format of the input records (inferred from the file extension by default)",
+)
+@click.option(
+    "--corners-first",
+    is_flag=True,
+    help="indicates whether to apply corner swaps before edge swaps",
+)
+@click.option(
+    "--reverse-swap-letters",
+    is_flag=True,
+    help="indicates whether to reverse swap letter sequences (useful for verifying solves)",
+)
+@click.option(
+    "--apply-parity",
+    is_flag=True,
+    help="indicates whether to apply parity if there is an odd number of swaps",
+)
+@click.option(
+    "-p",
+    "--processes",
+    type=click.IntRange(min=1),
+    default=multiprocessing.cpu_count(),
+    show_default=True,
+    help="no. of worker processes",
+)
+@click.option(
+    "-c",
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=256,
+    show_default=True,
+    help="no. of records sent to a worker process at once",
+)
+@click.option(
+    "--result-cache",
+    "result_cache_path",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="SQLite database persisting the solve results across runs (created if missing)",
+)
+@click.option(
+    "--result-cache-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_ENTRIES,
+    show_default=True,
+    help="no. of results kept in the result cache before the oldest ones are evicted",
+)
+@click.option(
+    "--pair-tables-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="directory of the letter pair tables memory-mapped by the workers (built if missing)",
+)
+def main(
+    input_file: IO[str],
+    output_file: IO[str],
+    input_format: str | None,
+    corners_first: bool,
+    reverse_swap_letters: bool,
+    apply_parity: bool,
+    processes: int,
+    chunk_size: int,
+    result_cache_path: str | None,
+    result_cache_size: int,
+    pair_tables_dir: Path | None,
+) -> None:
+    """Verify memos read from INPUT_FILE (JSONL or CSV, stdin by default).
+
+    Every record holds `edge_swap_letters` and `corner_swap_letters`, and optionally the
+    `initial_flat_str` the letters are applied to (the solved cube by default). One JSONL result
+    is written per record, in the input order. Failed solves of an `initial_flat_str` report the
+    first wrong letter and a suggested correction.
+    """
+    if input_format is None:
+        input_format = "csv" if input_file.name.endswith(".csv") else "jsonl"
+    records = read_records(input_file, input_format)
+    options = {
+        "corners_first": corners_first,
+        "reverse_swap_letters": reverse_swap_letters,
+        "apply_parity": apply_parity,
+    }
+
+    result_cache = None
+    if result_cache_path is not None:
+        result_cache = ResultCache(result_cache_path, max_entries=result_cache_size)
+
+    for result in verify_records(
+        records, options, processes, chunk_size, result_cache, pair_tables_dir
+    ):
+        output_file.write(json.dumps(result) + "\n")
+
+
+@dataclasses.dataclass(frozen=True)
+class InvalidRecord:
+    """Input line that cannot be parsed, kept in place of its record to report it in order."""
+
+    error: str
+
+
+def read_records(input_file: IO[str], input_format: str) -> Iterator[Record | InvalidRecord]:
+    if input_format == "csv":
+        yield from csv.DictReader(input_file)
+    else:
+        for line_number, line in enumerate(input_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield InvalidRecord(f"invalid JSON on line {line_number}: {e}")
+
+
+def verify_records(
+    records: Iterable[Record | InvalidRecord],
+    options: dict[str, bool],
+    processes: int,
+    chunk_size: int,
+    result_cache: ResultCache | None = None,
+    pair_tables_dir: Path | None = None,
+) -> Iterator[Record]:
+    if processes == 1:
+        _init_worker(options, result_cache, pair_tables_dir)
+        yield from map(_verify_record, records)
+        return
+
+    if pair_tables_dir is not None:
+        # Built once up front, so that the workers only map the same file
+        LetterPairTable.load(OldPochmannSolver(), pair_tables_dir)
+
+    # `Pool.imap` would consume the whole input eagerly, so the records are submitted in bounded
+    # windows to keep the memory usage independent of the input size.
+    window_size = processes * chunk_size * N_CHUNKS_IN_FLIGHT_PER_PROCESS
+    with multiprocessing.Pool(
+        processes, initializer=_init_worker, initargs=(options, result_cache, pair_tables_dir)
+    ) as pool:
+        for records_window in more_itertools.chunked(records, window_size):
+            yield from pool.imap(_verify_record, records_window, chunksize=chunk_size)
+
+
+def _init_worker(
+    options: dict[str, bool],
+    result_cache: ResultCache | None = None,
+    pair_tables_dir: Path | None = None,
+) -> None:
+    global _worker_options, _worker_verifier
+
+    _worker_options = options
+    # Every worker process opens its own connection to the result cache
+    solver = OldPochmannSolver(result_cache=result_cache, pair_tables_dir=pair_tables_dir)
+    # Mapped at startup rather than by the first record
+    solver.letter_pair_table
+    _worker_verifier = MemoVerifier(solver)
+
+
+def _verify_record(record: Record | InvalidRecord) -> Record:
+    return _worker_verifier.verify(record, _worker_options)
+
+
+def _make_result(
+    edge_swap_letters: Any, corner_swap_letters: Any, error: str | None = None
+) -> Record:
+    return {
+        "edge_swap_letters": edge_swap_letters,
+        "corner_swap_letters": corner_swap_letters,
+        "flat_str": None,
+        "solved": False,
+        "n_moves": None,
+        "first_failing_letter": None,
+        "suggested_letter": None,
+        "error": error,
+    }
+
+
+def _get_field(record: Record, key: str, default: str) -> Any:
+    # Empty CSV columns and JSON nulls fall back to the default, but other values are kept as they
+    # are, so that values of the wrong type are reported
+    value = record.get(key)
+    return default if value is None or value == "" else value
+
+
+class MemoVerifier:
+    """Verify memo records with a warm solver (one instance per worker process)."""
+
+    def __init__(self, solver: OldPochmannSolver | None = None) -> None:
+        if solver is None:
+            solver = OldPochmannSolver()
+        self.solver = solver
+        self.diagnoser = SolveDiagnoser(MemoTracer(solver))
+        self.initial_flat_str = make_white_up_green_front_cube().as_flat_str()
+
+    def verify(self, record: Record | InvalidRecord, options: dict[str, bool]) -> Record:
+        # A bad record is reported in its result rather than failing the whole run
+        if isinstance(record, InvalidRecord):
+            return _make_result(None, None, error=record.error)
+        if not isinstance(record, dict):
+            return _make_result(
+                None, None, error=f"record must be a JSON object, not {type(record).__name__}"
+            )
+
+        edge_swap_letters = _get_field(record, "edge_swap_letters", "")
+        corner_swap_letters = _get_field(record, "corner_swap_letters", "")
+        initial_flat_str = _get_field(record, "initial_flat_str", self.initial_flat_str)
+
+        result = _make_result(edge_swap_letters, corner_swap_letters)
+        for key, value in (
+            ("edge_swap_letters", edge_swap_letters),
+            ("corner_swap_letters", corner_swap_letters),
+            ("initial_flat_str", initial_flat_str),
+        ):
+            if not isinstance(value, str):
+                result["error"] = f"'{key}' must be a string, not {type(value).__name__}"
+                return result
+        if len(initial_flat_str) != N_STICKERS:
+            result["error"] = (
+                f"initial state has {len(initial_flat_str)} stickers instead of {N_STICKERS}"
+            )
+            return result
+        unknown_colors = set(initial_flat_str) - _COLOR_VALUES
+        if unknown_colors:
+            result["error"] = (
+                f"initial state has unknown colors {''.join(sorted(unknown_colors))!r}"
+            )
+            return result
+
+        if options.get("reverse_swap_letters"):
+            edge_swap_letters = edge_swap_letters[::-1]
+            corner_swap_letters = corner_swap_letters[::-1]
+            result["edge_swap_letters"] = edge_swap_letters
+            result["corner_swap_letters"] = corner_swap_letters
+
+        for piece_type, swap_letters, setup_moves_mapping in (
+            ("edge", edge_swap_letters, self.solver.edge_setup_moves_mapping),
+            ("corner", corner_swap_letters, self.solver.corner_setup_moves_mapping),
+        ):
+            for i, swap_letter in enumerate(swap_letters):
+                if swap_letter not in setup_moves_mapping:
+                    result["first_failing_letter"] = swap_letter
+                    result["error"] = f"unknown {piece_type} letter '{swap_letter}' at position {i}"
+                    return result
+
+        solve_args = (
+            edge_swap_letters,
+            corner_swap_letters,
+            bool(options.get("corners_first")),
+            bool(options.get("apply_parity")),
+        )
+        result["flat_str"], result["solved"] = self.solver.solve_flat_str(
+            initial_flat_str, *solve_args
+        )
+        result["n_moves"] = len(self.solver.swaps_to_moves(*solve_args).split())
+
+        # Letters applied to the solved cube are meant to scramble it, so only solves are
+        # diagnosed
+        if record.get("initial_flat_str") and not result["solved"]:
+            self._diagnose(initial_flat_str, solve_args, result)
+
+        return result
+
+    def _diagnose(
+        self, initial_flat_str: str, solve_args: tuple[str, str, bool, bool], result: Record
+    ) -> None:
+        try:
+            first_error = self.diagnoser.diagnose(initial_flat_str, *solve_args).first_error
+        except UntraceableState as e:
+            result["error"] = f"cannot diagnose the solve: {e}"
+            return
+        if first_error is None:
+            return
+
+        result["first_failing_letter"] = first_error.letter
+        result["suggested_letter"] = first_error.suggested_letter
+        if first_error.letter is None:
+            result["error"] = f"missing {first_error.piece_type} letters"
+        else:
+            result["error"] = (
+                f"wrong {first_error.piece_type} letter '{first_error.letter}' at position "
+                f"{first_error.position}"
+            )
+
+
+if __name__ == "__main__":
+    main()